@@ -1,3 +1,5 @@
+import json
+
 from llama_index.core.agent.workflow import (
     AgentWorkflow,
     AgentStream,
@@ -6,39 +8,191 @@ from llama_index.core.agent.workflow import (
     ToolCallResult,
 )
 
-from assistant.agents.module_retrieval_agent import module_retrieval_agent
+from assistant.agents.module_retrieval_agent import module_retrieval_agent, narrate_retrieved_modules, retrieve_modules
 from assistant.agents.study_planner_agent import study_planner_agent
-from utils.supabase_methods import get_student
-
-
-async def execute_agent_workflow(user_msg: str, retrieval_strategy: str):
-    student = get_student()
-    taken_modules = student.taken_courses if student.taken_courses else []
-    desired_occupations = student.desired_jobs
-    expected_semesters = student.expected_semesters
-    desired_lecturers = student.desired_lecturers
-    available_days = student.available_days
-    assessment_type = student.assessment_type
-    oral_assessment = student.oral_assessment
-    project_work = student.project_work
-    agent_workflow = AgentWorkflow(
-        agents=[
-            study_planner_agent,
-            module_retrieval_agent,
-        ],
-        root_agent=module_retrieval_agent.name,
-        initial_state={
-            "taken_modules": taken_modules,
-            "desired_occupations": desired_occupations,
-            "expected_semesters": expected_semesters,
-            "retrieval_strategy": retrieval_strategy,
-            "desired_lecturers": desired_lecturers,
-            "available_days": available_days,
-            "assessment_type": assessment_type,
-            "oral_assessment": oral_assessment,
-            "project_work": project_work
-        },
+from assistant.llm import llm
+from utils.graphdb_methods import get_async_graphdb_methods
+from utils.llm_usage import LLMUsage, track_llm_usage
+from utils.models import StudyPlan
+from utils.plan_solver import upcoming_semester
+from utils.plan_validator import parse_study_plan, validate_study_plan
+from utils.recommendation_cache import get_recommendation_cache, profile_fingerprint
+from utils.supabase_methods import get_student, get_work_experience
+from utils.tracing import current_span, start_span, start_trace, summarize_trace, use_span
+
+
+class AgentSwitched:
+    def __init__(self, agent_name: str):
+        """An agent took over the conversation."""
+        self.agent_name = agent_name
+
+
+class ToolStarted:
+    def __init__(self, agent_name: str, tool_name: str):
+        """An agent called a tool."""
+        self.agent_name = agent_name
+        self.tool_name = tool_name
+
+
+class ToolFinished:
+    def __init__(self, agent_name: str, tool_name: str):
+        """A tool call returned."""
+        self.agent_name = agent_name
+        self.tool_name = tool_name
+
+
+class TextDelta:
+    def __init__(self, agent_name: str, text: str):
+        """A chunk of text generated by an agent."""
+        self.agent_name = agent_name
+        self.text = text
+
+
+class PlanCompleted:
+    def __init__(self, content: str, cached: bool = False, usage=None):
+        """
+        The final (validated) study plan; `cached` when it was served from the
+        recommendation cache, `usage` the LLMUsage of the run otherwise.
+        `trace_id` and `timing` (summarize_trace rows) are set when tracing is on.
+        """
+        self.content = content
+        self.cached = cached
+        self.usage = usage
+        self.trace_id = None
+        self.timing = None
+
+
+# The retrieval agent runs the strategy and explains the modules before handing off to the planner
+AGENT_MODE = "agent"
+# The strategy runs in Python and only the planner agent is called
+DIRECT_MODE = "direct"
+
+PLANNER_MESSAGE = "Create my study plan and weekly schedule from the retrieved modules."
+
+# Request of the student for each retrieval strategy
+STRATEGY_MESSAGES = {
+    "past_experience": "Suggest me some modules based on my past work experiences.",
+    "future_goals": "Suggest me some modules based on my future work goals.",
+    "preferences": "Suggest me some modules based on my preferences.",
+    "balanced": "Suggest me some modules based on a balanced approach of past work, future goals, and preferences.",
+}
+
+
+async def execute_agent_workflow(user_msg: str, retrieval_strategy: str, mode: str = AGENT_MODE, narrate: bool = False,
+                                 student=None, work_experiences=None):
+    """Run the agent workflow and return the final study plan."""
+    content = None
+    async for event in stream_agent_workflow(user_msg, retrieval_strategy, mode, narrate, student, work_experiences):
+        if isinstance(event, PlanCompleted):
+            content = event.content
+    return content
+
+
+async def stream_agent_workflow(user_msg: str, retrieval_strategy: str, mode: str = AGENT_MODE, narrate: bool = False,
+                                student=None, work_experiences=None):
+    """
+    Run the agent workflow, yielding its progress as it happens.
+
+    Yields AgentSwitched, ToolStarted, ToolFinished and TextDelta events while
+    the agents work, then a single PlanCompleted event with the final plan.
+
+    Args:
+        user_msg (str): Request of the student, sent to the retrieval agent in AGENT_MODE.
+        retrieval_strategy (str): Selected retrieval strategy.
+        mode (str): AGENT_MODE, or DIRECT_MODE to skip the LLM turns of the
+            retrieval agent and hand the retrieved modules straight to the planner.
+        narrate (bool): In DIRECT_MODE, also stream an explanation of the retrieved modules.
+        student (Student): Profile to plan for, the logged-in student if None.
+        work_experiences (list): Work experience rows of the student, those of
+            the logged-in user if None. Both must be given outside of the
+            Streamlit script thread, e.g. in background jobs.
+    """
+    run_span = start_trace("study_plan", retrieval_strategy=retrieval_strategy, mode=mode)
+    # The student is also the owner of the LLM calls in the scheduler queue
+    usage = track_llm_usage(LLMUsage())
+    try:
+        if student is None:
+            student = get_student()
+        if work_experiences is None:
+            work_experiences = get_work_experience()
+        usage.owner = student.id
+        run_span.set(student_id=student.id)
+
+        events = _run_agent_workflow(user_msg, retrieval_strategy, mode, narrate, student, work_experiences, usage)
+        async for event in events:
+            if isinstance(event, PlanCompleted):
+                run_span.set(plan_cached=event.cached, **usage.to_dict())
+                run_span.end()
+                if run_span.trace is not None:
+                    event.trace_id = run_span.trace.trace_id
+                    event.timing = summarize_trace(run_span.trace.spans)
+            yield event
+            # The generator may resume in another context than the one it started in
+            track_llm_usage(usage)
+            use_span(run_span)
+    except Exception as e:
+        run_span.end(e)
+        raise
+    finally:
+        # Also ends the trace of a consumer that stopped early
+        run_span.end()
+
+
+async def _run_agent_workflow(user_msg, retrieval_strategy, mode, narrate, student, work_experiences, usage):
+    # A plan already generated for the same profile, strategy, graph, first semester and options is returned as is
+    graph_version = await get_async_graphdb_methods().current_graph_version()
+    start_semester = upcoming_semester()
+    fingerprint = profile_fingerprint(student, work_experiences, retrieval_strategy, graph_version)
+    plan_fingerprint = profile_fingerprint(
+        student, work_experiences, retrieval_strategy, graph_version, start_semester,
+        {"mode": mode, "narrate": narrate},
     )
+    recommendation_cache = get_recommendation_cache()
+    cached_plan = recommendation_cache.get(student.id, "plan", plan_fingerprint)
+    if cached_plan is not None:
+        yield PlanCompleted(cached_plan, cached=True)
+        return
+
+    state = {
+        "taken_modules": student.taken_courses if student.taken_courses else [],
+        "desired_occupations": student.desired_jobs,
+        "expected_semesters": student.expected_semesters,
+        "retrieval_strategy": retrieval_strategy,
+        "desired_lecturers": student.desired_lecturers,
+        "available_days": student.available_days,
+        "assessment_type": student.assessment_type,
+        "oral_assessment": student.oral_assessment,
+        "project_work": student.project_work,
+        "work_experiences": work_experiences,
+        "student_id": student.id,
+        # Key of the retrieved modules, which do not depend on the first semester or the mode
+        "profile_fingerprint": fingerprint,
+        "start_semester": list(start_semester),
+    }
+
+    agents = [study_planner_agent, module_retrieval_agent]
+    root_agent = module_retrieval_agent.name
+    if mode == DIRECT_MODE:
+        yield AgentSwitched(module_retrieval_agent.name)
+        yield ToolStarted(module_retrieval_agent.name, "dispatch_module_suggestion")
+        with start_span("dispatch_module_suggestion", "tool", agent=module_retrieval_agent.name) as span:
+            summary = await retrieve_modules(state)
+            span.set(output_chars=len(summary))
+        yield ToolFinished(module_retrieval_agent.name, "dispatch_module_suggestion")
+        if "modules_retrieved" not in state:
+            yield PlanCompleted(summary, usage=usage)
+            return
+        # The state is written into the planner's first message: keep only what its tools read
+        state["modules_retrieved"] = [
+            {"module": {key: record["module"].get(key) for key in ("module_title", "module_type")}}
+            for record in state["modules_retrieved"]
+        ]
+        if narrate:
+            async for text in narrate_retrieved_modules(state, summary):
+                yield TextDelta(module_retrieval_agent.name, text)
+        agents, root_agent, user_msg = [study_planner_agent], study_planner_agent.name, PLANNER_MESSAGE
+
+    agent_workflow = AgentWorkflow(agents=agents, root_agent=root_agent, initial_state=state)
     handler = agent_workflow.run(
         user_msg=user_msg,
     )
@@ -54,10 +208,12 @@ async def execute_agent_workflow(user_msg: str, retrieval_strategy: str):
             print(f"\n{'=' * 50}")
             print(f"🤖 Agent: {current_agent}")
             print(f"{'=' * 50}\n")
+            yield AgentSwitched(current_agent)
 
         if isinstance(event, AgentStream):
             if event.delta:
                 print(event.delta, end="", flush=True)
+                yield TextDelta(current_agent, event.delta)
         # elif isinstance(event, AgentInput):
         # print("📥 Input:", event.input)
         elif isinstance(event, AgentOutput):
@@ -69,12 +225,99 @@ async def execute_agent_workflow(user_msg: str, retrieval_strategy: str):
                     [call.tool_name for call in event.tool_calls],
                 )
         elif isinstance(event, ToolCallResult):
-            print(f"🔧 Tool Result ({event.tool_name}):")
-            print(f"  Arguments: {event.tool_kwargs}")
-            print(f"  Output: {event.tool_output}")
+            # Arguments and output size are recorded on the tool span
+            print(f"🔧 Tool Result ({event.tool_name})")
+            yield ToolFinished(current_agent, event.tool_name)
         elif isinstance(event, ToolCall):
             print(f"🔨 Calling Tool: {event.tool_name}")
+            yield ToolStarted(current_agent, event.tool_name)
             # print(f"  With arguments: {event.tool_kwargs}")
     response = await handler
 
-    return response.response.content
+    content = response.response.content
+    if content:
+        with start_span("repair_study_plan", "validation"):
+            content = await repair_study_plan(content, await handler.ctx.get("state"))
+        recommendation_cache.put(student.id, "plan", plan_fingerprint, content)
+    # The usage is recorded on the run span by run_agent_workflow
+    yield PlanCompleted(content, usage=usage)
+
+
+def find_plan_violations(content, state):
+    """Validate the semester-wise plan written in an agent response; None if the response holds no plan."""
+    plan, declared_credits = parse_study_plan(content)
+    if not plan.semesters:
+        return None
+    return _validate_against_state(plan, state, declared_credits)
+
+
+def _validate_against_state(plan, state, declared_credits=None):
+    return validate_study_plan(
+        plan,
+        state.get("taken_modules", []),
+        {title: set(seasons) for title, seasons in state.get("module_seasons", {}).items()},
+        state.get("expected_semesters"),
+        declared_credits,
+    )
+
+
+def reference_plan_violations(state):
+    """Violations of the plan computed by plan_study_semesters, e.g. missing credits when too few modules are offered."""
+    if not state.get("study_plan"):
+        return []
+    return _validate_against_state(StudyPlan.from_dict(state["study_plan"]), state)
+
+
+def reference_plan_prompt(state, violations):
+    """
+    Describe the plan computed by plan_study_semesters for a repair prompt:
+    as valid only if it breaks no rule, else with its own `violations`.
+    """
+    if not state.get("study_plan"):
+        return "No reference semester plan is available.\n\n"
+    reference = json.dumps(state["study_plan"])
+    if not violations:
+        return f"Reference semester plan that satisfies every rule:\n{reference}\n\n"
+    return (
+        "Reference semester plan computed from the retrieved modules:\n"
+        f"{reference}\n"
+        "It still breaks these rules, which cannot be fixed with the retrieved modules: keep them and "
+        "mention them in the Additional Notes instead (JSON list of violations):\n"
+        f"{json.dumps(violations, indent=1)}\n\n"
+    )
+
+
+async def repair_study_plan(content, state):
+    """
+    Check the study plan of a response and, if it breaks a rule, ask the LLM
+    to fix only the reported violations instead of running the workflow again.
+    """
+    violations = find_plan_violations(content, state)
+    if not violations:
+        return content
+    # What the reference plan cannot avoid either is not worth a repair call
+    reference_violations = reference_plan_violations(state)
+    if all(v in reference_violations for v in violations):
+        return content
+
+    # Recorded on the repair_study_plan span opened by the caller
+    span = current_span()
+    span.set(violations=violations)
+    prompt = (
+        "The study plan below breaks the following rules (JSON list of violations):\n"
+        f"{json.dumps(violations, indent=1)}\n\n"
+        f"{reference_plan_prompt(state, reference_violations)}"
+        "Rewrite the response fixing only these violations. Keep the format, the descriptions and the "
+        "weekly schedule unchanged wherever they are not affected. Output only the corrected response.\n\n"
+        f"{content}"
+    )
+    try:
+        repaired = (await llm.acomplete(prompt)).text
+    except Exception as e:
+        span.set(repair_error=str(e))
+        return content
+
+    remaining = find_plan_violations(repaired, state)
+    if remaining is not None and len(remaining) < len(violations):
+        return repaired
+    return content
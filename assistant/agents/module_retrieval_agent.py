@@ -1,46 +1,63 @@
-from llama_index.core.agent.workflow import FunctionAgent
+import asyncio
+
+import streamlit as st
 from llama_index.core.workflow import Context
 from assistant.llm import llm
+from assistant.traced_agent import TracedFunctionAgent, traced_tool
 from utils.job_ranker import JobRanker
-from utils.graphdb_methods import GraphDbMethods
-from utils.supabase_methods import has_work_experience
+from utils.scoring_engine import ScoringEngine
+from utils.tool_output import DEFAULT_TOKEN_BUDGET, format_modules
+from utils.graphdb_methods import get_async_graphdb_methods
+from utils.recommendation_cache import get_recommendation_cache
+from utils.tracing import current_span
+
+# Weight of each strategy in the balanced mix; the state key `balanced_weights` overrides them
+BALANCED_WEIGHTS = {
+    "past_occupation": 1.0,
+    "future_occupation": 1 / 6,
+    "preferences": 1 / 6,
+}
+
+
+def format_retrieved_modules(state, modules, score_key=None):
+    """Compact the retrieved modules for the LLM within the configured token budget."""
+    token_budget = state.get("tool_output_token_budget") or st.secrets.get("TOOL_OUTPUT_TOKEN_BUDGET", DEFAULT_TOKEN_BUDGET)
+    modules_summary, stats = format_modules(modules, score_key, int(token_budget))
+    # Recorded on the span of the tool call; not named output_tokens, which counts LLM tokens in trace summaries
+    current_span().set(
+        output_tokens_estimate=stats["tokens"], modules=stats["modules"], modules_omitted=stats["omitted"],
+        tokens_saved=stats["tokens_saved"],
+    )
+    return modules_summary
 
 
-async def suggest_modules_by_past_occupation(ctx: Context) -> str:
+async def suggest_modules_by_past_occupation(current_state) -> str:
     """Extract the occupations from a database and suggest modules which develop skills required by those occupations."""
     try:
-        current_state = await ctx.get("state")
-        modules_data_with_scores = get_modules_scored_by_past_occupation(current_state)
+        modules_data_with_scores = await get_modules_scored_by_past_occupation(current_state)
         current_state["modules_retrieved"] = modules_data_with_scores
-        await ctx.set("state", current_state)
 
-        modules_summary = "\n".join(
-            [
-                f"- Module: {m['module']}\n Occupation: {m['occupation']}\n Occupation Score: {m['occupation_score']:.2f}\n  Supporting Learning Outcomes: {m['supporting_learning_outcomes']}\n  Supported Skills: {m['supported_skills']}"
-                for m in modules_data_with_scores
-            ]
-        )
-        return modules_summary
+        return format_retrieved_modules(current_state, modules_data_with_scores, "occupation_score")
 
     except Exception as e:
         return f"An error occurred: {e}"
 
 
-def get_modules_scored_by_past_occupation(state):
+async def get_modules_scored_by_past_occupation(state):
     weights = {"work_period": 0.5, "recency": 0.3, "job_type": 0.2}
     max_experience_years = 10
 
     taken_modules = state["taken_modules"]
 
+    # Supabase and the ranking are blocking, keep them off the event loop
     ranker = JobRanker(weights, max_experience_years)
-    ranked_jobs = ranker.get_ranked_jobs()
+    ranked_jobs = await asyncio.to_thread(ranker.get_ranked_jobs, state.get("work_experiences"))
 
     occupation_list = [job[0] for job in ranked_jobs]
     score_lookup = {job[0]: job[1] for job in ranked_jobs}
 
-    graphdb_methods = GraphDbMethods()
-    modules_data = graphdb_methods.get_modules_by_occupation(occupation_list, taken_modules)
-    modules_data_with_scores = [rec.data() for rec in modules_data]
+    graphdb_methods = get_async_graphdb_methods()
+    modules_data_with_scores = await graphdb_methods.get_modules_by_occupation(occupation_list, taken_modules)
 
     for item in modules_data_with_scores:
         occupation = item["occupation"]["occupation"]
@@ -49,43 +66,32 @@ def get_modules_scored_by_past_occupation(state):
     return sorted(modules_data_with_scores, key=lambda x: x["occupation_score"], reverse=True)
 
 
-async def suggest_modules_by_future_occupation(ctx: Context) -> str:
+async def suggest_modules_by_future_occupation(current_state) -> str:
     """Suggest modules based only on the user's desired future occupation."""
     try:
-        current_state = await ctx.get("state")
-        modules_data = get_modules_scored_by_future_occupation(current_state)
+        modules_data = await get_modules_scored_by_future_occupation(current_state)
         current_state["modules_retrieved"] = modules_data
-        await ctx.set("state", current_state)
 
-        modules_summary = "\n".join(
-            [
-                f"- Module: {m['module']}\n  Occupation: {m['occupation']}\n  Supporting Learning Outcomes: {m['supporting_learning_outcomes']}\n  Supported Skills: {m['supported_skills']}"
-                for m in modules_data
-            ]
-        )
-        return modules_summary
+        return format_retrieved_modules(current_state, modules_data)
     except Exception as e:
         return f"An error occurred: {e}"
 
 
-def get_modules_scored_by_future_occupation(state):
+async def get_modules_scored_by_future_occupation(state):
     taken_modules = state["taken_modules"]
     desired_occupations = state["desired_occupations"]
 
-    graphdb_methods = GraphDbMethods()
-    modules_data = graphdb_methods.get_modules_by_occupation(
+    graphdb_methods = get_async_graphdb_methods()
+    return await graphdb_methods.get_modules_by_occupation(
         desired_occupations, taken_modules
     )
-    return [rec.data() for rec in modules_data]
 
 
-async def suggest_modules_by_preferences(ctx: Context) -> str:
+async def suggest_modules_by_preferences(current_state) -> str:
     """Suggest modules based on user preferences using a single optimized query."""
     try:
-        current_state = await ctx.get("state")
-        modules = get_modules_scored_by_preferences(current_state)
+        modules = await get_modules_scored_by_preferences(current_state)
         current_state["modules_retrieved"] = modules
-        await ctx.set("state", current_state)
 
         modules_summary = "\n".join(
             f"- {m['module']['module_title']} (Score: {m['preference_score']})"
@@ -97,7 +103,7 @@ async def suggest_modules_by_preferences(ctx: Context) -> str:
         return f"An error occurred: {e}"
 
 
-def get_modules_scored_by_preferences(state):
+async def get_modules_scored_by_preferences(state):
     taken_modules = state["taken_modules"]
     available_days = state["available_days"]
     desired_lecturers = state["desired_lecturers"]
@@ -105,61 +111,48 @@ def get_modules_scored_by_preferences(state):
     project_work = state["project_work"]
     oral_assessment = state["oral_assessment"]
 
-    graphdb_methods = GraphDbMethods()
-    return graphdb_methods.get_modules_by_preferences(
-        taken_modules,
-        available_days,
-        desired_lecturers,
-        assessment_type,
-        project_work,
-        oral_assessment
+    graphdb_methods = get_async_graphdb_methods()
+    return await graphdb_methods.get_modules_by_preferences(
+        taken_modules=taken_modules,
+        desired_lecturers=desired_lecturers,
+        available_days=available_days,
+        assessment_type=assessment_type,
+        project_work=project_work,
+        oral_assessment=oral_assessment
     )
 
 
-async def suggest_modules_balanced(ctx: Context) -> str:
+async def suggest_modules_balanced(current_state) -> str:
     """Suggest modules based on a balanced mix of past experience, future goals, and user preferences."""
-    current_state = await ctx.get("state")
-
     try:
-        graphdb_methods = GraphDbMethods()
-        modules = graphdb_methods.get_module_overview()
-
-        # Add scores from past occupations
-        if has_work_experience(): # skip if student does not have work experience
-            past_occupations_scored_modules = get_modules_scored_by_past_occupation(current_state)
-            for m in past_occupations_scored_modules:
-                title = m["module"]["module_title"]
-                score = m["occupation_score"]
-                for module in modules:
-                    if module["module"]["module_title"] == title:
-                        module["score"] += score
-                        break
-
-        # Add scores from future occupations
-        future_occupations_scored_modules = get_modules_scored_by_future_occupation(current_state)
-        for m in future_occupations_scored_modules:
-            title = m["module"]["module_title"]
-            for module in modules:
-                if module["module"]["module_title"] == title:
-                    module["score"] += 1 / 6
-                    break
-
-        # Add scores from preferences
-        preferences_scored_modules = get_modules_scored_by_preferences(current_state)
-        for m in preferences_scored_modules:
-            title = m["module"]["module_title"]
-            pref_score = m["preference_score"]
-            for module in modules:
-                if module["module"]["module_title"] == title:
-                    module["score"] += pref_score / 6
-                    break
+        graphdb_methods = get_async_graphdb_methods()
+
+        # Run the sub-retrievals concurrently; a student without (recent) work
+        # experience simply gets no rows from the past occupation strategy
+        (
+            module_overview,
+            past_occupations_scored_modules,
+            future_occupations_scored_modules,
+            preferences_scored_modules,
+        ) = await asyncio.gather(
+            graphdb_methods.get_module_overview(),
+            get_modules_scored_by_past_occupation(current_state),
+            get_modules_scored_by_future_occupation(current_state),
+            get_modules_scored_by_preferences(current_state),
+        )
+
+        engine = ScoringEngine(module_overview)
+        engine.add_strategy("past_occupation", past_occupations_scored_modules, lambda m: m["occupation_score"])
+        # One point per supported occupation
+        engine.add_strategy("future_occupation", future_occupations_scored_modules)
+        engine.add_strategy("preferences", preferences_scored_modules, lambda m: m["preference_score"])
 
         # Sort modules by score
-        modules = sorted(modules, key=lambda x: x["score"], reverse=True)
+        weights = current_state.get("balanced_weights", BALANCED_WEIGHTS)
+        modules = engine.top_k(weights, current_state.get("balanced_top_k"))
 
         # Save result
         current_state["modules_retrieved"] = modules
-        await ctx.set("state", current_state)
 
         # Format output
         modules_summary = "\n".join(
@@ -172,25 +165,70 @@ async def suggest_modules_balanced(ctx: Context) -> str:
         return f"An error occurred: {e}"
 
 
-async def dispatch_module_suggestion(ctx: Context) -> str:
+async def retrieve_modules(state) -> str:
     """
-    Dispatch to the correct module suggestion function based on the retrieval strategy in context.
+    Run the retrieval strategy of the state and store its modules under `modules_retrieved`.
+
+    Returns:
+        str: Summary of the retrieved modules for the LLM, or the error.
     """
-    state = await ctx.get("state")
     strategy = state.get("retrieval_strategy")
+
+    # Reuse the retrieval done for the same profile fingerprint
+    recommendation_cache = get_recommendation_cache()
+    fingerprint = state.get("profile_fingerprint")
+    if fingerprint:
+        cached = recommendation_cache.get(state.get("student_id"), "retrieval", fingerprint)
+        if cached is not None:
+            state["modules_retrieved"] = cached["modules_retrieved"]
+            return cached["summary"]
+
     if strategy == "past_experience":
-        return await suggest_modules_by_past_occupation(ctx)
+        summary = await suggest_modules_by_past_occupation(state)
     elif strategy == "future_goals":
-        return await suggest_modules_by_future_occupation(ctx)
+        summary = await suggest_modules_by_future_occupation(state)
     elif strategy == "preferences":
-        return await suggest_modules_by_preferences(ctx)
+        summary = await suggest_modules_by_preferences(state)
     elif strategy == "balanced":
-        return await suggest_modules_balanced(ctx)
+        summary = await suggest_modules_balanced(state)
     else:
         return f"Unknown retrieval strategy: {strategy}"
 
+    if fingerprint and "modules_retrieved" in state and not summary.startswith("An error occurred"):
+        recommendation_cache.put(state.get("student_id"), "retrieval", fingerprint, {
+            "summary": summary,
+            "modules_retrieved": state["modules_retrieved"],
+        })
+    return summary
+
+
+@traced_tool
+async def dispatch_module_suggestion(ctx: Context) -> str:
+    """
+    Dispatch to the correct module suggestion function based on the retrieval strategy in context.
+    """
+    state = await ctx.get("state")
+    summary = await retrieve_modules(state)
+    await ctx.set("state", state)
+    return summary
+
+
+async def narrate_retrieved_modules(state, summary):
+    """Stream an explanation of the retrieved modules, written without an agent turn."""
+    prompt = (
+        f"A student asked for university modules with the '{state.get('retrieval_strategy')}' strategy "
+        "(past work experience, future career goals, preferences, or a balanced mix of them). "
+        f"These modules were retrieved, most relevant first:\n\n{summary}\n\n"
+        "Briefly explain how each module supports the selected strategy, without listing duplicates. "
+        "Be informative and professional. Do not thank the user, reference your internal logic, "
+        "or mention technical processes."
+    )
+    async for chunk in await llm.astream_complete(prompt):
+        if chunk.delta:
+            yield chunk.delta
+
 
-module_retrieval_agent = FunctionAgent(
+module_retrieval_agent = TracedFunctionAgent(
     name="ModuleRetrievalAgent",
     description="This agent suggests the best modules to take based on a selected strategy: past experience, future goals, preferences, or a balanced mix.",
     system_prompt=(
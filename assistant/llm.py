@@ -1,11 +1,184 @@
+import asyncio
+import json
+import time
+
 import streamlit as st
+from anthropic.types import Message, RawMessageStreamEvent
+from llama_index.core.llms import MessageRole
 from llama_index.llms.anthropic import Anthropic
+from pydantic import TypeAdapter
+
+from utils.llm_response_cache import get_llm_response_cache, request_key
+from utils.llm_scheduler import get_llm_scheduler
+from utils.llm_usage import USAGE_FIELDS, current_llm_owner, record_cached_llm_response, record_llm_usage
+from utils.tool_output import estimate_tokens
+from utils.tracing import NO_SPAN, start_span
+
+CACHE_CONTROL = {"type": "ephemeral"}
+_STREAM_EVENT = TypeAdapter(RawMessageStreamEvent)
+
+
+# ----- #
+# Prompt and response caching, scheduling
+# ----- #
+
+class _RecordingMessages:
+    def __init__(self, messages, response_cache=None, scheduler=None):
+        """
+        Async messages API of the Anthropic client that records the token usage
+        of every call and serves deterministic (temperature 0) requests from
+        the response cache when it has them. Calls to the provider wait for a
+        slot of the scheduler, if any, and are retried when rate limited.
+        """
+        self._messages = messages
+        self._response_cache = response_cache
+        self._scheduler = scheduler
+
+    async def create(self, **kwargs):
+        stream = kwargs.get("stream", False)
+        prompt_tokens = _prompt_tokens(kwargs)
+        span = start_span("llm.messages", "llm", model=kwargs.get("model"), stream=stream,
+                          prompt_tokens_estimate=prompt_tokens)
+        key = None
+        if self._response_cache is not None and kwargs.get("temperature") == 0:
+            key = request_key(kwargs)
+            cached = await asyncio.to_thread(self._response_cache.get, key)
+            if cached is not None:
+                record_cached_llm_response()
+                span.set(response_cached=True, response_bytes=len(cached)).end()
+                return _replay_stream(json.loads(cached)) if stream else Message.model_validate_json(cached)
+
+        if stream:
+            # The slot is taken on the first read of the stream and given back when the generator
+            # finishes or is closed: a stream that is never read holds no slot
+            return self._stream_with_usage(kwargs, prompt_tokens, key, span)
+        ticket, response = await self._send(kwargs, prompt_tokens, span)
+        record_llm_usage(response.usage)
+        self._release(ticket, response.usage)
+        span.set(**_usage_attributes(response.usage)).end()
+        if key is not None:
+            await asyncio.to_thread(self._response_cache.put, key, response.model_dump_json())
+        return response
+
+    async def _send(self, kwargs, prompt_tokens, span=NO_SPAN):
+        """Wait for a scheduler slot and call the API; returns (ticket, response), the slot being released on errors."""
+        ticket = None
+        try:
+            if self._scheduler is not None:
+                queued = time.monotonic()
+                ticket = await self._scheduler.acquire(current_llm_owner(), prompt_tokens)
+                span.set(queue_wait_ms=round((time.monotonic() - queued) * 1000, 1))
+                response = await self._scheduler.with_retries(lambda: self._messages.create(**kwargs))
+            else:
+                response = await self._messages.create(**kwargs)
+        except BaseException as e:
+            self._release(ticket)
+            span.end(e)
+            raise
+        return ticket, response
+
+    def _release(self, ticket, usage=None):
+        """Give the scheduler slot back, counting the tokens of `usage` in the budget (the estimate if None)."""
+        if ticket is None:
+            return
+        tokens = None
+        if usage is not None:
+            # Cache reads do not count in the input token rate limits of the provider
+            tokens = usage.input_tokens + (usage.cache_creation_input_tokens or 0) + usage.output_tokens
+        self._scheduler.release(ticket, tokens)
+
+    async def _stream_with_usage(self, kwargs, prompt_tokens, key=None, span=NO_SPAN):
+        ticket, stream = await self._send(kwargs, prompt_tokens, span)
+        # Input and cache tokens come with message_start, the final output count with message_delta
+        usage, output_tokens = None, 0
+        events = []
+        error = None
+        try:
+            async for event in stream:
+                if event.type == "message_start":
+                    usage = event.message.usage
+                elif event.type == "message_delta":
+                    output_tokens = event.usage.output_tokens
+                events.append(event.model_dump(mode="json"))
+                yield event
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            if usage is not None:
+                usage = usage.model_copy(update={"output_tokens": output_tokens})
+                span.set(**_usage_attributes(usage))
+            self._release(ticket, usage)
+            span.end(error)
+            # An abandoned stream also gives its HTTP connection back
+            if hasattr(stream, "close"):
+                await stream.close()
+        if usage is not None:
+            record_llm_usage(usage)
+        # Only complete streams are stored
+        if key is not None:
+            await asyncio.to_thread(self._response_cache.put, key, json.dumps(events))
+
+    def __getattr__(self, name):
+        return getattr(self._messages, name)
+
+
+def _prompt_tokens(request):
+    """Estimated input tokens of an API request."""
+    return estimate_tokens(json.dumps([request.get("system"), request.get("messages"), request.get("tools")], default=str))
+
+
+def _usage_attributes(usage):
+    return {field: getattr(usage, field, None) or 0 for field in USAGE_FIELDS}
+
+
+async def _replay_stream(events):
+    for event in events:
+        yield _STREAM_EVENT.validate_python(event)
+
+
+class PromptCachingAnthropic(Anthropic):
+    """
+    Anthropic LLM that lets the provider cache the static prefix of the agent
+    calls, i.e. the tool definitions and the system prompt, which are resent
+    unchanged on every step of the agents.
+    """
+
+    def __init__(self, response_cache=None, scheduler=None, **kwargs):
+        """
+        Initialize the LLM.
+
+        Args:
+            response_cache (LLMResponseCache): Cache of the responses to identical
+                temperature 0 requests, None to always call the API.
+            scheduler (LLMScheduler): Admission control and retries of the API
+                calls, None to call the API directly.
+            **kwargs: Arguments of llama_index's Anthropic.
+        """
+        super().__init__(**kwargs)
+        self._aclient.messages = _RecordingMessages(self._aclient.messages, response_cache, scheduler)
+
+    def _prepare_chat_with_tools(self, tools, user_msg=None, chat_history=None, **kwargs):
+        # Tools come before the system prompt in the cached prefix: one breakpoint after
+        # each keeps the tools cached when only the system prompt differs
+        system_message = next((m for m in chat_history or [] if m.role == MessageRole.SYSTEM), None)
+        if system_message is not None:
+            system_message.additional_kwargs["cache_control"] = CACHE_CONTROL
+        prepared = super()._prepare_chat_with_tools(tools, user_msg, chat_history, **kwargs)
+        if prepared["tools"]:
+            prepared["tools"][-1]["cache_control"] = CACHE_CONTROL
+        return prepared
+
 
-llm = Anthropic(
+llm = PromptCachingAnthropic(
     model="claude-3-7-sonnet-20250219",
     api_key=st.secrets["ANTHROPIC_KEY"],
     temperature=0,
     max_tokens=64000,
+    response_cache=get_llm_response_cache(),
+    scheduler=get_llm_scheduler(),
+    # Rate limited and overloaded calls are retried by the scheduler
+    max_retries=0,
 )
 
 # TODO: Migrate emebedding implementation to llama-index
@@ -0,0 +1,82 @@
+import asyncio
+import threading
+import time
+
+from assistant.agent_workflow import (
+    stream_agent_workflow, AgentSwitched, ToolStarted, TextDelta, PlanCompleted, AGENT_MODE
+)
+from utils.job_queue import get_job_queue
+
+TOOL_LABELS = {
+    "dispatch_module_suggestion": "Retrieving modules...",
+    "plan_study_semesters": "Planning semesters...",
+    "extract_weekly_timetables": "Building weekly timetables...",
+}
+
+# Minimum delay between two progress updates for streamed text, in seconds
+PROGRESS_INTERVAL = 0.5
+
+_worker = threading.local()
+
+
+def submit_plan_job(student, work_experiences, user_msg, retrieval_strategy, mode=AGENT_MODE):
+    """
+    Generate a study plan in the background.
+
+    The student and their work experiences are passed explicitly since the
+    job does not run in the Streamlit script thread of the logged-in user.
+
+    Returns:
+        str: Id of the job, or of the plan job already running for the student.
+    """
+    return get_job_queue().submit(
+        student.id, run_plan_job, student, work_experiences, user_msg, retrieval_strategy, mode
+    )
+
+
+def run_plan_job(report, student, work_experiences, user_msg, retrieval_strategy, mode=AGENT_MODE):
+    """
+    Body of a plan job.
+
+    Reports {"label": current step, "draft": text streamed so far} and returns
+    {"content": final plan, "cached": served from the recommendation cache,
+    "retrieval_strategy": strategy, "trace_id" and "timing": trace of the run
+    and its summarize_trace rows, None when tracing is off}.
+    """
+    # Each worker thread keeps its event loop, so the SPARQL and LLM clients of the loop are reused
+    if getattr(_worker, "loop", None) is None:
+        _worker.loop = asyncio.new_event_loop()
+    return _worker.loop.run_until_complete(
+        _generate_plan(report, student, work_experiences, user_msg, retrieval_strategy, mode)
+    )
+
+
+async def _generate_plan(report, student, work_experiences, user_msg, retrieval_strategy, mode):
+    progress = {"label": "Starting...", "draft": ""}
+    last_report = 0
+    events = stream_agent_workflow(
+        user_msg, retrieval_strategy, mode, student=student, work_experiences=work_experiences
+    )
+    async for event in events:
+        if isinstance(event, AgentSwitched):
+            progress["label"] = f"{event.agent_name} is working..."
+            progress["draft"] += "\n\n"
+        elif isinstance(event, ToolStarted):
+            progress["label"] = TOOL_LABELS.get(event.tool_name, f"Running {event.tool_name}...")
+        elif isinstance(event, TextDelta):
+            progress["draft"] += event.text
+            if time.monotonic() - last_report < PROGRESS_INTERVAL:
+                continue
+        elif isinstance(event, PlanCompleted):
+            return {
+                "content": event.content,
+                "cached": event.cached,
+                "retrieval_strategy": retrieval_strategy,
+                "trace_id": event.trace_id,
+                "timing": event.timing,
+            }
+        else:
+            continue
+        report(progress)
+        last_report = time.monotonic()
+    raise RuntimeError("The workflow ended without a study plan.")
@@ -0,0 +1,35 @@
+import functools
+
+from llama_index.core.agent.workflow import FunctionAgent
+from llama_index.core.workflow import Context
+
+from utils.tracing import current_span, start_span
+
+
+class TracedFunctionAgent(FunctionAgent):
+    """FunctionAgent recording each of its turns (one LLM call choosing the answer or the tools to call) as a span."""
+
+    async def take_step(self, ctx, llm_input, tools, memory):
+        with start_span(f"{self.name} turn", "agent", agent=self.name, input_messages=len(llm_input)) as span:
+            if span.trace is not None:
+                span.trace.agent_turns[self.name] = span
+            output = await super().take_step(ctx, llm_input, tools, memory)
+            span.set(tool_calls=[call.tool_name for call in output.tool_calls])
+            return output
+
+
+def traced_tool(fn):
+    """
+    Decorator recording each call of an agent tool as a span under the turn
+    of the agent that requested it, with its arguments and the size of its output.
+    """
+    @functools.wraps(fn)
+    async def wrapper(ctx: Context, *args, **kwargs):
+        agent_name = await ctx.get("current_agent_name", default=None)
+        trace = current_span().trace
+        parent = trace.agent_turns.get(agent_name) if trace is not None else None
+        with start_span(fn.__name__, "tool", parent=parent, agent=agent_name, arguments=kwargs) as span:
+            output = await fn(ctx, *args, **kwargs)
+            span.set(output_chars=len(str(output)))
+            return output
+    return wrapper
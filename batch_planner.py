@@ -0,0 +1,116 @@
+import argparse
+import asyncio
+import json
+import os
+import time
+
+from assistant.agent_workflow import AGENT_MODE, DIRECT_MODE, STRATEGY_MESSAGES, PlanCompleted, stream_agent_workflow
+from utils.batch_profiles import completed_student_ids, load_student_profiles
+from utils.sparql_client import aclose_async_sparql_client
+
+
+class BatchPlanner:
+    """
+    Generates the study plans of a whole cohort without the Streamlit UI.
+
+    Plans are written to a JSON lines results file as soon as they are ready,
+    one line per student. Running the batch again resumes it: students with a
+    successful result are skipped, failed ones are planned again.
+
+    Usage:
+        python batch_planner.py students.json plans.jsonl --strategy balanced --concurrency 8
+    """
+
+    def __init__(self, results_path, retrieval_strategy="balanced", mode=DIRECT_MODE, concurrency=4):
+        """
+        Initialize the planner.
+
+        Args:
+            results_path (str): JSON lines file receiving the results.
+            retrieval_strategy (str): Strategy of the students whose profile does not set one.
+            mode (str): DIRECT_MODE, or AGENT_MODE to also get the module explanations.
+            concurrency (int): Maximum number of plans generated at the same time.
+        """
+        self.results_path = results_path
+        self.retrieval_strategy = retrieval_strategy
+        self.mode = mode
+        self.concurrency = concurrency
+
+    async def run(self, profiles):
+        """
+        Plan every profile (output of load_student_profiles) without a successful result yet.
+
+        Returns:
+            dict: Number of students "planned", "failed" and "skipped" by this run.
+        """
+        completed = completed_student_ids(self.results_path)
+        pending = [p for p in profiles if str(p["student"].id) not in completed]
+        counts = {"planned": 0, "failed": 0, "skipped": len(profiles) - len(pending)}
+        print(f"📋 {len(pending)} students to plan, {counts['skipped']} already planned")
+
+        semaphore = asyncio.Semaphore(self.concurrency)
+        self._terminate_last_line()
+        try:
+            with open(self.results_path, "a", encoding="utf-8") as results:
+
+                async def plan(profile):
+                    async with semaphore:
+                        result = await self.plan_student(profile)
+                    # Results are written from the event loop thread only, one complete line at a time
+                    results.write(json.dumps(result, ensure_ascii=False) + "\n")
+                    results.flush()
+                    counts["planned" if result["status"] == "done" else "failed"] += 1
+                    print(f"✅ {counts['planned']} planned, ❌ {counts['failed']} failed, {len(pending)} in total")
+
+                await asyncio.gather(*(plan(profile) for profile in pending))
+        finally:
+            # The client is bound to this event loop, which asyncio.run closes once the batch is done
+            await aclose_async_sparql_client()
+        return counts
+
+    async def plan_student(self, profile):
+        """Generate the plan of one student; errors are returned in the result instead of raised."""
+        student = profile["student"]
+        strategy = profile["retrieval_strategy"] or self.retrieval_strategy
+        result = {"student_id": student.id, "retrieval_strategy": strategy, "mode": self.mode}
+        started = time.monotonic()
+        try:
+            plan = None
+            async for event in stream_agent_workflow(
+                STRATEGY_MESSAGES[strategy], strategy, self.mode,
+                student=student, work_experiences=profile["work_experiences"],
+            ):
+                if isinstance(event, PlanCompleted):
+                    plan = event
+            if plan is None or not plan.content:
+                raise RuntimeError("The workflow ended without a study plan.")
+            result.update(status="done", plan=plan.content, cached=plan.cached,
+                          usage=plan.usage.to_dict() if plan.usage else None, trace_id=plan.trace_id)
+        except Exception as e:
+            print(f"Planning failed for student {student.id}: {e}")
+            result.update(status="failed", error=str(e))
+        result["seconds"] = round(time.monotonic() - started, 2)
+        return result
+
+    def _terminate_last_line(self):
+        # A run killed while writing leaves a partial line, which must not swallow the next result
+        if not os.path.exists(self.results_path) or os.path.getsize(self.results_path) == 0:
+            return
+        with open(self.results_path, "rb+") as f:
+            f.seek(-1, os.SEEK_END)
+            if f.read(1) != b"\n":
+                f.write(b"\n")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate the study plans of a list of students.")
+    parser.add_argument("profiles", help="JSON or CSV file with the student profiles")
+    parser.add_argument("results", help="JSON lines file receiving the plans; an existing file is resumed")
+    parser.add_argument("--strategy", default="balanced", choices=sorted(STRATEGY_MESSAGES),
+                        help="retrieval strategy of the students whose profile does not set one")
+    parser.add_argument("--mode", default=DIRECT_MODE, choices=[DIRECT_MODE, AGENT_MODE])
+    parser.add_argument("--concurrency", type=int, default=4, help="maximum number of plans generated at once")
+    args = parser.parse_args()
+
+    planner = BatchPlanner(args.results, args.strategy, args.mode, args.concurrency)
+    print(asyncio.run(planner.run(load_student_profiles(args.profiles))))
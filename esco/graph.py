@@ -1,11 +1,17 @@
 from SPARQLWrapper import SPARQLWrapper, POST, DIGEST
 import pandas as pd
 import os
+import sys
 import json
 import requests
+from datetime import datetime, timezone
 from rdflib import Graph, Namespace, Literal, URIRef
 from rdflib.namespace import RDF, RDFS, XSD
 
+# Run as a script from esco/: the day and time rules are shared with the app's timetables
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.timetable import day_index, parse_time_range
+
 # GraphDB Configuration
 GRAPHDB_ENDPOINT = 'http://localhost:7200/repositories/IModuleBuddy'
 GRAPHDB_USERNAME = 'admin'
@@ -24,6 +30,12 @@ MODULES_CSV = os.path.join(CSV_DIRECTORY, 'modules.csv')
 SCHEDULING_CSV = os.path.join(CSV_DIRECTORY, 'modules_scheduling.csv')
 ASSESSMENTS_JSON = os.path.join(CSV_DIRECTORY, 'modules_assessments.json')
 
+# Typed schedule values: ex:dayOfWeek is the index in DAYS (utils/timetable.py), ex:semesterIndex the index in SEMESTERS
+SEMESTERS = ['Spring', 'Autumn']
+
+# Snapshot of the generated triples, loaded by the embedded read model (utils/embedded_graph.py)
+SNAPSHOT_FILE = os.path.join(os.getcwd(), 'imodulebuddy_graph.nt')
+
 
 def get_sparql_wrapper():
     """Create and configure SPARQLWrapper instance"""
@@ -106,11 +118,19 @@ def add_professor(g, professor_name, professor_surname):
     return prof_uuid
 
 
+def minutes_to_time(minutes):
+    """Format minutes since midnight as an xsd:time literal"""
+    return Literal(f"{minutes // 60:02d}:{minutes % 60:02d}:00", datatype=XSD.time)
+
+
 def add_teaching_session(g, module, group_name, day, time, periodicity, semester, location, ay):
-    """Add a teaching session to the RDF graph"""
+    """Add a teaching session to the RDF graph, with typed day, times, semester and academic year"""
     import uuid
     ts_uuid = str(uuid.uuid4())
     ts_uri = create_uri('teaching_session', ts_uuid)
+    module, group_name, day, time, periodicity, semester, location, ay = (
+        str(value).strip() for value in (module, group_name, day, time, periodicity, semester, location, ay)
+    )
 
     g.add((ts_uri, RDF.type, EX.TeachingSession))
     g.add((ts_uri, EX.module, Literal(module)))
@@ -123,6 +143,20 @@ def add_teaching_session(g, module, group_name, day, time, periodicity, semester
     g.add((ts_uri, EX.ay, Literal(ay)))
     g.add((ts_uri, EX.uuid, Literal(ts_uuid)))
 
+    if day_index(day) is not None:
+        g.add((ts_uri, EX.dayOfWeek, Literal(day_index(day), datatype=XSD.integer)))
+    time_range = parse_time_range(time)
+    if time_range is not None:
+        start, end = time_range
+        g.add((ts_uri, EX.startMinute, Literal(start, datatype=XSD.integer)))
+        g.add((ts_uri, EX.endMinute, Literal(end, datatype=XSD.integer)))
+        g.add((ts_uri, EX.startTime, minutes_to_time(start)))
+        g.add((ts_uri, EX.endTime, minutes_to_time(end)))
+    if semester.capitalize() in SEMESTERS:
+        g.add((ts_uri, EX.semesterIndex, Literal(SEMESTERS.index(semester.capitalize()), datatype=XSD.integer)))
+    if ay[:4].isdigit():
+        g.add((ts_uri, EX.ayStartYear, Literal(int(ay[:4]), datatype=XSD.integer)))
+
     return ts_uuid
 
 
@@ -254,8 +288,32 @@ def upload_to_graphdb(g):
         print("Response:", response.text)
 
 
-def populate_graph():
-    """Main function to populate the graph"""
+def new_graph_version():
+    """Create a version stamp for a freshly generated graph"""
+    return datetime.now(timezone.utc).isoformat()
+
+
+def write_graph_snapshot(g, version):
+    """Write the generated triples and their version stamp to SNAPSHOT_FILE"""
+    snapshot = Graph()
+    snapshot += g
+    snapshot.add((EX.GraphMetadata, EX.graphVersion, Literal(version)))
+    snapshot.serialize(destination=SNAPSHOT_FILE, format='nt', encoding='utf-8')
+    print(f"Snapshot written to {SNAPSHOT_FILE}")
+
+
+def stamp_graph_version(version):
+    """Replace the graph version stamp, so that application caches drop their stale results"""
+    execute_sparql_update(f"""
+        PREFIX ex: <{EX}>
+        DELETE WHERE {{ ex:GraphMetadata ex:graphVersion ?version }} ;
+        INSERT DATA {{ ex:GraphMetadata ex:graphVersion "{version}" }}
+    """)
+    print(f"Graph version: {version}")
+
+
+def build_graph():
+    """Build the RDF graph from the CSV files"""
     # Create RDF graph
     g = Graph()
     g.bind('ex', EX)
@@ -333,8 +391,17 @@ def populate_graph():
     update_modules_with_assessment_info(g)
 
     print(f"Total triples created: {len(g)}")
+    return g
+
+
+def populate_graph():
+    """Main function to populate the graph"""
+    g = build_graph()
+    version = new_graph_version()
+    write_graph_snapshot(g, version)
     print("Uploading to GraphDB...")
     upload_to_graphdb(g)
+    stamp_graph_version(version)
 
 
 def main():
@@ -1,5 +1,9 @@
 import streamlit as st
 from utils.auth import is_authenticated
+from utils.supabase_methods import begin_data_request
+
+# Supabase rows are read at most once per rerun
+begin_data_request()
 
 is_auth = is_authenticated()
 logout_page = st.Page(
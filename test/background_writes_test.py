@@ -0,0 +1,61 @@
+import threading
+import unittest
+
+from utils.background_writes import BackgroundWriter
+
+
+class TestBackgroundWriter(unittest.TestCase):
+
+    def setUp(self):
+        self.writer = BackgroundWriter(max_workers=2, max_retries=2, base_delay=0.001)
+
+    def tearDown(self):
+        self.writer.shutdown()
+
+    def test_writes_of_an_owner_run_in_order(self):
+        release = threading.Event()
+        order = []
+
+        def first():
+            release.wait(5)
+            order.append("insert")
+
+        futures = [self.writer.submit("s1", first), self.writer.submit("s1", lambda: order.append("delete"))]
+        self.assertEqual(self.writer.pending("s1"), 2)
+        # Another owner is not held up by the pending writes of s1
+        self.writer.submit("s2", lambda: order.append("other")).result(5)
+        release.set()
+        for future in futures:
+            future.result(5)
+        self.assertEqual(order, ["other", "insert", "delete"])
+        self.assertEqual(self.writer.pending("s1"), 0)
+
+    def test_transient_errors_are_retried(self):
+        attempts = []
+        outcomes = []
+
+        def write():
+            attempts.append(1)
+            if len(attempts) < 3:
+                raise ConnectionError("connection reset")
+            return "ok"
+
+        self.assertEqual(self.writer.submit("s1", write, outcomes.append).result(5), "ok")
+        self.assertEqual((len(attempts), outcomes), (3, [None]))
+
+    def test_other_errors_fail_at_once(self):
+        attempts = []
+        outcomes = []
+
+        def write():
+            attempts.append(1)
+            raise ValueError("duplicate key")
+
+        with self.assertRaises(ValueError):
+            self.writer.submit("s1", write, outcomes.append).result(5)
+        self.assertEqual(len(attempts), 1)
+        self.assertIsInstance(outcomes[0], ValueError)
+
+
+if __name__ == "__main__":
+    unittest.main()
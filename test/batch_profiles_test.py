@@ -0,0 +1,58 @@
+import json
+import os
+import tempfile
+import unittest
+
+from utils.batch_profiles import completed_student_ids, load_student_profiles
+
+
+class TestBatchProfiles(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def write(self, name, content):
+        path = os.path.join(self.directory.name, name)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(content)
+        return path
+
+    def test_json_profiles(self):
+        path = self.write("students.json", json.dumps([{
+            "id": "s1", "expected_semesters": 3, "desired_jobs": ["data analyst"],
+            "work_experiences": [{"occupation": "ICT consultant"}], "retrieval_strategy": "future_goals",
+        }]))
+        [profile] = load_student_profiles(path)
+        self.assertEqual((profile["student"].id, profile["student"].desired_jobs), ("s1", ["data analyst"]))
+        self.assertEqual(profile["work_experiences"], [{"occupation": "ICT consultant"}])
+        self.assertEqual(profile["retrieval_strategy"], "future_goals")
+
+    def test_csv_profiles(self):
+        path = self.write("students.csv", (
+            "id,expected_semesters,taken_courses,available_days,oral_assessment,project_work,work_experiences\n"
+            's2,4,Business Intelligence; Business Process Management,Monday;Friday,yes,0,"[{""occupation"": ""ICT consultant""}]"\n'
+        ))
+        [profile] = load_student_profiles(path)
+        student = profile["student"]
+        self.assertEqual(student.expected_semesters, 4)
+        self.assertEqual(student.taken_courses, ["Business Intelligence", "Business Process Management"])
+        self.assertEqual(student.available_days, ["Monday", "Friday"])
+        self.assertEqual((student.oral_assessment, student.project_work), (True, False))
+        self.assertEqual(profile["work_experiences"], [{"occupation": "ICT consultant"}])
+        self.assertIsNone(profile["retrieval_strategy"])
+
+    def test_profiles_need_an_id(self):
+        with self.assertRaises(ValueError):
+            load_student_profiles(self.write("students.json", json.dumps([{"name": "Ada"}])))
+
+    def test_only_successful_results_are_completed(self):
+        path = self.write("plans.jsonl", (
+            json.dumps({"student_id": "s1", "status": "done"}) + "\n"
+            + json.dumps({"student_id": "s2", "status": "failed"}) + "\n"
+            + '{"student_id": "s3", "sta'
+        ))
+        self.assertEqual(completed_student_ids(path), {"s1"})
+        self.assertEqual(completed_student_ids(os.path.join(self.directory.name, "missing.jsonl")), set())
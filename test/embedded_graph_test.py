@@ -0,0 +1,105 @@
+import unittest
+from unittest.mock import patch
+
+from rdflib import Graph, Literal
+from rdflib.namespace import XSD
+
+from esco.graph import EX, add_module, add_learning_outcome, add_skill, add_occupation, add_professor, \
+    add_teaching_session, create_uri, link_module_learning_outcome, link_learning_outcome_skill, \
+    link_occupation_skill, link_module_teaching_session, link_teaching_session_professor
+from utils.embedded_graph import EmbeddedGraph, EmbeddedGraphDbMethods
+
+SKILL_URI = "http://data.europa.eu/esco/skill/cloud"
+OCCUPATION_URI = "http://data.europa.eu/esco/occupation/consultant"
+
+
+def build_graph():
+    g = Graph()
+    add_module(g, "Course_Cloud_Computing", "link", "Cloud Computing", "Description", "elective", "", "", "")
+    add_module(g, "Course_Master_Thesis", "link", "Master Thesis", "Description", "mandatory", "", "", "")
+    add_learning_outcome(g, "Design cloud systems", "Course_Cloud_Computing")
+    link_module_learning_outcome(g, "Course_Cloud_Computing", "Design cloud systems")
+    add_skill(g, "cloud technologies", "skill", 1, "Description", SKILL_URI)
+    link_learning_outcome_skill(g, "Course_Cloud_Computing", "Design cloud systems", SKILL_URI)
+    add_occupation(g, "ICT consultant", OCCUPATION_URI, "Description")
+    link_occupation_skill(g, OCCUPATION_URI, SKILL_URI, "essential")
+
+    ts_uuid = add_teaching_session(g, "Course_Cloud_Computing", "Group A", "Monday", "13:15-17:00",
+                                   "Weekly", "Spring", "Olten", "2024/2025")
+    link_module_teaching_session(g, "Course_Cloud_Computing", ts_uuid)
+    prof_uuid = add_professor(g, "Knut", "Hinkelmann")
+    link_teaching_session_professor(g, ts_uuid, prof_uuid)
+
+    module_uri = create_uri('module', "Course_Cloud_Computing")
+    g.add((module_uri, EX.projectWork, Literal(True, datatype=XSD.boolean)))
+    g.add((module_uri, EX.oralAssessment, Literal(False, datatype=XSD.boolean)))
+    g.add((module_uri, EX.assessmentType, Literal("group")))
+    g.add((EX.GraphMetadata, EX.graphVersion, Literal("v1")))
+    return g
+
+
+class TestEmbeddedGraph(unittest.TestCase):
+
+    def setUp(self):
+        self.mocks = {}
+        for target in ['utils.graphdb_methods.get_sparql_client', 'utils.graphdb_methods.get_query_cache']:
+            patcher = patch(target)
+            self.mocks[target.rsplit('.', 1)[1]] = patcher.start()
+            self.addCleanup(patcher.stop)
+        self.store = EmbeddedGraph.from_rdflib(build_graph())
+        self.graphdb = EmbeddedGraphDbMethods(self.store)
+
+    def test_terms_are_interned_once(self):
+        module = self.store.id(create_uri('module', "Course_Cloud_Computing"))
+        self.assertEqual(self.store.value(module, EX.moduleTitle), "Cloud Computing")
+        self.assertEqual(len(self.store), len(build_graph()))
+
+    def test_reference_data(self):
+        self.assertEqual(self.graphdb.get_modules(), ["Cloud Computing", "Master Thesis"])
+        self.assertEqual(self.graphdb.get_filtered_modules(), ["Cloud Computing"])
+        self.assertEqual(self.graphdb.get_occupations(), ["ICT consultant"])
+        self.assertEqual(self.graphdb.get_professors(), ["Knut Hinkelmann"])
+        self.assertEqual(self.graphdb.get_graph_version(), "v1")
+        # Every read is answered in memory, without a GraphDB client
+        self.mocks["get_sparql_client"].assert_not_called()
+
+    def test_get_modules_by_occupation(self):
+        self.assertEqual(self.graphdb.get_modules_by_occupation(["ICT consultant"]), [{
+            "module": {"module_title": "Cloud Computing", "module_type": "elective"},
+            "occupation": {"occupation": "ICT consultant"},
+            "shared_skills": 1,
+            "supporting_learning_outcomes": ["Design cloud systems"],
+            "supported_skills": ["cloud technologies"],
+        }])
+        self.assertEqual(self.graphdb.get_modules_by_occupation(["ICT consultant"], ["Cloud Computing"]), [])
+
+    def test_get_teaching_sessions_by_modules(self):
+        sessions = self.graphdb.get_teaching_sessions_by_modules(["Cloud Computing", "Master Thesis"])
+        self.assertEqual(sessions, [{
+            "module_title": "Cloud Computing",
+            "module_type": "elective",
+            "module_description": "Description",
+            "teaching_session": [{
+                "ay": "2024/2025", "day": "Monday", "group_name": "Group A", "location": "Olten",
+                "periodicity": "Weekly", "semester": "Spring", "time": "13:15-17:00",
+                "day_of_week": 0, "start_minute": 795, "end_minute": 1020, "semester_index": 0, "ay_start_year": 2024,
+            }],
+        }])
+        self.assertEqual(self.graphdb.get_teaching_sessions_by_modules(["Cloud Computing"], ["Cloud Computing"]), [])
+
+    def test_module_features_and_preferences(self):
+        self.assertTrue(self.graphdb.matches_lecturer("Cloud Computing", "Knut Hinkelmann"))
+        self.assertTrue(self.graphdb.matches_day("Cloud Computing", "Monday"))
+        self.assertFalse(self.graphdb.has_oral_assessment("Cloud Computing"))
+
+        modules = self.graphdb.get_modules_by_preferences(
+            [], ["Knut Hinkelmann"], ["Monday"], "individual_and_group", True, True
+        )
+        self.assertEqual(modules[0], {
+            "module": {"module_title": "Cloud Computing", "module_type": "elective"},
+            "preference_score": 4,
+        })
+
+
+if __name__ == '__main__':
+    unittest.main()
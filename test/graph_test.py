@@ -1,10 +1,10 @@
 import unittest
 from unittest.mock import patch, MagicMock
 from rdflib import Graph, URIRef, Literal
-from rdflib.namespace import RDF
+from rdflib.namespace import RDF, XSD
 
 from esco.graph import add_module, link_module_teaching_session, link_learning_outcome_skill, EX, add_learning_outcome, \
-    add_professor
+    add_professor, add_teaching_session
 
 
 class TestGraphFunctions(unittest.TestCase):
@@ -82,3 +82,34 @@ class TestGraphFunctions(unittest.TestCase):
         lo_uri = URIRef("https://imodulebuddy.org/ontology#lo1")
         skill_uri = URIRef("https://imodulebuddy.org/ontology#skill1")
         self.assertIn((lo_uri, EX.hasSkill, skill_uri), g)
+
+    @patch('esco.graph.create_uri')
+    def test_add_teaching_session_stores_normalized_and_typed_values(self, mock_create_uri):
+        g = Graph()
+        ts_uri = URIRef("https://imodulebuddy.org/ontology#ts1")
+        mock_create_uri.return_value = ts_uri
+
+        add_teaching_session(g, "Course_Cloud_Computing", " Group A", " Saturday", " 13:15-17:00",
+                             " Weekly", " Spring", " Olten", " 2024/2025")
+
+        self.assertIn((ts_uri, EX.day, Literal("Saturday")), g)
+        self.assertIn((ts_uri, EX.semester, Literal("Spring")), g)
+        self.assertIn((ts_uri, EX.dayOfWeek, Literal(5, datatype=XSD.integer)), g)
+        self.assertIn((ts_uri, EX.startMinute, Literal(795, datatype=XSD.integer)), g)
+        self.assertIn((ts_uri, EX.endMinute, Literal(1020, datatype=XSD.integer)), g)
+        self.assertIn((ts_uri, EX.startTime, Literal("13:15:00", datatype=XSD.time)), g)
+        self.assertIn((ts_uri, EX.semesterIndex, Literal(0, datatype=XSD.integer)), g)
+        self.assertIn((ts_uri, EX.ayStartYear, Literal(2024, datatype=XSD.integer)), g)
+
+    @patch('esco.graph.create_uri')
+    def test_add_teaching_session_reads_times_like_the_timetables(self, mock_create_uri):
+        g = Graph()
+        ts_uri = URIRef("https://imodulebuddy.org/ontology#ts1")
+        mock_create_uri.return_value = ts_uri
+
+        add_teaching_session(g, "Course_Cloud_Computing", "Group A", "monday", "10.15-12.00",
+                             "Weekly", "Autumn", "Olten", "2024/2025")
+
+        self.assertIn((ts_uri, EX.dayOfWeek, Literal(0, datatype=XSD.integer)), g)
+        self.assertIn((ts_uri, EX.startMinute, Literal(615, datatype=XSD.integer)), g)
+        self.assertIn((ts_uri, EX.endTime, Literal("12:00:00", datatype=XSD.time)), g)
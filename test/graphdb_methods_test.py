@@ -0,0 +1,171 @@
+import asyncio
+import unittest
+from unittest.mock import patch, MagicMock, AsyncMock
+
+from utils.graphdb_methods import GraphDbMethods, AsyncGraphDbMethods, sparql_literal
+from utils.query_cache import QueryCache
+
+
+def binding(**values):
+    return {key: {"value": value} for key, value in values.items()}
+
+
+class TestGraphDbMethods(unittest.TestCase):
+
+    def setUp(self):
+        self.client = MagicMock()
+        patcher = patch('utils.graphdb_methods.get_sparql_client', return_value=self.client)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        patcher = patch('utils.graphdb_methods.get_query_cache', return_value=QueryCache())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        patcher = patch('utils.relevance_index.get_relevance_index', return_value=None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.graphdb = GraphDbMethods()
+
+    def test_sparql_literal_escapes_quotes_and_backslashes(self):
+        self.assertEqual(sparql_literal('say "hi" \\ bye'), '"say \\"hi\\" \\\\ bye"')
+
+    def test_get_module_features_uses_a_single_query(self):
+        self.client.select.return_value = [
+            binding(module_title="Cloud Computing", lecturer_match="true", day_match="false",
+                    assessment_match="true", project_work="true", oral_assessment="false"),
+        ]
+
+        features = self.graphdb.get_module_features(
+            ["Cloud Computing", "Unknown Module"], lecturer="Knut Hinkelmann", day="Monday"
+        )
+
+        self.client.select.assert_called_once()
+        query = self.client.select.call_args[0][0]
+        self.assertIn('VALUES ?module_title { "Cloud Computing" "Unknown Module" }', query)
+        self.assertEqual(features["Cloud Computing"], {
+            "lecturer": True,
+            "day": False,
+            "assessment_type": True,
+            "project_work": True,
+            "oral_assessment": False,
+        })
+        self.assertFalse(any(features["Unknown Module"].values()))
+
+    def test_get_modules_by_preferences_compares_day_indices(self):
+        self.client.select.return_value = [
+            binding(module_title="Cloud Computing", module_type="elective", preference_score="2"),
+        ]
+
+        modules = self.graphdb.get_modules_by_preferences(
+            [], [], ["Monday", " saturday"], "", False, False
+        )
+
+        query = self.client.select.call_args[0][0]
+        self.assertIn("FILTER(?day_of_week IN (0, 5))", query)
+        self.assertNotIn("days_str", query)
+        self.assertEqual(modules[0]["preference_score"], 2)
+
+    def test_get_modules_by_preferences_quotes_lecturer_names(self):
+        self.client.select.return_value = []
+
+        self.graphdb.get_modules_by_preferences(
+            [], ['Prof. Dr. Knut "K" Hinkelmann'], [], "individual", False, False
+        )
+
+        query = self.client.select.call_args[0][0]
+        self.assertIn('REGEX(LCASE("Prof. Dr. Knut \\"K\\" Hinkelmann"), LCASE(?surnames_str), "i")', query)
+        self.assertIn('LCASE(STR(?assessment_type_prop)) = "individual"', query)
+
+    def test_get_module_features_without_modules_skips_the_query(self):
+        self.assertEqual(self.graphdb.get_module_features([]), {})
+        self.client.select.assert_not_called()
+
+    def test_single_module_matchers_wrap_the_feature_query(self):
+        self.client.select.return_value = [
+            binding(module_title="Cloud Computing", lecturer_match="false", day_match="true",
+                    assessment_match="false", project_work="false", oral_assessment="true"),
+        ]
+
+        self.assertTrue(self.graphdb.matches_day("Cloud Computing", "Monday"))
+        self.assertTrue(self.graphdb.has_oral_assessment("Cloud Computing"))
+        self.assertFalse(self.graphdb.has_project_work("Cloud Computing"))
+
+    def test_get_modules_by_occupation_aggregates_all_occupations_in_one_query(self):
+        self.client.select.return_value = [
+            binding(module_title="Cloud Computing", module_type="elective", occupation_name="ICT consultant",
+                    shared_skills="2", learning_outcomes="Design cloud systems|Operate cloud systems",
+                    skills="cloud technologies|manage ICT systems"),
+        ]
+
+        rows = self.graphdb.get_modules_by_occupation(
+            ["ICT consultant", "data analyst"], ["Business Intelligence"]
+        )
+
+        self.client.select.assert_called_once()
+        query = self.client.select.call_args[0][0]
+        self.assertIn('VALUES ?occupation_name { "ICT consultant" "data analyst" }', query)
+        self.assertIn('FILTER(?module_title NOT IN ("Business Intelligence"))', query)
+        self.assertEqual(rows, [{
+            "module": {"module_title": "Cloud Computing", "module_type": "elective"},
+            "occupation": {"occupation": "ICT consultant"},
+            "shared_skills": 2,
+            "supporting_learning_outcomes": ["Design cloud systems", "Operate cloud systems"],
+            "supported_skills": ["cloud technologies", "manage ICT systems"],
+        }])
+
+    def test_reference_data_is_served_from_cache_until_the_graph_version_changes(self):
+        version = [binding(version="v1")]
+        occupations = [binding(occupation="data analyst")]
+        self.client.select.side_effect = [version, occupations]
+
+        self.assertEqual(self.graphdb.get_occupations(), ["data analyst"])
+        self.assertEqual(self.graphdb.get_occupations(), ["data analyst"])
+        self.assertEqual(self.client.select.call_count, 2)
+        self.assertEqual(self.graphdb.cache_stats()["hits"], 1)
+
+        self.graphdb.cache.version_checked_at = 0.0
+        self.client.select.side_effect = [[binding(version="v2")], [binding(occupation="ICT consultant")]]
+        self.assertEqual(self.graphdb.get_occupations(), ["ICT consultant"])
+
+
+class TestAsyncGraphDbMethods(unittest.TestCase):
+
+    def setUp(self):
+        self.client = AsyncMock()
+        for target, value in [('utils.graphdb_methods.get_async_sparql_client', self.client),
+                              ('utils.graphdb_methods.get_query_cache', QueryCache()),
+                              ('utils.relevance_index.get_relevance_index', None)]:
+            patcher = patch(target, return_value=value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def run_query(self, method, *args, **kwargs):
+        async def run():
+            return await getattr(AsyncGraphDbMethods(), method)(*args, **kwargs)
+        return asyncio.run(run())
+
+    def test_query_methods_are_coroutines(self):
+        self.client.select.return_value = [
+            binding(module_title="Cloud Computing", lecturer_match="false", day_match="false",
+                    assessment_match="false", project_work="true", oral_assessment="false"),
+        ]
+
+        self.assertTrue(self.run_query("has_project_work", "Cloud Computing"))
+        self.client.select.assert_awaited_once()
+
+    def test_cached_reference_data_and_composed_methods(self):
+        self.client.select.side_effect = [
+            [binding(version="v1")],
+            [binding(module_title="Cloud Computing"), binding(module_title="Master Thesis")],
+        ]
+
+        self.assertEqual(self.run_query("get_filtered_modules"), ["Cloud Computing"])
+        self.assertEqual(self.run_query("get_modules"), ["Cloud Computing", "Master Thesis"])
+        self.assertEqual(self.client.select.await_count, 2)
+
+    def test_empty_input_resolves_without_querying(self):
+        self.assertEqual(self.run_query("get_modules_by_occupation", []), [])
+        self.client.select.assert_not_awaited()
+
+
+if __name__ == '__main__':
+    unittest.main()
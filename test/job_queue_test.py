@@ -0,0 +1,68 @@
+import os
+import tempfile
+import threading
+import time
+import unittest
+
+from utils.job_queue import JobQueue, QUEUED, RUNNING, DONE, FAILED
+
+
+def wait_for(queue, job_id, statuses=(DONE, FAILED), timeout=5):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = queue.get(job_id)
+        if job["status"] in statuses:
+            return job
+        time.sleep(0.01)
+    raise AssertionError(f"Job {job_id} did not reach {statuses}")
+
+
+class TestJobQueue(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "jobs.sqlite3")
+        self.queue = JobQueue(self.path, max_workers=1)
+
+    def tearDown(self):
+        self.queue.shutdown()
+        self.directory.cleanup()
+
+    def test_result_and_progress_are_stored(self):
+        def job(report, a, b):
+            report({"label": "adding"})
+            return {"sum": a + b}
+
+        job_id = self.queue.submit("student", job, 1, b=2)
+        done = wait_for(self.queue, job_id)
+        self.assertEqual((done["status"], done["result"], done["progress"]), (DONE, {"sum": 3}, {"label": "adding"}))
+        self.assertEqual(self.queue.latest("student")["id"], job_id)
+
+    def test_errors_are_stored(self):
+        def job(report):
+            raise ValueError("no modules")
+
+        failed = wait_for(self.queue, self.queue.submit("student", job))
+        self.assertEqual((failed["status"], failed["error"]), (FAILED, "no modules"))
+
+    def test_one_active_job_per_owner_and_queue_position(self):
+        release = threading.Event()
+
+        def job(report):
+            release.wait(5)
+
+        first = self.queue.submit("a", job)
+        self.assertEqual(self.queue.submit("a", job), first)
+        second = self.queue.submit("b", job)
+        wait_for(self.queue, first, (RUNNING,))
+        self.assertEqual((self.queue.position(first), self.queue.position(second)), (0, 1))
+        self.assertEqual(self.queue.get(second)["status"], QUEUED)
+        release.set()
+        self.assertEqual(wait_for(self.queue, second)["status"], DONE)
+
+    def test_unfinished_jobs_fail_on_restart(self):
+        release = threading.Event()
+        job_id = self.queue.submit("student", lambda report: release.wait(5))
+        wait_for(self.queue, job_id, (RUNNING,))
+        self.assertEqual(JobQueue(self.path).get(job_id)["status"], FAILED)
+        release.set()
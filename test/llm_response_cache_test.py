@@ -0,0 +1,45 @@
+import os
+import tempfile
+import threading
+import unittest
+
+from utils.llm_response_cache import LLMResponseCache, request_key
+
+
+class TestLLMResponseCache(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "responses.sqlite3")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_request_key_ignores_key_order(self):
+        request = {"model": "m", "temperature": 0, "messages": [{"role": "user", "content": "hi"}], "tools": []}
+        self.assertEqual(request_key(request), request_key(dict(reversed(list(request.items())))))
+        self.assertNotEqual(request_key(request), request_key({**request, "tools": [{"name": "t"}]}))
+
+    def test_responses_are_stored_by_key(self):
+        cache = LLMResponseCache(self.path)
+        self.assertIsNone(cache.get("a"))
+        cache.put("a", "response")
+        self.assertEqual(LLMResponseCache(self.path).get("a"), "response")
+
+    def test_least_recently_used_responses_are_evicted(self):
+        cache = LLMResponseCache(self.path, max_bytes=20)
+        cache.put("a", "x" * 8)
+        cache.put("b", "x" * 8)
+        cache.get("a")
+        cache.put("c", "x" * 8)
+        self.assertEqual((cache.get("a"), cache.get("b"), cache.get("c")), ("x" * 8, None, "x" * 8))
+        self.assertEqual(cache.size(), 16)
+
+    def test_concurrent_writes(self):
+        cache = LLMResponseCache(self.path)
+        threads = [threading.Thread(target=cache.put, args=(str(i), str(i))) for i in range(20)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(cache), 20)
@@ -0,0 +1,88 @@
+import asyncio
+import unittest
+
+import anthropic
+import httpx
+
+from utils.llm_scheduler import LLMScheduler
+
+
+def rate_limit_error():
+    request = httpx.Request("POST", "https://api.anthropic.com/v1/messages")
+    response = httpx.Response(429, request=request, headers={"retry-after": "0"})
+    return anthropic.RateLimitError("rate limited", response=response, body=None)
+
+
+class TestLLMScheduler(unittest.TestCase):
+
+    def test_in_flight_calls_are_limited(self):
+        scheduler = LLMScheduler(max_in_flight=2)
+        running, peak = 0, 0
+
+        async def call():
+            nonlocal running, peak
+            ticket = await scheduler.acquire("student")
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.01)
+            running -= 1
+            scheduler.release(ticket)
+
+        async def main():
+            await asyncio.gather(*(call() for _ in range(6)))
+
+        asyncio.run(main())
+        self.assertEqual(peak, 2)
+        self.assertEqual(scheduler.stats()["in_flight"], 0)
+
+    def test_owners_take_turns(self):
+        scheduler = LLMScheduler(max_in_flight=1)
+        order = []
+
+        async def call(owner, i):
+            ticket = await scheduler.acquire(owner)
+            order.append(f"{owner}{i}")
+            await asyncio.sleep(0)
+            scheduler.release(ticket)
+
+        async def main():
+            blocker = await scheduler.acquire("x")
+            tasks = [asyncio.create_task(call("a", i)) for i in range(3)]
+            tasks.append(asyncio.create_task(call("b", 0)))
+            await asyncio.sleep(0)
+            self.assertEqual((scheduler.position("a"), scheduler.position("b")), (1, 2))
+            self.assertEqual(scheduler.stats()["queued"], 4)
+            scheduler.release(blocker)
+            await asyncio.gather(*tasks)
+
+        asyncio.run(main())
+        self.assertEqual(order, ["a0", "b0", "a1", "a2"])
+
+    def test_token_budget_delays_calls(self):
+        scheduler = LLMScheduler(tokens_per_minute=100)
+
+        async def main():
+            scheduler.release(await scheduler.acquire("a", 80), 80)
+            waiting = asyncio.create_task(scheduler.acquire("b", 50))
+            await asyncio.sleep(0.01)
+            self.assertFalse(waiting.done())
+            self.assertEqual(scheduler.position("b"), 1)
+            waiting.cancel()
+
+        asyncio.run(main())
+        self.assertEqual(scheduler.stats()["queued"], 0)
+
+    def test_rate_limited_calls_are_retried(self):
+        scheduler = LLMScheduler(max_retries=2, base_delay=0)
+        attempts = []
+
+        async def request():
+            attempts.append(1)
+            if len(attempts) < 3:
+                raise rate_limit_error()
+            return "ok"
+
+        self.assertEqual(asyncio.run(scheduler.with_retries(request)), "ok")
+        attempts.clear()
+        with self.assertRaises(anthropic.RateLimitError):
+            asyncio.run(LLMScheduler(max_retries=1, base_delay=0).with_retries(request))
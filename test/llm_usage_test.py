@@ -0,0 +1,36 @@
+import asyncio
+import contextvars
+import unittest
+from types import SimpleNamespace
+
+from utils.llm_usage import LLMUsage, record_llm_usage, track_llm_usage
+
+
+class TestLLMUsage(unittest.TestCase):
+
+    def test_usage_is_summed_over_calls(self):
+        usage = LLMUsage()
+        usage.add(SimpleNamespace(input_tokens=10, output_tokens=5, cache_creation_input_tokens=2000,
+                                  cache_read_input_tokens=None))
+        usage.add(SimpleNamespace(input_tokens=30, output_tokens=7, cache_creation_input_tokens=0,
+                                  cache_read_input_tokens=2000))
+        self.assertEqual(usage.to_dict(), {
+            "calls": 2, "cached_calls": 0, "input_tokens": 40, "output_tokens": 12,
+            "cache_creation_input_tokens": 2000, "cache_read_input_tokens": 2000,
+        })
+        self.assertAlmostEqual(usage.cache_hit_rate, 2000 / 4040)
+
+    def test_calls_of_started_tasks_are_recorded(self):
+        async def call():
+            record_llm_usage(SimpleNamespace(input_tokens=3))
+
+        async def run():
+            usage = track_llm_usage()
+            await asyncio.create_task(call())
+            return usage
+
+        usage = contextvars.copy_context().run(asyncio.run, run())
+        self.assertEqual((usage.calls, usage.input_tokens), (1, 3))
+
+    def test_nothing_is_recorded_without_tracking(self):
+        contextvars.Context().run(record_llm_usage, SimpleNamespace(input_tokens=3))
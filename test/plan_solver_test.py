@@ -0,0 +1,132 @@
+import unittest
+from datetime import date
+
+from utils.plan_solver import (
+    solve_study_plan, semester_capacities, module_seasons, upcoming_semester, MANDATORY_MODULES, TOTAL_CREDITS
+)
+from utils.plan_validator import validate_study_plan
+
+
+def sessions(title, *seasons, module_type="elective"):
+    return {
+        "module_title": title,
+        "module_type": module_type,
+        "module_description": f"{title} description. More details.",
+        "teaching_session": [{"semester": f" {season}"} for season in seasons],
+    }
+
+
+TEACHING_SESSIONS = [
+    sessions("Alignment of Business and IT", "Spring", "Autumn", module_type="mandatory"),
+    sessions("Business Intelligence", "Spring", module_type="mandatory"),
+    sessions("Business Process Management", "Spring", "Autumn", module_type="mandatory"),
+    sessions("Strategic Business Innovation", "Autumn", module_type="mandatory"),
+    sessions("Cloud Computing", "Spring"),
+    sessions("Data Science", "Autumn"),
+    sessions("Lean Entrepreneurship", "Autumn"),
+    sessions("Agile Business Analysis", "Spring", "Autumn"),
+    sessions("Supply Chain Management", "Autumn"),
+    sessions("E-Business and Mobile Business", "Spring"),
+    sessions("Data Governance and Information Management", "Autumn"),
+]
+RANKED = [
+    "Cloud Computing", "Data Science", "Lean Entrepreneurship", "Agile Business Analysis",
+    "Supply Chain Management", "E-Business and Mobile Business", "Data Governance and Information Management",
+]
+THESIS = ["Research Methods in Information Systems", "Master Thesis Proposal", "Master Thesis"]
+
+
+def semester_of(plan):
+    return {m.title: i for i, s in enumerate(plan.semesters) for m in s.modules}
+
+
+class TestPlanSolver(unittest.TestCase):
+
+    def assert_valid(self, plan, taken=()):
+        placed = semester_of(plan)
+        self.assertEqual(plan.taken_credits + plan.planned_credits, TOTAL_CREDITS)
+        self.assertEqual(plan.unplaced_modules, [])
+        for module in MANDATORY_MODULES + THESIS:
+            self.assertTrue(module in placed or module in taken, module)
+        main = [i for title, i in placed.items() if title not in THESIS]
+        rm, mtp, mt = (placed[t] for t in THESIS)
+        self.assertLessEqual(max(main), rm)
+        self.assertLessEqual(rm, mtp)
+        self.assertLess(mtp, mt)
+        offered = {entry["module_title"]: {ts["semester"].strip() for ts in entry["teaching_session"]}
+                   for entry in TEACHING_SESSIONS}
+        for semester in plan.semesters:
+            for module in semester.modules:
+                if module.title not in THESIS:
+                    self.assertIn(semester.season, offered[module.title], module.title)
+
+    def test_full_plan_respects_the_rules(self):
+        for expected_semesters in (3, 4, 6):
+            plan = solve_study_plan(RANKED, expected_semesters, [], TEACHING_SESSIONS, start=("Autumn", 2026))
+            self.assert_valid(plan)
+            self.assertEqual(len(plan.semesters), expected_semesters)
+
+    def test_taken_modules_reduce_the_plan(self):
+        taken = ["Cloud Computing", "Data Science", "Business Intelligence"]
+        plan = solve_study_plan(RANKED, 4, taken, TEACHING_SESSIONS, start=("Autumn", 2026))
+        self.assert_valid(plan, taken)
+        self.assertEqual(plan.taken_credits, 18)
+        self.assertTrue(set(taken).isdisjoint(semester_of(plan)))
+
+    def test_priority_order_is_kept_when_possible(self):
+        plan = solve_study_plan(RANKED, 6, [], TEACHING_SESSIONS, start=("Autumn", 2026))
+        placed = semester_of(plan)
+        self.assertNotIn("Data Governance and Information Management", placed)
+        self.assertLessEqual(placed["Data Science"], placed["Lean Entrepreneurship"])
+
+    def test_semesters_alternate_and_empty_ones_are_last(self):
+        plan = solve_study_plan(RANKED, 16, [], TEACHING_SESSIONS, start=("Spring", 2027))
+        self.assertEqual([(s.season, s.year) for s in plan.semesters[:3]],
+                         [("Spring", 2027), ("Autumn", 2027), ("Spring", 2028)])
+        credits = [s.credits for s in plan.semesters]
+        self.assertEqual(credits[-1], 0)
+        self.assertEqual(credits, sorted(credits, key=lambda c: c == 0))
+
+    def test_even_spread_gives_way_to_the_seasons(self):
+        # The even spread [7, 5, 1] asks for 7 Spring modules, but only 6 are taught in Spring
+        plan = solve_study_plan(RANKED, 3, [], TEACHING_SESSIONS, start=("Spring", 2026))
+        self.assert_valid(plan)
+        self.assertEqual(plan.missing_credits, 0)
+
+    def test_one_season_catalogue_starting_in_the_other_season(self):
+        spring_only = [sessions(title, "Spring", module_type="mandatory") for title in MANDATORY_MODULES]
+        spring_only += [sessions(f"Elective {i}", "Spring") for i in range(40)]
+        ranked = [f"Elective {i}" for i in range(40)]
+        for expected_semesters in (6, 8, 10):
+            plan = solve_study_plan(ranked, expected_semesters, [], spring_only, start=("Autumn", 2026))
+            self.assertEqual(plan.missing_credits, 0)
+            self.assertEqual(plan.taken_credits + plan.planned_credits, TOTAL_CREDITS)
+            placed = semester_of(plan)
+            for title, i in placed.items():
+                if title not in THESIS:
+                    self.assertEqual(plan.semesters[i].season, "Spring", title)
+            # The Autumn semesters before the last main module stay empty, which the validator accepts
+            self.assertEqual(validate_study_plan(plan, [], module_seasons(spring_only), expected_semesters), [])
+
+    def test_shortfall_is_reported(self):
+        plan = solve_study_plan(RANKED[:2], 4, [], TEACHING_SESSIONS, start=("Autumn", 2026))
+        self.assertEqual(plan.taken_credits + plan.planned_credits + plan.missing_credits, TOTAL_CREDITS)
+        self.assertEqual(plan.missing_credits, 24)
+        self.assertEqual(plan.unplaced_modules, [])
+
+    def test_capacities(self):
+        self.assertEqual(semester_capacities(13, 4), [4, 3, 3, 3])
+        self.assertEqual(semester_capacities(13, 6, thesis_last=True), [3, 3, 2, 2, 2, 1])
+        self.assertEqual(semester_capacities(13, 4, thesis_last=True), [4, 4, 4, 1])
+        self.assertEqual(semester_capacities(2, 4), [1, 1, 0, 0])
+        with self.assertRaises(ValueError):
+            semester_capacities(13, 1, thesis_last=True)
+
+    def test_upcoming_semester(self):
+        self.assertEqual(upcoming_semester(date(2026, 1, 10)), ("Spring", 2026))
+        self.assertEqual(upcoming_semester(date(2026, 6, 1)), ("Autumn", 2026))
+        self.assertEqual(upcoming_semester(date(2026, 10, 17)), ("Spring", 2027))
+
+
+if __name__ == '__main__':
+    unittest.main()
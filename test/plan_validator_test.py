@@ -0,0 +1,91 @@
+import time
+import unittest
+
+from test.plan_solver_test import RANKED, TEACHING_SESSIONS
+from utils.models import PlannedModule, PlannedSemester, StudyPlan
+from utils.plan_solver import solve_study_plan, module_seasons
+from utils.plan_validator import parse_study_plan, validate_study_plan
+
+RESPONSE = """### Semester-Wise Study Plan for 3 Semesters:
+- **Spring 2027** (Total Credits: 30):
+    - Business Intelligence (Mandatory, Spring): Data warehousing.
+    - **Business Analytics: Quantitative Methods** (Elective, Spring): Statistics.
+    - Data Science (Elective, Spring): Machine learning.
+- **Autumn 2027** (Total Credits: 12):
+    - Research Methods in Information Systems (Mandatory, Autumn): Research design.
+    - Master Thesis Proposal (Mandatory, Autumn): Thesis proposal.
+- **Spring 2028** (Total Credits: 18):
+    - Master Thesis (Mandatory, Spring): Thesis.
+
+### Additional Notes:
+- Credits already completed: **30**.
+
+## 📆 Weekly Lecture Schedule
+- 📌 Business Intelligence: Friday at 17:15-21:00 in Olten (Group A)
+"""
+
+
+def rules(violations):
+    return sorted(v["rule"] for v in violations)
+
+
+class TestPlanValidator(unittest.TestCase):
+
+    def test_parse_study_plan(self):
+        plan, declared = parse_study_plan(RESPONSE)
+        self.assertEqual([(s.season, s.year) for s in plan.semesters],
+                         [("Spring", 2027), ("Autumn", 2027), ("Spring", 2028)])
+        self.assertEqual([m.title for m in plan.semesters[0].modules],
+                         ["Business Intelligence", "Business Analytics: Quantitative Methods", "Data Science"])
+        self.assertEqual(plan.semesters[2].modules[0].credits, 18)
+        self.assertEqual(declared, {0: 30, 1: 12, 2: 18})
+
+    def test_violations_are_machine_readable(self):
+        plan, declared = parse_study_plan(RESPONSE)
+        taken = ["Alignment of Business and IT", "Business Process Management", "Strategic Business Innovation",
+                 "Cloud Computing", "Lean Entrepreneurship"]
+        violations = validate_study_plan(plan, taken, {"Data Science": {"Autumn"}}, 3, declared)
+        self.assertEqual(rules(violations), ["season_availability", "semester_credits", "total_credits"])
+        season = next(v for v in violations if v["rule"] == "season_availability")
+        self.assertEqual((season["module"], season["semester"]), ("Data Science", "Spring 2027"))
+
+    def test_ordering_and_structure_rules(self):
+        plan = StudyPlan([
+            PlannedSemester("Autumn", 2026, [PlannedModule("Master Thesis Proposal", "mandatory", 6)]),
+            PlannedSemester("Spring", 2027),
+            PlannedSemester("Autumn", 2027, [
+                PlannedModule("Cloud Computing", "elective", 6),
+                PlannedModule("Cloud Computing", "elective", 6),
+                PlannedModule("Research Methods in Information Systems", "mandatory", 6),
+            ]),
+        ], 0)
+        self.assertEqual(rules(validate_study_plan(plan, [], expected_semesters=4)), [
+            "duplicate_module", "empty_semester", "main_after_thesis", "missing_mandatory", "missing_mandatory",
+            "missing_mandatory", "missing_mandatory", "missing_mandatory", "semester_count", "thesis_order",
+            "total_credits",
+        ])
+
+    def test_empty_semesters_no_later_module_could_fill_are_allowed(self):
+        def plan(*semesters):
+            return StudyPlan([PlannedSemester(season, 2026 + i // 2, [PlannedModule(title, "elective", 6)] if title else [])
+                              for i, (season, title) in enumerate(semesters)], 0)
+
+        seasons = {"Cloud Computing": {"Spring"}, "Data Science": {"Spring", "Autumn"}}
+        gap = plan(("Autumn", None), ("Spring", "Cloud Computing"), ("Autumn", "Research Methods in Information Systems"))
+        self.assertNotIn("empty_semester", rules(validate_study_plan(gap, [], seasons)))
+        movable = plan(("Autumn", None), ("Spring", "Data Science"), ("Autumn", "Research Methods in Information Systems"))
+        self.assertIn("empty_semester", rules(validate_study_plan(movable, [], seasons)))
+        thesis = plan(("Spring", "Cloud Computing"), ("Autumn", None), ("Spring", "Research Methods in Information Systems"))
+        self.assertIn("empty_semester", rules(validate_study_plan(thesis, [], seasons)))
+
+    def test_solver_plans_are_valid_and_checked_quickly(self):
+        seasons = module_seasons(TEACHING_SESSIONS)
+        for expected_semesters in (3, 4, 6):
+            plan = solve_study_plan(RANKED, expected_semesters, [], TEACHING_SESSIONS, start=("Autumn", 2026))
+            start = time.perf_counter()
+            self.assertEqual(validate_study_plan(plan, [], seasons, expected_semesters), [])
+            self.assertLess(time.perf_counter() - start, 0.05)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,72 @@
+import unittest
+from unittest.mock import patch
+
+from utils.query_cache import QueryCache, VERSION_CHECK_INTERVAL
+
+
+class TestQueryCache(unittest.TestCase):
+
+    @patch('utils.query_cache.time.monotonic')
+    def test_entries_expire_after_their_ttl(self, mock_monotonic):
+        cache = QueryCache()
+        mock_monotonic.return_value = 100.0
+        cache.put("get_occupations", ["data analyst"], ttl=10)
+
+        mock_monotonic.return_value = 105.0
+        self.assertEqual(cache.get("get_occupations"), (True, ["data analyst"]))
+
+        mock_monotonic.return_value = 111.0
+        self.assertEqual(cache.get("get_occupations"), (False, None))
+        self.assertEqual(cache.stats()["hits"], 1)
+        self.assertEqual(cache.stats()["misses"], 1)
+
+    def test_least_recently_used_entry_is_evicted(self):
+        cache = QueryCache(max_entries=2)
+        cache.put("a", 1, ttl=60)
+        cache.put("b", 2, ttl=60)
+        cache.get("a")
+        cache.put("c", 3, ttl=60)
+
+        self.assertFalse(cache.get("b")[0])
+        self.assertTrue(cache.get("a")[0])
+        self.assertTrue(cache.get("c")[0])
+        self.assertEqual(cache.stats()["evictions"], 1)
+
+    def test_cached_values_are_copies(self):
+        cache = QueryCache()
+        modules = [{"module": "Cloud Computing", "score": 0}]
+        cache.put("overview", modules, ttl=60)
+        modules[0]["score"] = 5
+
+        hit, value = cache.get("overview")
+        value[0]["score"] = 7
+
+        self.assertEqual(cache.get("overview")[1][0]["score"], 0)
+
+    def test_new_graph_version_drops_every_entry(self):
+        cache = QueryCache()
+        cache.sync_version("v1")
+        cache.put("a", 1, ttl=60)
+
+        cache.sync_version("v1")
+        self.assertTrue(cache.get("a")[0])
+
+        cache.sync_version("v2")
+        self.assertFalse(cache.get("a")[0])
+        self.assertEqual(cache.stats()["graph_version"], "v2")
+
+    @patch('utils.query_cache.time.monotonic')
+    def test_version_check_is_throttled(self, mock_monotonic):
+        cache = QueryCache()
+        mock_monotonic.return_value = 1000.0
+        self.assertTrue(cache.version_check_due())
+
+        cache.sync_version("v1")
+        self.assertFalse(cache.version_check_due())
+
+        mock_monotonic.return_value = 1000.0 + VERSION_CHECK_INTERVAL + 1
+        self.assertTrue(cache.version_check_due())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,91 @@
+import tempfile
+import unittest
+
+from utils.models import Student
+from utils.recommendation_cache import profile_fingerprint, MemoryRecommendationCache, DiskRecommendationCache
+
+WORK_EXPERIENCE = [
+    {"id": "2", "occupation": "ICT consultant", "start_date": "2020-01-01", "end_date": None},
+    {"id": "1", "occupation": "data analyst", "start_date": "2018-01-01", "end_date": "2019-12-31"},
+]
+
+
+def student(**fields):
+    return Student.from_dict({"id": "student-1", "desired_jobs": ["ICT consultant"], **fields})
+
+
+class TestProfileFingerprint(unittest.TestCase):
+
+    def test_same_inputs_same_fingerprint(self):
+        self.assertEqual(
+            profile_fingerprint(student(), WORK_EXPERIENCE, "balanced", "v1"),
+            profile_fingerprint(student(), list(reversed(WORK_EXPERIENCE)), "balanced", "v1"),
+        )
+
+    def test_any_change_changes_the_fingerprint(self):
+        fingerprint = profile_fingerprint(student(), WORK_EXPERIENCE, "balanced", "v1")
+        self.assertNotEqual(fingerprint, profile_fingerprint(student(available_days=["Monday"]), WORK_EXPERIENCE, "balanced", "v1"))
+        self.assertNotEqual(fingerprint, profile_fingerprint(student(), WORK_EXPERIENCE[:1], "balanced", "v1"))
+        self.assertNotEqual(fingerprint, profile_fingerprint(student(), WORK_EXPERIENCE, "preferences", "v1"))
+        self.assertNotEqual(fingerprint, profile_fingerprint(student(), WORK_EXPERIENCE, "balanced", "v2"))
+
+    def test_plan_start_and_options_change_the_fingerprint(self):
+        fingerprint = profile_fingerprint(student(), WORK_EXPERIENCE, "balanced", "v1", ("Spring", 2027),
+                                          {"mode": "agent", "narrate": False})
+        self.assertNotEqual(fingerprint, profile_fingerprint(student(), WORK_EXPERIENCE, "balanced", "v1",
+                                                             ("Autumn", 2027), {"mode": "agent", "narrate": False}))
+        self.assertNotEqual(fingerprint, profile_fingerprint(student(), WORK_EXPERIENCE, "balanced", "v1",
+                                                             ("Spring", 2027), {"mode": "direct", "narrate": False}))
+        self.assertNotEqual(fingerprint, profile_fingerprint(student(), WORK_EXPERIENCE, "balanced", "v1",
+                                                             ("Spring", 2027), {"mode": "agent", "narrate": True}))
+
+
+class TestMemoryRecommendationCache(unittest.TestCase):
+
+    def test_get_put_invalidate(self):
+        cache = MemoryRecommendationCache(max_entries=2)
+        cache.put("student-1", "plan", "a", "Plan A")
+        cache.put("student-2", "plan", "b", "Plan B")
+        self.assertEqual(cache.get("student-1", "plan", "a"), "Plan A")
+        self.assertIsNone(cache.get("student-1", "retrieval", "a"))
+
+        cache.invalidate("student-1")
+        self.assertIsNone(cache.get("student-1", "plan", "a"))
+        self.assertEqual(cache.get("student-2", "plan", "b"), "Plan B")
+
+    def test_least_recently_used_is_evicted(self):
+        cache = MemoryRecommendationCache(max_entries=2)
+        cache.put("student-1", "plan", "a", "Plan A")
+        cache.put("student-1", "plan", "b", "Plan B")
+        cache.get("student-1", "plan", "a")
+        cache.put("student-1", "plan", "c", "Plan C")
+        self.assertIsNone(cache.get("student-1", "plan", "b"))
+        self.assertEqual(cache.get("student-1", "plan", "a"), "Plan A")
+
+
+class TestDiskRecommendationCache(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def test_get_put_invalidate(self):
+        cache = DiskRecommendationCache(self.directory.name)
+        value = {"summary": "- Cloud Computing", "modules_retrieved": [{"module": {"module_title": "Cloud Computing"}}]}
+        cache.put("student-1", "retrieval", "a", value)
+        self.assertEqual(DiskRecommendationCache(self.directory.name).get("student-1", "retrieval", "a"), value)
+
+        cache.invalidate("student-1")
+        self.assertIsNone(cache.get("student-1", "retrieval", "a"))
+
+    def test_size_based_eviction(self):
+        cache = DiskRecommendationCache(self.directory.name, max_bytes=250)
+        for fingerprint in "abc":
+            cache.put("student-1", "plan", fingerprint, "x" * 100)
+        self.assertLessEqual(cache.size(), 250)
+        self.assertIsNone(cache.get("student-1", "plan", "a"))
+        self.assertEqual(cache.get("student-1", "plan", "c"), "x" * 100)
+
+
+if __name__ == '__main__':
+    unittest.main()
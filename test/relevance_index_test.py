@@ -0,0 +1,89 @@
+import tempfile
+import unittest
+from unittest.mock import patch, MagicMock
+
+from rdflib import Literal
+
+from esco.graph import add_module, add_learning_outcome, link_module_learning_outcome, link_occupation_skill, \
+    link_learning_outcome_skill, add_skill
+from test.embedded_graph_test import build_graph, OCCUPATION_URI
+from utils import relevance_index
+from utils.embedded_graph import EX, EmbeddedGraph
+from utils.graphdb_methods import GraphDbMethods
+from utils.query_cache import QueryCache
+from utils.relevance_index import build_relevance_index, get_relevance_index, RelevanceIndex
+
+OPTIONAL_SKILL_URI = "http://data.europa.eu/esco/skill/modelling"
+
+
+def build_index_graph():
+    g = build_graph()
+    add_module(g, "Course_Business_Modelling", "link", "Business Modelling", "Description", "elective", "", "", "")
+    add_learning_outcome(g, "Model enterprises", "Course_Business_Modelling")
+    link_module_learning_outcome(g, "Course_Business_Modelling", "Model enterprises")
+    add_skill(g, "enterprise modelling", "skill", 2, "Description", OPTIONAL_SKILL_URI)
+    link_learning_outcome_skill(g, "Course_Business_Modelling", "Model enterprises", OPTIONAL_SKILL_URI)
+    link_learning_outcome_skill(g, "Course_Cloud_Computing", "Design cloud systems", OPTIONAL_SKILL_URI)
+    link_occupation_skill(g, OCCUPATION_URI, OPTIONAL_SKILL_URI, "optional")
+    return g
+
+
+class TestRelevanceIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.entries = build_relevance_index(EmbeddedGraph.from_rdflib(build_index_graph()), self.directory)
+        self.index = RelevanceIndex(self.directory)
+
+    def test_entries_are_ranked_by_shared_skills(self):
+        self.assertEqual(self.entries, 2)
+        self.assertEqual(self.index.graph_version, "v1")
+        rows = self.index.modules_by_occupation(["ICT consultant", "unknown occupation"])
+
+        self.assertEqual([r["module"]["module_title"] for r in rows], ["Cloud Computing", "Business Modelling"])
+        self.assertEqual(rows[0]["shared_skills"], 2)
+        self.assertEqual(rows[0]["essential_skills"], 1)
+        self.assertEqual(rows[0]["optional_skills"], 1)
+        self.assertEqual(rows[0]["supporting_learning_outcomes"], ["Design cloud systems"])
+        self.assertEqual(sorted(rows[0]["supported_skills"]), ["cloud technologies", "enterprise modelling"])
+        self.assertEqual(rows[1]["essential_skills"], 0)
+
+    def test_taken_modules_are_left_out(self):
+        rows = self.index.modules_by_occupation(["ICT consultant"], ["Cloud Computing"])
+        self.assertEqual([r["module"]["module_title"] for r in rows], ["Business Modelling"])
+
+    def test_graphdb_methods_read_the_index_built_from_the_current_graph(self):
+        client = MagicMock()
+        client.select.return_value = [{"version": {"value": "v1"}}]
+        with patch('utils.graphdb_methods.get_sparql_client', return_value=client), \
+                patch('utils.graphdb_methods.get_query_cache', return_value=QueryCache()), \
+                patch('utils.relevance_index.get_relevance_index', return_value=self.index):
+            rows = GraphDbMethods().get_modules_by_occupation(["ICT consultant"])
+
+            self.assertEqual(len(rows), 2)
+            self.assertEqual(client.select.call_count, 1)
+
+            client.select.side_effect = [[{"version": {"value": "v2"}}], []]
+            graphdb = GraphDbMethods()
+            graphdb.cache.version_checked_at = 0.0
+            self.assertEqual(graphdb.get_modules_by_occupation(["ICT consultant"]), [])
+            self.assertIn("VALUES ?occupation_name", client.select.call_args[0][0])
+
+    def test_index_rebuilt_for_a_new_graph_version_is_reloaded(self):
+        secrets = MagicMock()
+        secrets.secrets.get.return_value = self.directory
+        with patch.object(relevance_index, 'st', secrets), patch.object(relevance_index, '_index', None), \
+                patch.object(relevance_index, '_index_mtime', None):
+            self.assertEqual(get_relevance_index("v1").graph_version, "v1")
+            # The graph is stamped with a new version before the index is built again
+            self.assertEqual(get_relevance_index("v2").graph_version, "v1")
+
+            graph = build_index_graph()
+            graph.set((EX.GraphMetadata, EX.graphVersion, Literal("v2")))
+            build_relevance_index(EmbeddedGraph.from_rdflib(graph), self.directory)
+            index = get_relevance_index("v2")
+            self.assertEqual(index.graph_version, "v2")
+            self.assertIs(get_relevance_index("v2"), index)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,48 @@
+import unittest
+
+from utils.scoring_engine import ScoringEngine
+
+
+def overview(*titles):
+    return [{"module": {"module_title": t, "module_type": "elective"}, "score": 0} for t in titles]
+
+
+def row(title, **scores):
+    return {"module": {"module_title": title}, **scores}
+
+
+class TestScoringEngine(unittest.TestCase):
+
+    def setUp(self):
+        self.engine = ScoringEngine(overview("Cloud Computing", "Business Intelligence", "Data Science"))
+        self.engine.add_strategy("past_occupation", [row("Data Science", occupation_score=0.8)],
+                                 lambda m: m["occupation_score"])
+        # One point per row: a module supporting two occupations counts twice
+        self.engine.add_strategy("future_occupation", [row("Cloud Computing"), row("Cloud Computing"),
+                                                       row("Unknown Module")])
+        self.engine.add_strategy("preferences", [row("Business Intelligence", preference_score=3)],
+                                 lambda m: m["preference_score"])
+
+    def test_weighted_combination_matches_the_balanced_formula(self):
+        weights = {"past_occupation": 1.0, "future_occupation": 1 / 6, "preferences": 1 / 6}
+        ranked = self.engine.top_k(weights)
+
+        self.assertEqual([m["module"]["module_title"] for m in ranked],
+                         ["Data Science", "Business Intelligence", "Cloud Computing"])
+        self.assertAlmostEqual(ranked[0]["score"], 0.8)
+        self.assertAlmostEqual(ranked[1]["score"], 0.5)
+        self.assertAlmostEqual(ranked[2]["score"], 2 / 6)
+
+    def test_reweighting_and_top_k(self):
+        ranked = self.engine.top_k({"future_occupation": 1.0}, k=1)
+        self.assertEqual(ranked, [{"module": {"module_title": "Cloud Computing", "module_type": "elective"},
+                                   "score": 2.0}])
+
+    def test_ties_keep_the_overview_order(self):
+        ranked = self.engine.top_k({})
+        self.assertEqual([m["module"]["module_title"] for m in ranked],
+                         ["Cloud Computing", "Business Intelligence", "Data Science"])
+
+
+if __name__ == '__main__':
+    unittest.main()
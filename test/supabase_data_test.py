@@ -0,0 +1,68 @@
+import unittest
+
+from utils.supabase_data import SupabaseData
+
+
+class TestSupabaseData(unittest.TestCase):
+
+    def setUp(self):
+        self.data = SupabaseData()
+        self.fetches = 0
+
+    def fetch(self):
+        self.fetches += 1
+        return [{"id": "a"}]
+
+    def test_rows_are_fetched_once_per_request(self):
+        self.data.get("work_experience", self.fetch)
+        self.data.get("work_experience", self.fetch)
+        self.assertEqual(self.fetches, 1)
+        self.data.begin_request()
+        self.data.get("work_experience", self.fetch)
+        self.assertEqual(self.fetches, 2)
+
+    def test_repeated_reads_share_the_rows(self):
+        rows = self.data.get("work_experience", self.fetch)
+        self.assertIs(self.data.get("work_experience", self.fetch), rows)
+        self.data.get("student", self.fetch)
+        self.assertEqual(self.fetches, 2)
+
+    def test_invalidated_rows_are_fetched_again(self):
+        self.data.get("student", self.fetch)
+        self.data.get("work_experience", self.fetch)
+        self.data.invalidate("work_experience")
+        self.data.get("student", self.fetch)
+        self.data.get("work_experience", self.fetch)
+        self.assertEqual(self.fetches, 3)
+
+        self.data.invalidate()
+        self.data.get("student", self.fetch)
+        self.data.get("work_experience", self.fetch)
+        self.assertEqual(self.fetches, 5)
+
+    def test_optimistic_rows_are_kept_until_the_write_lands(self):
+        self.data.get("work_experience", self.fetch)
+        self.data.begin_write("work_experience", lambda rows: rows + [{"id": "b"}])
+        self.data.begin_request()
+        self.assertEqual(self.data.get("work_experience", self.fetch), [{"id": "a"}, {"id": "b"}])
+        self.assertEqual(self.fetches, 1)
+
+        self.data.end_write("work_experience", "Work experience")
+        self.data.begin_request()
+        self.data.get("work_experience", self.fetch)
+        self.assertEqual(self.fetches, 2)
+        self.assertEqual(self.data.pop_notifications(), [("Work experience saved", "✅")])
+        self.assertEqual(self.data.pop_notifications(), [])
+
+    def test_failed_write_drops_the_optimistic_rows(self):
+        self.data.get("work_experience", self.fetch)
+        self.data.begin_write("work_experience", lambda rows: [])
+        self.data.end_write("work_experience", "Work experience", ConnectionError("timed out"))
+        self.assertEqual(self.data.get("work_experience", self.fetch), [{"id": "a"}])
+        self.assertEqual(self.data.pending_writes("work_experience"), 0)
+        [(message, icon)] = self.data.pop_notifications()
+        self.assertEqual((message, icon), ("Work experience could not be saved: timed out", "❌"))
+
+
+if __name__ == "__main__":
+    unittest.main()
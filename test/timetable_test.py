@@ -0,0 +1,78 @@
+import time
+import unittest
+
+from utils.timetable import parse_time_range, session_mask, enumerate_timetables
+
+
+def module(title, *groups):
+    return {
+        "module_title": title,
+        "teaching_session": [
+            {"group_name": group, "day": day, "time": hours, "location": "Olten", "periodicity": "Weekly", "semester": "Spring"}
+            for group, day, hours in groups
+        ],
+    }
+
+
+class TestTimetable(unittest.TestCase):
+
+    def test_parse_time_range(self):
+        self.assertEqual(parse_time_range(" 13:15-17:00"), (795, 1020))
+        self.assertIsNone(parse_time_range("TBD"))
+        self.assertIsNone(parse_time_range("17:00-13:15"))
+        # Both separators appear in the scheduling CSV
+        self.assertEqual(parse_time_range("10.15-12.00"), (615, 720))
+        self.assertEqual(parse_time_range("10.15 - 12:00"), (615, 720))
+
+    def test_session_masks_overlap_only_on_the_same_day_and_minutes(self):
+        monday_afternoon = session_mask("Monday", "13:15-17:00")
+        self.assertTrue(monday_afternoon & session_mask(" Monday", "16:00-18:00"))
+        self.assertFalse(monday_afternoon & session_mask("Monday", "17:00-21:00"))
+        self.assertFalse(monday_afternoon & session_mask("Tuesday", "13:15-17:00"))
+        self.assertEqual(session_mask("Someday", "13:15-17:00"), 0)
+
+    def test_enumerates_every_conflict_free_combination(self):
+        sessions = [
+            module("Business Intelligence", ("Group A", "Friday", "17:15-21:00"), ("Group B", "Saturday", "08:15-12:00")),
+            module("Cloud Computing", ("Group A", "Saturday", "08:15-12:00")),
+            module("Strategic Business Innovation", ("Group A", "Friday", "17:15-21:00"), ("Group B", "Monday", "08:15-12:00")),
+        ]
+        timetables = enumerate_timetables(sessions)
+        self.assertEqual([t["groups"] for t in timetables], [{
+            "Cloud Computing": "Group A",
+            "Business Intelligence": "Group A",
+            "Strategic Business Innovation": "Group B",
+        }])
+        self.assertEqual([(s["day"], s["module_title"]) for s in timetables[0]["sessions"]], [
+            ("Monday", "Strategic Business Innovation"),
+            ("Friday", "Business Intelligence"),
+            ("Saturday", "Cloud Computing"),
+        ])
+
+    def test_a_group_with_several_sessions_takes_all_of_them(self):
+        sessions = [
+            module("Data Science", ("Group A", "Monday", "08:15-12:00"), ("Group A", "Tuesday", "08:15-12:00")),
+            module("Cloud Computing", ("Group A", "Tuesday", "10:00-12:00")),
+        ]
+        self.assertEqual(enumerate_timetables(sessions), [])
+
+    def test_limit_and_many_modules_stay_fast(self):
+        days = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday"]
+        hours = ["08:15-12:00", "13:15-17:00", "17:15-21:00"]
+        slots = [(day, h) for day in days for h in hours]
+        # 12 modules with 3 groups each, spread over 18 slots
+        sessions = [
+            module(f"Module {i}", *[(f"Group {g}", *slots[(i + 5 * g) % len(slots)]) for g in range(3)])
+            for i in range(12)
+        ]
+        start = time.perf_counter()
+        timetables = enumerate_timetables(sessions, limit=5)
+        self.assertLess(time.perf_counter() - start, 2)
+        self.assertEqual(len(timetables), 5)
+        for timetable in timetables:
+            slots_taken = [(s["day"], s["time"]) for s in timetable["sessions"]]
+            self.assertEqual(len(slots_taken), len(set(slots_taken)))
+
+
+if __name__ == '__main__':
+    unittest.main()
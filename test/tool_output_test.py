@@ -0,0 +1,66 @@
+import json
+import unittest
+
+from utils.tool_output import dedupe_modules, format_modules, estimate_tokens
+
+
+def row(title, occupation, score, outcomes, skills):
+    return {
+        "module": {"module_title": title, "module_type": "elective"},
+        "occupation": {"occupation": occupation},
+        "occupation_score": score,
+        "shared_skills": len(skills),
+        "supporting_learning_outcomes": outcomes,
+        "supported_skills": skills,
+    }
+
+
+ROWS = [
+    row("Cloud Computing", "ICT consultant", 0.9, ["Design cloud systems"], ["cloud technologies"]),
+    row("Data Science", "data analyst", 0.5, ["Analyse data"], ["statistics"]),
+    row("Cloud Computing", "data analyst", 0.5, ["Design cloud systems", "Run data pipelines"], ["cloud technologies"]),
+]
+
+
+class TestToolOutput(unittest.TestCase):
+
+    def test_modules_are_deduplicated_in_rank_order(self):
+        self.assertEqual(dedupe_modules(ROWS, "occupation_score"), [
+            {
+                "module": "Cloud Computing", "type": "elective", "score": 0.9,
+                "occupations": ["ICT consultant", "data analyst"],
+                "learning_outcomes": ["Design cloud systems", "Run data pipelines"],
+                "skills": ["cloud technologies"],
+            },
+            {
+                "module": "Data Science", "type": "elective", "score": 0.5,
+                "occupations": ["data analyst"],
+                "learning_outcomes": ["Analyse data"],
+                "skills": ["statistics"],
+            },
+        ])
+
+    def test_output_is_compact_json_with_savings(self):
+        text, stats = format_modules(ROWS, "occupation_score")
+        output = json.loads(text)
+        self.assertEqual([m["module"] for m in output["modules"]], ["Cloud Computing", "Data Science"])
+        self.assertEqual(output["omitted"], 0)
+        self.assertNotIn(", ", text)
+        self.assertEqual(stats["tokens"], estimate_tokens(text))
+        self.assertGreater(stats["tokens_saved"], 0)
+
+    def test_budget_truncates_lower_ranked_modules(self):
+        text, stats = format_modules(ROWS, "occupation_score", token_budget=40)
+        output = json.loads(text)
+        self.assertEqual([m["module"] for m in output["modules"]], ["Cloud Computing"])
+        self.assertEqual(output["omitted"], 1)
+        self.assertEqual((stats["modules"], stats["omitted"]), (1, 1))
+
+    def test_empty_rows(self):
+        text, stats = format_modules([])
+        self.assertEqual(json.loads(text), {"modules": [], "omitted": 0})
+        self.assertEqual(stats["tokens_saved"], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,85 @@
+import asyncio
+import contextvars
+import os
+import tempfile
+import unittest
+
+from utils.tracing import (
+    NO_SPAN, JsonlSpanExporter, Span, Trace, current_span, read_trace, start_span, summarize_trace, traced, use_span
+)
+
+
+@traced("supabase")
+def fetch_rows():
+    return [1, 2, 3]
+
+
+class TestTracing(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "traces.jsonl")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def run_traced(self, fn):
+        """Run `fn(root)` under a root span in a fresh context, like start_trace."""
+        def run():
+            root = Span(Trace(JsonlSpanExporter(self.path)), "study_plan", "run")
+            use_span(root)
+            fn(root)
+            root.end()
+            return root
+        return contextvars.Context().run(run)
+
+    def test_spans_nest_under_the_current_span_and_tasks(self):
+        async def tool():
+            with start_span("query", "graphdb"):
+                pass
+
+        def run(root):
+            with start_span("turn", "agent") as turn:
+                asyncio.run(tool())
+                fetch_rows()
+            self.assertIs(current_span(), root)
+
+        root = self.run_traced(run)
+        spans = {span.name: span for span in root.trace.spans}
+        self.assertIs(spans["turn"].parent, root)
+        self.assertIs(spans["query"].parent, spans["turn"])
+        self.assertIs(spans["fetch_rows"].parent, spans["turn"])
+        self.assertEqual(spans["fetch_rows"].attributes["response_chars"], len("[1, 2, 3]"))
+
+    def test_trace_is_exported_when_the_root_ends(self):
+        def run(root):
+            with start_span("llm.messages", "llm") as span:
+                span.set(input_tokens=100, output_tokens=20)
+            with self.assertRaises(ValueError):
+                with start_span("llm.messages", "llm"):
+                    raise ValueError("overloaded")
+
+        root = self.run_traced(run)
+        spans = read_trace(self.path)
+        self.assertEqual(len(spans), 3)
+        self.assertEqual({span["traceId"] for span in spans}, {root.trace.trace_id})
+        self.assertEqual(sum(span["status"]["code"] == "ERROR" for span in spans), 1)
+
+        [row] = summarize_trace(spans)
+        self.assertEqual((row["kind"], row["name"], row["calls"], row["errors"]), ("llm", "llm.messages", 2, 1))
+        self.assertEqual((row["input_tokens"], row["output_tokens"]), (100, 20))
+        self.assertLessEqual(row["share"], 1.0)
+
+    def test_nothing_is_recorded_outside_of_a_trace(self):
+        def run():
+            self.assertIs(start_span("query", "graphdb"), NO_SPAN)
+            self.assertEqual(fetch_rows(), [1, 2, 3])
+            with start_span("query", "graphdb") as span:
+                span.set(status_code=200)
+
+        contextvars.Context().run(run)
+        self.assertFalse(os.path.exists(self.path))
+
+
+if __name__ == "__main__":
+    unittest.main()
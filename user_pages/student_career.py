@@ -1,14 +1,9 @@
 import streamlit as st
-from utils.graphdb_methods import GraphDbMethods
+from utils.graphdb_methods import get_graphdb_methods
 from utils.supabase_methods import get_student, update_student, create_student
 from utils.models import Student
+from utils.plan_solver import MANDATORY_MODULES
 
-MANDATORY_MODULES = [
-    "Alignment of Business and IT",
-    "Business Intelligence",
-    "Business Process Management",
-    "Strategic Business Innovation"
-]
 MAX_MODULES = 10  # Maximum allowed modules
 MAX_FREE_MODULES = 6  # Maximum free modules (36 credits)
 
@@ -22,7 +17,7 @@ new_account = False
 if student is None:
     new_account = True
     student = Student.new_student()
-graphdb_methods = GraphDbMethods()
+graphdb_methods = get_graphdb_methods()
 courses = graphdb_methods.get_filtered_modules()
 occupations = graphdb_methods.get_occupations()
 professors = graphdb_methods.get_professors()
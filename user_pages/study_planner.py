@@ -1,6 +1,8 @@
-import asyncio
 import streamlit as st
-from assistant.agent_workflow import execute_agent_workflow
+from assistant.agent_workflow import AGENT_MODE, DIRECT_MODE, STRATEGY_MESSAGES
+from assistant.plan_jobs import submit_plan_job
+from utils.job_queue import get_job_queue, QUEUED, RUNNING, DONE, FAILED
+from utils.llm_scheduler import get_llm_scheduler
 from utils.supabase_methods import get_student, has_work_experience, get_work_experience
 
 student = get_student()
@@ -9,9 +11,11 @@ has_past_experience = has_work_experience()
 
 st.title("Get a Study Plan")
 
-# Track current output and spinner control
-if "study_plan_output" not in st.session_state:
-    st.session_state.study_plan_output = ""
+# Track the plan job and button control
+if "plan_job_id" not in st.session_state:
+    # The last plan of the student, even if it was requested in another session
+    latest_job = get_job_queue().latest(student.id)
+    st.session_state.plan_job_id = latest_job["id"] if latest_job else None
 if "should_generate" not in st.session_state:
     st.session_state.should_generate = False
 if "retrieval_strategy" not in st.session_state:
@@ -19,46 +23,78 @@ if "retrieval_strategy" not in st.session_state:
 if "user_msg" not in st.session_state:
     st.session_state.user_msg = ""
 
+quick_plan = st.toggle(
+    "Quick plan",
+    help="Skip the explanation of the suggested modules and go straight to the study plan.",
+)
+
 # Define columns for button row
 col1, col2, col3, col4 = st.columns(4)
 
 with col1:
     if st.button("Past Experience", disabled=not has_past_experience, help="You must add work experience to use this option."):
         st.session_state.retrieval_strategy = "past_experience"
-        st.session_state.user_msg = "Suggest me some modules based on my past work experiences."
+        st.session_state.user_msg = STRATEGY_MESSAGES["past_experience"]
         st.session_state.should_generate = True
 
 with col2:
     if st.button("Future Goals"):
         st.session_state.retrieval_strategy = "future_goals"
-        st.session_state.user_msg = "Suggest me some modules based on my future work goals."
+        st.session_state.user_msg = STRATEGY_MESSAGES["future_goals"]
         st.session_state.should_generate = True
 
 with col3:
     if st.button("Preferences"):
         st.session_state.retrieval_strategy = "preferences"
-        st.session_state.user_msg = "Suggest me some modules based on my preferences."
+        st.session_state.user_msg = STRATEGY_MESSAGES["preferences"]
         st.session_state.should_generate = True
 
 with col4:
     if st.button("Balanced"):
         st.session_state.retrieval_strategy = "balanced"
-        st.session_state.user_msg = "Suggest me some modules based on a balanced approach of past work, future goals, and preferences."
+        st.session_state.user_msg = STRATEGY_MESSAGES["balanced"]
         st.session_state.should_generate = True
 
-# If a button was clicked, show spinner and generate plan
+# If a button was clicked, generate the plan in the background
 if st.session_state.should_generate:
-    with st.spinner("Generating study plan... please wait..."):
-        content = asyncio.run(
-            execute_agent_workflow(
-                user_msg=st.session_state.user_msg,
-                retrieval_strategy=st.session_state.retrieval_strategy,
-            )
-        )
-    st.session_state.study_plan_output = content
+    st.session_state.plan_job_id = submit_plan_job(
+        student,
+        work_experiences,
+        user_msg=st.session_state.user_msg,
+        retrieval_strategy=st.session_state.retrieval_strategy,
+        mode=DIRECT_MODE if quick_plan else AGENT_MODE,
+    )
     st.session_state.should_generate = False
 
-if st.session_state.study_plan_output:
+
+@st.fragment(run_every=1)
+def plan_job_progress(job_id):
+    """Show the progress of a queued or running plan job, and rerun the page once it finished."""
+    job = get_job_queue().get(job_id)
+    if job is None or job["status"] not in (QUEUED, RUNNING):
+        st.rerun()
+    if job["status"] == QUEUED:
+        st.info(f"Waiting for a free planner... (position {get_job_queue().position(job_id)} in the queue)")
+        return
+    progress = job["progress"] or {}
+    label = progress.get("label", "Generating study plan... please wait...")
+    # Under load the LLM calls of the plan wait for their turn
+    llm_position = get_llm_scheduler().position(student.id)
+    if llm_position:
+        label = f"Waiting for the language model... (position {llm_position} in the queue)"
+    with st.status(label, expanded=True):
+        st.markdown(progress.get("draft", ""))
+
+
+job = get_job_queue().get(st.session_state.plan_job_id) if st.session_state.plan_job_id else None
+
+if job is not None and job["status"] in (QUEUED, RUNNING):
+    plan_job_progress(job["id"])
+
+elif job is not None and job["status"] == FAILED:
+    st.error("Study plan generation failed: " + str(job["error"]))
+
+elif job is not None and job["status"] == DONE and job["result"]["content"]:
     st.markdown("---")
     strategy_labels = {
         "past_experience": "Past Experience-Based Plan",
@@ -67,6 +103,11 @@ if st.session_state.study_plan_output:
         "balanced": "Balanced Plan (Past Experience, Goals, Preferences)"
     }
 
-    strategy_name = strategy_labels.get(st.session_state.retrieval_strategy, "Study Plan")
+    strategy_name = strategy_labels.get(job["result"]["retrieval_strategy"], "Study Plan")
     st.success(f"{strategy_name} generated successfully!")
-    st.write(st.session_state.study_plan_output)
\ No newline at end of file
+    st.write(job["result"]["content"])
+
+    if job["result"].get("timing"):
+        with st.expander("Where the time went"):
+            st.caption(f"Trace {job['result']['trace_id']}")
+            st.dataframe(job["result"]["timing"], hide_index=True)
@@ -1,7 +1,7 @@
 from datetime import date
 import streamlit as st
 
-from utils.graphdb_methods import GraphDbMethods
+from utils.graphdb_methods import get_graphdb_methods
 from utils.supabase_methods import (
     get_work_experience,
     add_work_experience,
@@ -10,7 +10,7 @@ from utils.supabase_methods import (
 
 st.title("Working Career Details")
 work_experiences = get_work_experience()
-graphdb_methods = GraphDbMethods()
+graphdb_methods = get_graphdb_methods()
 occupations = graphdb_methods.get_occupations()
 with st.expander("Add Work Experience"):
     current_occ = st.checkbox("I currently work here")
@@ -51,5 +51,6 @@ for we in work_experiences:
         cols[2].write("Part-Time" if we["part_time"] else "Full-Time")
         cols[3].write(we["start_date"])
         cols[4].write(we["end_date"] if not we["current_work"] else "Present")
-        if cols[5].button("Delete", key=we["id"]):
-            delete_work_experience(we["id"])
+        # A row still being saved has its optimistic "pending-<uuid>" id, which does not exist in Supabase yet
+        cols[5].button("Delete", key=we["id"], on_click=delete_work_experience, args=(we["id"],),
+                       disabled=we.get("pending", False))
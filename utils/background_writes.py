@@ -0,0 +1,130 @@
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import httpx
+import streamlit as st
+
+DEFAULT_WORKERS = 2
+DEFAULT_MAX_RETRIES = 3
+# Network errors and timeouts of the Supabase client; API errors (e.g. constraint violations) are final
+RETRY_EXCEPTIONS = (httpx.TransportError, ConnectionError, TimeoutError)
+
+_writer = None
+_writer_lock = threading.Lock()
+
+
+class BackgroundWriter:
+    """
+    Runs blocking writes (Supabase inserts, updates and deletes) off the
+    Streamlit script thread.
+
+    The writes of one owner run one at a time in the order they were
+    submitted, so a delete never overtakes the insert it undoes; writes of
+    different owners run concurrently. Writes failing with one of the
+    `retry_on` exceptions are retried with a jittered exponential backoff.
+    """
+
+    def __init__(self, max_workers=DEFAULT_WORKERS, max_retries=DEFAULT_MAX_RETRIES, base_delay=0.5, max_delay=8.0,
+                 retry_on=RETRY_EXCEPTIONS):
+        """
+        Initialize the writer.
+
+        Args:
+            max_workers (int): Maximum number of owners written for at the same time.
+            max_retries (int): Retries of a write failing with a `retry_on` exception.
+            base_delay (float): Maximum backoff of the first retry in seconds, doubled on each retry.
+            max_delay (float): Maximum backoff in seconds.
+            retry_on (tuple): Exception types of transient failures.
+        """
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.retry_on = retry_on
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="write")
+        self._lock = threading.Lock()
+        # Owner -> FIFO of (write, on_done, future), the first one running
+        self._queues = {}
+
+    def submit(self, owner, write, on_done=None):
+        """
+        Queue `write()` after the pending writes of `owner`.
+
+        Args:
+            owner (str): Writes of the same owner run in submission order.
+            write (callable): The blocking write.
+            on_done (callable): Called with the final exception, or None on
+                success, from the writer thread.
+
+        Returns:
+            Future: Result of `write()`.
+        """
+        future = Future()
+        with self._lock:
+            queue = self._queues.setdefault(owner, deque())
+            queue.append((write, on_done, future))
+            if len(queue) == 1:
+                self._executor.submit(self._drain, owner)
+        return future
+
+    def pending(self, owner):
+        """Number of writes of `owner` not finished yet."""
+        with self._lock:
+            return len(self._queues.get(owner, ()))
+
+    def shutdown(self, wait=True):
+        self._executor.shutdown(wait=wait)
+
+    def _drain(self, owner):
+        while True:
+            with self._lock:
+                write, on_done, future = self._queues[owner][0]
+            self._run(write, on_done, future)
+            with self._lock:
+                queue = self._queues[owner]
+                queue.popleft()
+                if not queue:
+                    del self._queues[owner]
+                    return
+
+    def _run(self, write, on_done, future):
+        error, result = None, None
+        for attempt in range(self.max_retries + 1):
+            try:
+                result = write()
+                error = None
+                break
+            except self.retry_on as e:
+                error = e
+                if attempt < self.max_retries:
+                    delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+                    print(f"⏳ Write failed ({e}), retry {attempt + 1} in {delay:.1f}s")
+                    time.sleep(delay)
+            except Exception as e:
+                error = e
+                break
+        if on_done is not None:
+            try:
+                on_done(error)
+            except Exception as e:
+                print(f"Write callback failed: {e}")
+        if error is None:
+            future.set_result(result)
+        else:
+            print(f"Write failed: {error}")
+            future.set_exception(error)
+
+
+def get_background_writer():
+    """Return the process-wide background writer, configured by WRITE_WORKERS and WRITE_MAX_RETRIES."""
+    global _writer
+    if _writer is None:
+        with _writer_lock:
+            if _writer is None:
+                _writer = BackgroundWriter(
+                    int(st.secrets.get("WRITE_WORKERS", DEFAULT_WORKERS)),
+                    int(st.secrets.get("WRITE_MAX_RETRIES", DEFAULT_MAX_RETRIES)),
+                )
+    return _writer
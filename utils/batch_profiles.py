@@ -0,0 +1,74 @@
+import csv
+import json
+import os
+
+from utils.models import Student
+
+LIST_FIELDS = ("desired_jobs", "taken_courses", "desired_lecturers", "available_days")
+BOOLEAN_FIELDS = ("oral_assessment", "project_work")
+LIST_SEPARATOR = ";"
+
+
+def load_student_profiles(path):
+    """
+    Read the student profiles of a batch from a JSON or CSV file.
+
+    JSON files hold a list of objects with the Student fields, plus optional
+    "work_experiences" (rows as stored in Supabase) and "retrieval_strategy".
+    CSV files have one column per field: list fields are separated by ";",
+    booleans are true/false, yes/no or 1/0, and "work_experiences" is a JSON
+    list.
+
+    Returns:
+        list: One dict per student with its "student" (Student),
+        "work_experiences" (list) and "retrieval_strategy" (str or None).
+    """
+    if os.path.splitext(path)[1].lower() == ".csv":
+        with open(path, newline="", encoding="utf-8") as f:
+            rows = [_parse_csv_row(row) for row in csv.DictReader(f)]
+    else:
+        with open(path, encoding="utf-8") as f:
+            rows = json.load(f)
+
+    profiles = []
+    for row in rows:
+        student = Student.from_dict(row)
+        if not student.id:
+            raise ValueError(f"Student profile without id: {row}")
+        profiles.append({
+            "student": student,
+            "work_experiences": row.get("work_experiences") or [],
+            "retrieval_strategy": row.get("retrieval_strategy") or None,
+        })
+    return profiles
+
+
+def _parse_csv_row(row):
+    data = {key.strip(): (value or "").strip() for key, value in row.items() if key}
+    for field in LIST_FIELDS:
+        if field in data:
+            data[field] = [item.strip() for item in data[field].split(LIST_SEPARATOR) if item.strip()]
+    for field in BOOLEAN_FIELDS:
+        if field in data:
+            data[field] = data[field].lower() in ("true", "yes", "1")
+    if data.get("expected_semesters"):
+        data["expected_semesters"] = int(data["expected_semesters"])
+    data["work_experiences"] = json.loads(data["work_experiences"]) if data.get("work_experiences") else []
+    return data
+
+
+def completed_student_ids(results_path):
+    """Ids of the students with a successful result in a results file (JSON lines), for resuming a batch."""
+    completed = set()
+    if not os.path.exists(results_path):
+        return completed
+    with open(results_path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                result = json.loads(line)
+            except ValueError:
+                # Line cut short by an interrupted run
+                continue
+            if result.get("status") == "done":
+                completed.add(str(result["student_id"]))
+    return completed
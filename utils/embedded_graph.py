@@ -0,0 +1,351 @@
+import threading
+
+import streamlit as st
+from rdflib import Graph, Literal, Namespace
+from rdflib.namespace import RDF
+from rdflib.util import guess_format
+
+from utils.graphdb_methods import GraphDbMethods, AsyncGraphDbMethods, THESIS_MODULES, TYPED_SESSION_FIELDS
+from utils.timetable import day_index
+
+EX = Namespace("https://imodulebuddy.org/ontology#")
+
+# Ontology plus the triples generated by esco/graph.py (relative to the app's working directory)
+DEFAULT_GRAPH_FILES = ["ModuleSelection.ttl", "esco/imodulebuddy_graph.nt"]
+
+_graph = None
+_graph_lock = threading.Lock()
+
+
+class EmbeddedGraph:
+    """
+    Read-only, in-memory triple store.
+
+    Every RDF term is interned once and referred to by an integer id; triples
+    are indexed subject -> predicate -> objects and predicate -> object -> subjects.
+    """
+
+    def __init__(self):
+        """Initialize an empty store."""
+        self._ids = {}
+        self._terms = []
+        self._spo = {}
+        self._pos = {}
+
+    @classmethod
+    def from_rdflib(cls, graph):
+        """Build the store from an rdflib graph."""
+        store = cls()
+        for s, p, o in graph:
+            store.add(s, p, o)
+        return store
+
+    @classmethod
+    def from_files(cls, paths):
+        """Build the store from RDF files (Turtle, N-Triples, ...)."""
+        graph = Graph()
+        for path in paths:
+            graph.parse(path, format=guess_format(path))
+        return cls.from_rdflib(graph)
+
+    def __len__(self):
+        return sum(len(objects) for predicates in self._spo.values() for objects in predicates.values())
+
+    def _intern(self, term):
+        term_id = self._ids.get(term)
+        if term_id is None:
+            term_id = len(self._terms)
+            self._ids[term] = term_id
+            self._terms.append(term)
+        return term_id
+
+    def add(self, s, p, o):
+        """Add a triple of rdflib terms."""
+        s, p, o = self._intern(s), self._intern(p), self._intern(o)
+        self._spo.setdefault(s, {}).setdefault(p, []).append(o)
+        self._pos.setdefault(p, {}).setdefault(o, []).append(s)
+
+    def id(self, term):
+        """Return the id of an rdflib term, or None if it is not in the store."""
+        return self._ids.get(term)
+
+    def term(self, term_id):
+        """Return the rdflib term of an id."""
+        return self._terms[term_id]
+
+    def objects(self, s, p):
+        """Ids of the objects of (s, p, ?), with s an id and p an rdflib term."""
+        p = self._ids.get(p)
+        return self._spo.get(s, {}).get(p, []) if p is not None else []
+
+    def subjects(self, p, o):
+        """Ids of the subjects of (?, p, o), with p and o rdflib terms."""
+        p, o = self._ids.get(p), self._ids.get(o)
+        if p is None or o is None:
+            return []
+        return self._pos.get(p, {}).get(o, [])
+
+    def values(self, s, p):
+        """Python values of the objects of (s, p, ?)."""
+        return [self._terms[o].toPython() for o in self.objects(s, p)]
+
+    def value(self, s, p):
+        """Python value of the first object of (s, p, ?), or None."""
+        objects = self.objects(s, p)
+        return self._terms[objects[0]].toPython() if objects else None
+
+    def instances(self, cls):
+        """Ids of the subjects typed with `cls`."""
+        return self.subjects(RDF.type, cls)
+
+    def subjects_with_value(self, p, values, cls=None):
+        """Ids of the subjects of (?, p, "v") for every plain literal v in `values`, optionally typed with `cls`."""
+        subjects = [s for v in dict.fromkeys(values) for s in self.subjects(p, Literal(v))]
+        if cls is None:
+            return subjects
+        cls = self._ids.get(cls)
+        return [s for s in subjects if cls in self._spo[s].get(self._ids.get(RDF.type), [])]
+
+
+def get_embedded_graph():
+    """Return the process-wide embedded graph, loading it on first use."""
+    global _graph
+    if _graph is None:
+        with _graph_lock:
+            if _graph is None:
+                paths = list(st.secrets.get("EMBEDDED_GRAPH_FILES", DEFAULT_GRAPH_FILES))
+                _graph = EmbeddedGraph.from_files(paths)
+    return _graph
+
+
+class _EmbeddedQueries:
+    """
+    Answers the read queries of GraphDbMethods from the embedded graph.
+
+    Results have the same shape as the SPARQL ones. Methods not overridden
+    here (updates, for instance) still go to GraphDB.
+    """
+
+    def _init_graph(self, graph=None):
+        self.graph = graph if graph is not None else get_embedded_graph()
+
+    def _modules(self):
+        """(module id, title) pairs of every module."""
+        return [(m, self.graph.value(m, EX.moduleTitle)) for m in self.graph.instances(EX.Module)]
+
+    def _schedules(self, module):
+        return self.graph.objects(module, EX.hasSchedule)
+
+    def _surnames(self, module):
+        return {
+            surname
+            for ts in self._schedules(module)
+            for prof in self.graph.objects(ts, EX.taughtBy)
+            for surname in self.graph.values(prof, EX.professorSurname)
+        }
+
+    def _days(self, module):
+        """Day-of-week indices on which the module is taught."""
+        return {day for ts in self._schedules(module) for day in self.graph.values(ts, EX.dayOfWeek)}
+
+    # ----------------------------- #
+    # Cache & graph version
+    # ----------------------------- #
+
+    def get_graph_version(self):
+        version = self.graph.id(EX.GraphMetadata)
+        return self._resolved(self.graph.value(version, EX.graphVersion) if version is not None else None)
+
+    # ----------------------------- #
+    # Data retrieval methods
+    # ----------------------------- #
+
+    def get_modules(self):
+        titles = [title for _, title in self._modules() if title is not None]
+        return self._resolved(sorted(titles))
+
+    def get_occupations(self):
+        occupations = [
+            self.graph.value(o, EX.occupation) for o in self.graph.instances(EX.Occupation)
+        ]
+        return self._resolved(sorted(o for o in occupations if o is not None))
+
+    def get_professors(self):
+        names = set()
+        for p in self.graph.instances(EX.Professor):
+            for first in self.graph.values(p, EX.professorName):
+                for last in self.graph.values(p, EX.professorSurname):
+                    names.add(f"{first} {last}")
+        return self._resolved(sorted(names))
+
+    def get_module_overview(self):
+        return self._resolved([
+            {
+                "module": {"module_title": title, "module_type": module_type},
+                "score": 0,
+            }
+            for m, title in self._modules()
+            for module_type in self.graph.values(m, EX.moduleType)
+            if title is not None
+        ])
+
+    def get_modules_by_occupation(self, occupations, taken_modules=None):
+        if isinstance(occupations, str):
+            occupations = [occupations]
+        taken = set(taken_modules or [])
+        rows = {}
+        for occupation_name in occupations:
+            for o in self.graph.subjects_with_value(EX.occupation, [occupation_name], EX.Occupation):
+                for skill in self.graph.objects(o, EX.requiresSkill):
+                    skill_titles = self.graph.values(skill, EX.title)
+                    if not skill_titles:
+                        continue
+                    for lo in self.graph.subjects(EX.hasSkill, self.graph.term(skill)):
+                        lo_texts = self.graph.values(lo, EX.learningOutcome)
+                        if not lo_texts:
+                            continue
+                        for m in self.graph.subjects(EX.hasLearningOutcome, self.graph.term(lo)):
+                            title = self.graph.value(m, EX.moduleTitle)
+                            if title is None or title in taken:
+                                continue
+                            for module_type in self.graph.values(m, EX.moduleType):
+                                row = rows.setdefault((title, module_type, occupation_name), {
+                                    "skills": set(), "learning_outcomes": [], "skill_titles": [],
+                                })
+                                row["skills"].add(skill)
+                                for text in lo_texts:
+                                    if text not in row["learning_outcomes"]:
+                                        row["learning_outcomes"].append(text)
+                                for skill_title in skill_titles:
+                                    if skill_title not in row["skill_titles"]:
+                                        row["skill_titles"].append(skill_title)
+
+        ordered = sorted(rows.items(), key=lambda item: (item[0][2], -len(item[1]["skills"]), item[0][0]))
+        return self._resolved([
+            {
+                "module": {"module_title": title, "module_type": module_type},
+                "occupation": {"occupation": occupation_name},
+                "shared_skills": len(row["skills"]),
+                "supporting_learning_outcomes": row["learning_outcomes"],
+                "supported_skills": row["skill_titles"],
+            }
+            for (title, module_type, occupation_name), row in ordered
+        ])
+
+    def get_teaching_sessions_by_modules(self, modules, taken_modules=None):
+        taken = set(taken_modules or [])
+        modules = [m for m in modules if m not in taken]
+        fields = {
+            "ay": EX.ay, "day": EX.day, "group_name": EX.groupName, "location": EX.location,
+            "periodicity": EX.periodicity, "semester": EX.semester, "time": EX.time,
+        }
+        module_sessions = {}
+        for m in self.graph.subjects_with_value(EX.moduleTitle, modules, EX.Module):
+            title = self.graph.value(m, EX.moduleTitle)
+            for ts in self._schedules(m):
+                session = {name: self.graph.value(ts, predicate) for name, predicate in fields.items()}
+                if any(value is None for value in session.values()):
+                    continue
+                module_sessions.setdefault(title, {
+                    "module_title": title,
+                    "module_type": self.graph.value(m, EX.moduleType),
+                    "module_description": self.graph.value(m, EX.moduleDescription) or "",
+                    "teaching_session": [],
+                })
+                typed = {name: self.graph.value(ts, EX[predicate]) for name, predicate in TYPED_SESSION_FIELDS.items()}
+                module_sessions[title]["teaching_session"].append(
+                    {**{name: str(value) for name, value in session.items()}, **typed}
+                )
+        return self._resolved([module_sessions[title] for title in sorted(module_sessions)])
+
+    def get_extra_modules(self):
+        return self._resolved([
+            {"module_title": title, "module_type": module_type}
+            for m, title in self._modules()
+            if title in THESIS_MODULES
+            for module_type in self.graph.values(m, EX.moduleType)
+        ])
+
+    # ----------------------------- #
+    # Filters & Matching
+    # ----------------------------- #
+
+    def get_module_features(self, module_titles, lecturer=None, day=None, assessment_type=None):
+        features = {
+            title: {
+                "lecturer": False,
+                "day": False,
+                "assessment_type": False,
+                "project_work": False,
+                "oral_assessment": False,
+            }
+            for title in module_titles
+        }
+        for m in self.graph.subjects_with_value(EX.moduleTitle, module_titles, EX.Module):
+            row = features[self.graph.value(m, EX.moduleTitle)]
+            if lecturer:
+                row["lecturer"] |= any(s.lower() in lecturer.lower() for s in self._surnames(m))
+            if day:
+                row["day"] |= day_index(day) in self._days(m)
+            if assessment_type:
+                row["assessment_type"] |= any(
+                    str(t).lower() == assessment_type.lower() for t in self.graph.values(m, EX.assessmentType)
+                )
+            row["project_work"] |= True in self.graph.values(m, EX.projectWork)
+            row["oral_assessment"] |= True in self.graph.values(m, EX.oralAssessment)
+        return self._resolved(features)
+
+    def get_modules_by_preferences(
+            self,
+            taken_modules,
+            desired_lecturers,
+            available_days,
+            assessment_type,
+            project_work,
+            oral_assessment
+    ):
+        taken = set(taken_modules or [])
+        assessment_types = set()
+        if assessment_type:
+            assessment_types = {assessment_type.lower()}
+            if assessment_type.lower() == "individual_and_group":
+                assessment_types = {"individual", "group", "individual_and_group"}
+
+        wanted_days = {day_index(d) for d in available_days or []} - {None}
+        scored = []
+        for m, title in self._modules():
+            if title is None or title in taken:
+                continue
+            surnames = [s.lower() for s in self._surnames(m)]
+            module_assessments = {str(t).lower() for t in self.graph.values(m, EX.assessmentType)}
+            score = (
+                int(bool(wanted_days & self._days(m)))
+                + int(any(s in lec.lower() for lec in desired_lecturers or [] for s in surnames))
+                + int(bool(module_assessments & assessment_types))
+                + int(project_work in self.graph.values(m, EX.projectWork))
+                + int(oral_assessment in self.graph.values(m, EX.oralAssessment))
+            )
+            for module_type in self.graph.values(m, EX.moduleType):
+                scored.append({
+                    "module": {"module_title": title, "module_type": module_type},
+                    "preference_score": score,
+                })
+        return self._resolved(sorted(scored, key=lambda x: x["preference_score"], reverse=True))
+
+
+class EmbeddedGraphDbMethods(_EmbeddedQueries, GraphDbMethods):
+    """GraphDbMethods answering the read queries from the embedded graph."""
+
+    def __init__(self, graph=None):
+        """Initialize the accessor on the process-wide embedded graph (or on `graph`)."""
+        super().__init__()
+        self._init_graph(graph)
+
+
+class AsyncEmbeddedGraphDbMethods(_EmbeddedQueries, AsyncGraphDbMethods):
+    """AsyncGraphDbMethods answering the read queries from the embedded graph."""
+
+    def __init__(self, graph=None):
+        """Initialize the accessor on the process-wide embedded graph (or on `graph`)."""
+        super().__init__()
+        self._init_graph(graph)
@@ -1,45 +1,112 @@
+import inspect
+
 import streamlit as st
-from SPARQLWrapper import SPARQLWrapper, JSON
-import re
 
-class GraphDbMethods:
-    def __init__(self):
-        """Initialize the connection to the GraphDB repository."""
-        self.endpoint = st.secrets["GRAPHDB_ENDPOINT"]
-        self.username = st.secrets["GRAPHDB_USERNAME"]
-        self.password = st.secrets["GRAPHDB_PASSWORD"]
-
-        self.sparql = SPARQLWrapper(self.endpoint)
-        self.sparql.setCredentials(self.username, self.password)
-        self.sparql.setReturnFormat(JSON)
-
-        # Updated prefixes to match your data loading script and request
-        self.prefixes = """
-            PREFIX ex: <https://imodulebuddy.org/ontology#>
-            PREFIX rdf: <http://www.w3.org/1999/02/22-rdf-syntax-ns#>
-            PREFIX rdfs: <http://www.w3.org/2000/01/rdf-schema#>
-        """
+from utils.query_cache import cached_query, get_query_cache
+from utils.sparql_client import get_sparql_client, get_async_sparql_client
+from utils.timetable import day_index
+
+# Typed schedule values written by esco/graph.py, returned as ints with each teaching session
+TYPED_SESSION_FIELDS = {
+    "day_of_week": "dayOfWeek",
+    "start_minute": "startMinute",
+    "end_minute": "endMinute",
+    "semester_index": "semesterIndex",
+    "ay_start_year": "ayStartYear",
+}
+
+# Separator used by GROUP_CONCAT aggregates; learning outcome texts never contain it.
+GROUP_SEPARATOR = "|"
+
+THESIS_MODULES = (
+    "Research Methods in Information Systems",
+    "Master Thesis",
+    "Master Thesis Proposal",
+)
+
+
+def sparql_literal(value):
+    """Render a Python string as a quoted SPARQL string literal."""
+    escaped = (
+        str(value)
+        .replace("\\", "\\\\")
+        .replace('"', '\\"')
+        .replace("\n", "\\n")
+        .replace("\r", "\\r")
+    )
+    return f'"{escaped}"'
+
+
+class _GraphDbQueries:
+    """
+    Query methods shared by the blocking and the asyncio GraphDB accessors.
+
+    Every method builds its SPARQL and hands it to `_select` together with a
+    parser for the result bindings. GraphDbMethods returns the parsed result
+    directly, AsyncGraphDbMethods returns a coroutine resolving to it.
+    """
+
+    # Updated prefixes to match your data loading script and request
+    prefixes = """
+        PREFIX ex: <https://imodulebuddy.org/ontology#>
+        PREFIX rdf: <http://www.w3.org/1999/02/22-rdf-syntax-ns#>
+        PREFIX rdfs: <http://www.w3.org/2000/01/rdf-schema#>
+    """
 
     # ----------------------------- #
-    # Generic query helpers
+    # Execution hooks
     # ----------------------------- #
-    def query(self, query_str):
-        """Execute a SPARQL SELECT query."""
-        self.sparql.setQuery(self.prefixes + query_str)
-        results = self.sparql.query().convert()
-        return results["results"]["bindings"]
+    def _select(self, query_str, parse, on_error=None):
+        """Run a SELECT query and return `parse(bindings)`, or `on_error(exception)` if it fails."""
+        raise NotImplementedError
 
-    def update(self, query_str):
-        """Execute a SPARQL UPDATE query (INSERT/DELETE)."""
-        self.sparql.setMethod("POST")
-        self.sparql.setQuery(self.prefixes + query_str)
-        self.sparql.query()
-        self.sparql.setMethod("GET")  # Reset
+    def _then(self, result, fn):
+        """Apply `fn` to the result of another query method."""
+        raise NotImplementedError
+
+    def _resolved(self, value):
+        """Wrap a value computed without querying like a query result."""
+        raise NotImplementedError
+
+    # ----------------------------- #
+    # Cache & graph version
+    # ----------------------------- #
+
+    def get_graph_version(self):
+        """Return the version stamp written by esco/graph.py, or None if the graph has none."""
+        query = """
+        SELECT ?version
+        WHERE {
+          ex:GraphMetadata ex:graphVersion ?version .
+        }
+        """
+        return self._select(query, lambda results: results[0]["version"]["value"] if results else None)
+
+    def cache_stats(self):
+        """Return the hit/miss counters of the reference data cache."""
+        return self.cache.stats()
+
+    def invalidate_cache(self):
+        """Drop every cached query result."""
+        self.cache.invalidate()
+
+    def current_graph_version(self):
+        """Return the graph version, re-reading the stamp only when the cache's check interval has elapsed."""
+        cache = self.cache
+
+        def refresh(version):
+            cache.sync_version(version)
+            return version
+
+        if cache.version_check_due():
+            return self._then(self.get_graph_version(), refresh)
+        return self._resolved(cache.version)
 
     # ----------------------------- #
     # Data retrieval methods
     # ----------------------------- #
 
+    @cached_query(ttl=3600)
     def get_modules(self):
         query = """
         SELECT ?module_title
@@ -49,9 +116,9 @@ class GraphDbMethods:
         }
         ORDER BY ?module_title
         """
-        results = self.query(query)
-        return [r["module_title"]["value"] for r in results]
+        return self._select(query, lambda results: [r["module_title"]["value"] for r in results])
 
+    @cached_query(ttl=3600)
     def get_occupations(self):
         query = """
         SELECT ?occupation
@@ -61,9 +128,9 @@ class GraphDbMethods:
         }
         ORDER BY ?occupation
         """
-        results = self.query(query)
-        return [r["occupation"]["value"] for r in results]
+        return self._select(query, lambda results: [r["occupation"]["value"] for r in results])
 
+    @cached_query(ttl=1800)
     def get_professors(self):
         query = """
         SELECT DISTINCT ?fullname
@@ -75,9 +142,9 @@ class GraphDbMethods:
         }
         ORDER BY ?fullname
         """
-        results = self.query(query)
-        return [r["fullname"]["value"] for r in results]
+        return self._select(query, lambda results: [r["fullname"]["value"] for r in results])
 
+    @cached_query(ttl=1800)
     def get_module_overview(self):
         query = """
         SELECT ?title ?type
@@ -87,8 +154,7 @@ class GraphDbMethods:
              ex:moduleType ?type .
         }
         """
-        results = self.query(query)
-        return [
+        return self._select(query, lambda results: [
             {
                 "module": {
                     "module_title": r["title"]["value"],
@@ -97,48 +163,117 @@ class GraphDbMethods:
                 "score": 0,
             }
             for r in results
-        ]
+        ])
+
+    def get_modules_by_occupation(self, occupations, taken_modules=None):
+        """
+        Get the modules developing skills required by one or more occupations.
+
+        Args:
+            occupations (list | str): Occupation names (a single name is also accepted).
+            taken_modules (list): Module titles to leave out of the results.
+
+        Returns:
+            list: One row per (module, occupation) pair with the learning outcomes
+            and skill titles linking them, strongest matches first. Rows read
+            from the relevance index also carry the essential/optional skill split.
+        """
+        from utils.relevance_index import get_relevance_index
+
+        if isinstance(occupations, str):
+            occupations = [occupations]
+        if not occupations:
+            return self._resolved([])
+
+        # Without an index, the graph version is not worth fetching
+        if get_relevance_index() is None:
+            return self._query_modules_by_occupation(occupations, taken_modules)
+
+        # The precomputed index is only trusted if it was built from the current graph, or once rebuilt from it
+        def read_index(version):
+            index = get_relevance_index(version)
+            if index is None or index.graph_version != version:
+                return self._query_modules_by_occupation(occupations, taken_modules)
+            return self._resolved(index.modules_by_occupation(occupations, taken_modules))
+
+        return self._then(self.current_graph_version(), read_index)
+
+    def _query_modules_by_occupation(self, occupations, taken_modules):
+
+        occupation_values = " ".join(sparql_literal(o) for o in occupations)
+        taken_modules_filter = ""
+        if taken_modules:
+            taken_values = ", ".join(sparql_literal(m) for m in taken_modules)
+            taken_modules_filter = f"FILTER(?module_title NOT IN ({taken_values}))"
 
-    def get_modules_by_occupation(self, occupation):
-        # This query now correctly joins through LearningOutcomes to find skills
         query = f"""
-        SELECT ?module_title ?skill_title ?occupation_name
+        SELECT ?module_title ?module_type ?occupation_name
+               (COUNT(DISTINCT ?skill) AS ?shared_skills)
+               (GROUP_CONCAT(DISTINCT ?lo_text; separator="{GROUP_SEPARATOR}") AS ?learning_outcomes)
+               (GROUP_CONCAT(DISTINCT ?skill_title; separator="{GROUP_SEPARATOR}") AS ?skills)
         WHERE {{
+          VALUES ?occupation_name {{ {occupation_values} }}
           ?o a ex:Occupation ;
-             ex:occupation "{occupation}" ;
+             ex:occupation ?occupation_name ;
              ex:requiresSkill ?skill .
           ?skill ex:title ?skill_title .
 
           ?m a ex:Module ;
              ex:moduleTitle ?module_title ;
+             ex:moduleType ?module_type ;
              ex:hasLearningOutcome ?lo .
-          ?lo ex:hasSkill ?skill .
-
-          ?o ex:occupation ?occupation_name .
+          ?lo ex:hasSkill ?skill ;
+              ex:learningOutcome ?lo_text .
+          {taken_modules_filter}
         }}
-        ORDER BY ?module_title
+        GROUP BY ?module_title ?module_type ?occupation_name
+        ORDER BY ?occupation_name DESC(?shared_skills) ?module_title
         """
-        results = self.query(query)
-        return [
+        return self._select(query, lambda results: [
             {
-                "module_title": r["module_title"]["value"],
-                "skill": r["skill_title"]["value"],
-                "occupation": r["occupation_name"]["value"],
+                "module": {
+                    "module_title": r["module_title"]["value"],
+                    "module_type": r["module_type"]["value"],
+                },
+                "occupation": {"occupation": r["occupation_name"]["value"]},
+                "shared_skills": int(r["shared_skills"]["value"]),
+                "supporting_learning_outcomes": r["learning_outcomes"]["value"].split(GROUP_SEPARATOR),
+                "supported_skills": r["skills"]["value"].split(GROUP_SEPARATOR),
             }
             for r in results
-        ]
+        ])
+
+    def get_teaching_sessions_by_modules(self, modules, taken_modules=None):
+        """
+        Get teaching sessions linked to modules.
+
+        Args:
+            modules (list): Module titles.
+            taken_modules (list): Module titles to leave out of the results.
 
-    def get_teaching_sessions_by_modules(self, modules):
-        """Get teaching sessions linked to modules."""
+        Returns:
+            list: One entry per module with its module_type, module_description
+            and teaching_session list, ordered by module title.
+        """
+        taken = set(taken_modules or [])
+        modules = [m for m in dict.fromkeys(modules) if m not in taken]
         if not modules:
-            return []
-        values = " ".join([f'"{m}"' for m in modules])
+            return self._resolved([])
+        values = " ".join(sparql_literal(m) for m in modules)
+        typed_variables = " ".join(f"?{name}" for name in TYPED_SESSION_FIELDS)
+        typed_patterns = "\n          ".join(
+            f"OPTIONAL {{{{ ?ts ex:{predicate} ?{name} . }}}}" for name, predicate in TYPED_SESSION_FIELDS.items()
+        )
         query = f"""
-        SELECT ?module_title ?ay ?day ?group ?location ?periodicity ?semester ?time
+        SELECT ?module_title ?module_type ?module_description ?ay ?day ?group ?location ?periodicity ?semester ?time
+               {typed_variables}
         WHERE {{
+          VALUES ?module_title {{ {values} }}
           ?m a ex:Module ;
              ex:moduleTitle ?module_title ;
+             ex:moduleType ?module_type ;
              ex:hasSchedule ?ts .
+          OPTIONAL {{ ?m ex:moduleDescription ?module_description . }}
           ?ts ex:ay ?ay ;
               ex:day ?day ;
               ex:groupName ?group ;
@@ -146,44 +281,47 @@ class GraphDbMethods:
               ex:periodicity ?periodicity ;
               ex:semester ?semester ;
               ex:time ?time .
-          FILTER(?module_title IN ({values}))
+          {typed_patterns}
         }}
         ORDER BY ?module_title
         """
-        results = self.query(query)
-
-        # Grouping results by module_title
-        module_sessions = {}
-        for r in results:
-            title = r["module_title"]["value"]
-            if title not in module_sessions:
-                module_sessions[title] = {
-                    "module_title": title,
-                    "teaching_session": []
-                }
 
-            module_sessions[title]["teaching_session"].append({
-                "ay": r["ay"]["value"],
-                "day": r["day"]["value"],
-                "group_name": r["group"]["value"],
-                "location": r["location"]["value"],
-                "periodicity": r["periodicity"]["value"],
-                "semester": r["semester"]["value"],
-                "time": r["time"]["value"],
-            })
+        def parse(results):
+            # Grouping results by module_title
+            module_sessions = {}
+            for r in results:
+                title = r["module_title"]["value"]
+                if title not in module_sessions:
+                    module_sessions[title] = {
+                        "module_title": title,
+                        "module_type": r["module_type"]["value"],
+                        "module_description": r.get("module_description", {}).get("value", ""),
+                        "teaching_session": []
+                    }
+
+                module_sessions[title]["teaching_session"].append({
+                    "ay": r["ay"]["value"],
+                    "day": r["day"]["value"],
+                    "group_name": r["group"]["value"],
+                    "location": r["location"]["value"],
+                    "periodicity": r["periodicity"]["value"],
+                    "semester": r["semester"]["value"],
+                    "time": r["time"]["value"],
+                    **{
+                        name: int(r[name]["value"]) if name in r else None
+                        for name in TYPED_SESSION_FIELDS
+                    },
+                })
+
+            return list(module_sessions.values())
 
-        return list(module_sessions.values())
+        return self._select(query, parse)
 
     def get_filtered_modules(self):
         """Return all modules excluding thesis-related ones."""
-        all_modules = self.get_modules()
-        exclude = {
-            "Research Methods in Information Systems",
-            "Master Thesis",
-            "Master Thesis Proposal",
-        }
-        return [m for m in all_modules if m not in exclude]
+        return self._then(self.get_modules(), lambda all_modules: [m for m in all_modules if m not in THESIS_MODULES])
 
+    @cached_query(ttl=3600)
     def get_extra_modules(self):
         """Return thesis-related modules."""
         query = """
@@ -199,75 +337,114 @@ class GraphDbMethods:
           ))
         }
         """
-        results = self.query(query)
-        return [
+        return self._select(query, lambda results: [
             {"module_title": r["module_title"]["value"], "module_type": r["type"]["value"]}
             for r in results
-        ]
+        ])
 
     # ----------------------------- #
     # Filters & Matching
     # ----------------------------- #
 
-    def matches_lecturer(self, module_title, lecturer):
-        query = f"""
-        ASK {{
-          ?m a ex:Module ;
-             ex:moduleTitle "{module_title}" ;
-             ex:hasSchedule ?ts .
-          ?ts ex:taughtBy ?prof .
-          ?prof ex:professorSurname ?surname .
-          FILTER(CONTAINS(LCASE("{lecturer}"), LCASE(?surname)))
-        }}
+    def get_module_features(self, module_titles, lecturer=None, day=None, assessment_type=None):
+        """
+        Evaluate every module filter for a list of modules in a single query.
+
+        Args:
+            module_titles (list): Titles of the modules to evaluate.
+            lecturer (str): Lecturer full name to match against the module professors.
+            day (str): Day on which the module should be taught.
+            assessment_type (str): Assessment type the module should have.
+
+        Returns:
+            dict: Module title -> {"lecturer", "day", "assessment_type",
+            "project_work", "oral_assessment"} booleans. Modules that are not
+            in the graph have every feature set to False.
         """
-        self.sparql.setQuery(self.prefixes + query)
-        return self.sparql.query().convert()["boolean"]
+        features = {
+            title: {
+                "lecturer": False,
+                "day": False,
+                "assessment_type": False,
+                "project_work": False,
+                "oral_assessment": False,
+            }
+            for title in module_titles
+        }
+        if not module_titles:
+            return self._resolved(features)
+
+        values = " ".join(sparql_literal(t) for t in module_titles)
+
+        lecturer_bind = "BIND(false AS ?lecturer_match)"
+        if lecturer:
+            lecturer_bind = f"""BIND(EXISTS {{
+                ?m ex:hasSchedule ?lecturer_ts .
+                ?lecturer_ts ex:taughtBy ?prof .
+                ?prof ex:professorSurname ?surname .
+                FILTER(CONTAINS(LCASE({sparql_literal(lecturer)}), LCASE(?surname)))
+            }} AS ?lecturer_match)"""
+
+        day_bind = "BIND(false AS ?day_match)"
+        if day and day_index(day) is not None:
+            day_bind = f"""BIND(EXISTS {{
+                ?m ex:hasSchedule ?day_ts .
+                ?day_ts ex:dayOfWeek {day_index(day)} .
+            }} AS ?day_match)"""
+
+        assessment_bind = "BIND(false AS ?assessment_match)"
+        if assessment_type:
+            assessment_bind = f"""BIND(EXISTS {{
+                ?m ex:assessmentType ?type .
+                FILTER(LCASE(?type) = LCASE({sparql_literal(assessment_type)}))
+            }} AS ?assessment_match)"""
 
-    def matches_day(self, module_title, day):
         query = f"""
-        ASK {{
+        SELECT ?module_title ?lecturer_match ?day_match ?assessment_match ?project_work ?oral_assessment
+        WHERE {{
+          VALUES ?module_title {{ {values} }}
           ?m a ex:Module ;
-             ex:moduleTitle "{module_title}" ;
-             ex:hasSchedule ?ts .
-          ?ts ex:day "{day}" .
+             ex:moduleTitle ?module_title .
+          {lecturer_bind}
+          {day_bind}
+          {assessment_bind}
+          BIND(EXISTS {{ ?m ex:projectWork true }} AS ?project_work)
+          BIND(EXISTS {{ ?m ex:oralAssessment true }} AS ?oral_assessment)
         }}
         """
-        self.sparql.setQuery(self.prefixes + query)
-        return self.sparql.query().convert()["boolean"]
+
+        def parse(results):
+            for r in results:
+                # A title shared by several module nodes matches if any of them does
+                row = features[r["module_title"]["value"]]
+                row["lecturer"] |= r["lecturer_match"]["value"] == "true"
+                row["day"] |= r["day_match"]["value"] == "true"
+                row["assessment_type"] |= r["assessment_match"]["value"] == "true"
+                row["project_work"] |= r["project_work"]["value"] == "true"
+                row["oral_assessment"] |= r["oral_assessment"]["value"] == "true"
+            return features
+
+        return self._select(query, parse)
+
+    def matches_lecturer(self, module_title, lecturer):
+        features = self.get_module_features([module_title], lecturer=lecturer)
+        return self._then(features, lambda f: f[module_title]["lecturer"])
+
+    def matches_day(self, module_title, day):
+        features = self.get_module_features([module_title], day=day)
+        return self._then(features, lambda f: f[module_title]["day"])
 
     def matches_assessment_type(self, module_title, assessment_type):
-        query = f"""
-        ASK {{
-          ?m a ex:Module ;
-             ex:moduleTitle "{module_title}" ;
-             ex:assessmentType ?type .
-          FILTER(LCASE(?type) = LCASE("{assessment_type}"))
-        }}
-        """
-        self.sparql.setQuery(self.prefixes + query)
-        return self.sparql.query().convert()["boolean"]
+        features = self.get_module_features([module_title], assessment_type=assessment_type)
+        return self._then(features, lambda f: f[module_title]["assessment_type"])
 
     def has_project_work(self, module_title):
-        query = f"""
-        ASK {{
-          ?m a ex:Module ;
-             ex:moduleTitle "{module_title}" ;
-             ex:projectWork true .
-        }}
-        """
-        self.sparql.setQuery(self.prefixes + query)
-        return self.sparql.query().convert()["boolean"]
+        features = self.get_module_features([module_title])
+        return self._then(features, lambda f: f[module_title]["project_work"])
 
     def has_oral_assessment(self, module_title):
-        query = f"""
-        ASK {{
-          ?m a ex:Module ;
-             ex:moduleTitle "{module_title}" ;
-             ex:oralAssessment true .
-        }}
-        """
-        self.sparql.setQuery(self.prefixes + query)
-        return self.sparql.query().convert()["boolean"]
+        features = self.get_module_features([module_title])
+        return self._then(features, lambda f: f[module_title]["oral_assessment"])
 
     # ----------------------------------------------------------------- #
     # NEWLY TRANSLATED METHOD
@@ -292,16 +469,16 @@ class GraphDbMethods:
         # Filter: Taken Modules (List of module titles)
         taken_modules_filter = ""
         if taken_modules:
-            taken_values = ", ".join([f'"{m}"' for m in taken_modules])
+            taken_values = ", ".join(sparql_literal(m) for m in taken_modules)
             taken_modules_filter = f"FILTER(?module_title NOT IN ({taken_values}))"
 
-        # Score: Available Days (List of strings)
+        # Score: Available Days (List of strings), compared as day-of-week indices
         day_bind_str = "BIND(0 AS ?day_match_score)"
-        if available_days:
-            # Create a regex like "(Monday|Tuesday|Friday)"
-            day_regex = "|".join([re.escape(d) for d in available_days])
+        day_indices = sorted({day_index(d) for d in available_days or []} - {None})
+        if day_indices:
+            day_values = ", ".join(str(d) for d in day_indices)
             day_bind_str = f"""
-                BIND(IF(BOUND(?days_str) && REGEX(?days_str, "{day_regex}", "i"), 1, 0) AS ?day_match_score)
+                BIND(IF(EXISTS {{ ?m ex:hasSchedule/ex:dayOfWeek ?day_of_week . FILTER(?day_of_week IN ({day_values})) }}, 1, 0) AS ?day_match_score)
             """
 
         # Score: Desired Lecturers (List of strings)
@@ -312,7 +489,7 @@ class GraphDbMethods:
             # Create a check for each desired lecturer
             # e.g., REGEX(LCASE("Prof. Adam Smith"), LCASE("Smith|Jones|Miller"), "i")
             lecturer_checks = [
-                f'REGEX(LCASE("{re.escape(lec)}"), LCASE(?surnames_str), "i")'
+                f'REGEX(LCASE({sparql_literal(lec)}), LCASE(?surnames_str), "i")'
                 for lec in desired_lecturers
             ]
             lecturer_filter_str = " || ".join(lecturer_checks)
@@ -328,7 +505,7 @@ class GraphDbMethods:
             if assessment_type_lower == "individual_and_group":
                 assessment_bind_str = 'BIND(IF(BOUND(?assessment_type_prop) && LCASE(STR(?assessment_type_prop)) IN ("individual", "group", "individual_and_group"), 1, 0) AS ?assessment_match_score)'
             else:
-                assessment_bind_str = f'BIND(IF(BOUND(?assessment_type_prop) && LCASE(STR(?assessment_type_prop)) = "{assessment_type_lower}", 1, 0) AS ?assessment_match_score)'
+                assessment_bind_str = f'BIND(IF(BOUND(?assessment_type_prop) && LCASE(STR(?assessment_type_prop)) = {sparql_literal(assessment_type_lower)}, 1, 0) AS ?assessment_match_score)'
 
         # Score: Project Work (Boolean)
         project_work_bool = str(project_work).lower()
@@ -354,7 +531,6 @@ class GraphDbMethods:
             WHERE {{
                 # --- Inner select: Get all modules and their properties/aggregates ---
                 SELECT ?m ?module_title ?module_type
-                       (GROUP_CONCAT(DISTINCT ?day; separator="|") AS ?days_str)
                        (GROUP_CONCAT(DISTINCT ?surname; separator="|") AS ?surnames_str)
                        ?assessment_type_prop ?project_work_prop ?oral_assessment_prop
                 WHERE {{
@@ -370,7 +546,6 @@ class GraphDbMethods:
                     # Optional schedule info
                     OPTIONAL {{
                         ?m ex:hasSchedule ?ts .
-                        OPTIONAL {{ ?ts ex:day ?day . }}
                         OPTIONAL {{
                             ?ts ex:taughtBy ?prof .
                             ?prof a ex:Professor ;
@@ -396,8 +571,7 @@ class GraphDbMethods:
         """
 
         # --- 3. Execute Query and Format Results ---
-        try:
-            results = self.query(query_str)
+        def parse(results):
             return [
                 {
                     "module": {
@@ -409,7 +583,124 @@ class GraphDbMethods:
                 }
                 for r in results
             ]
-        except Exception as e:
+
+        def on_error(e):
             print(f"Error executing preference query: {e}")
             print(f"Query: {self.prefixes + query_str}")
-            return []
\ No newline at end of file
+            return []
+
+        return self._select(query_str, parse, on_error)
+
+
+class GraphDbMethods(_GraphDbQueries):
+    def __init__(self):
+        """Initialize the accessor; the connection to the GraphDB repository is opened by the first query."""
+        self.cache = get_query_cache()
+
+    @property
+    def client(self):
+        # The client is shared by the whole process, so creating a
+        # GraphDbMethods per page or per tool call is cheap.
+        return get_sparql_client()
+
+    # ----------------------------- #
+    # Generic query helpers
+    # ----------------------------- #
+    def query(self, query_str):
+        """Execute a SPARQL SELECT query."""
+        return self.client.select(self.prefixes + query_str)
+
+    def ask(self, query_str):
+        """Execute a SPARQL ASK query."""
+        return self.client.ask(self.prefixes + query_str)
+
+    def update(self, query_str):
+        """Execute a SPARQL UPDATE query (INSERT/DELETE)."""
+        self.client.update(self.prefixes + query_str)
+
+    def _select(self, query_str, parse, on_error=None):
+        try:
+            results = self.query(query_str)
+        except Exception as e:
+            if on_error is None:
+                raise
+            return on_error(e)
+        return parse(results)
+
+    def _then(self, result, fn):
+        return fn(result)
+
+    def _resolved(self, value):
+        return value
+
+
+class AsyncGraphDbMethods(_GraphDbQueries):
+    """
+    asyncio variant of GraphDbMethods for the agent tools.
+
+    It exposes the same query methods as coroutines, so graph I/O does not
+    block the event loop running the agent workflow.
+    """
+
+    def __init__(self):
+        """Initialize the accessor; the connection to the GraphDB repository is opened by the first query."""
+        self.cache = get_query_cache()
+
+    @property
+    def client(self):
+        # One client per event loop, shared by the accessors created on it
+        return get_async_sparql_client()
+
+    # ----------------------------- #
+    # Generic query helpers
+    # ----------------------------- #
+    async def query(self, query_str):
+        """Execute a SPARQL SELECT query."""
+        return await self.client.select(self.prefixes + query_str)
+
+    async def ask(self, query_str):
+        """Execute a SPARQL ASK query."""
+        return await self.client.ask(self.prefixes + query_str)
+
+    async def update(self, query_str):
+        """Execute a SPARQL UPDATE query (INSERT/DELETE)."""
+        await self.client.update(self.prefixes + query_str)
+
+    async def _select(self, query_str, parse, on_error=None):
+        try:
+            results = await self.query(query_str)
+        except Exception as e:
+            if on_error is None:
+                raise
+            return on_error(e)
+        return parse(results)
+
+    async def _then(self, result, fn):
+        value = fn(await result)
+        if inspect.isawaitable(value):
+            value = await value
+        return value
+
+    async def _resolved(self, value):
+        return value
+
+
+def use_embedded_graph():
+    """Tell whether read queries are configured to use the embedded graph instead of GraphDB."""
+    return st.secrets.get("GRAPHDB_BACKEND", "graphdb") == "embedded"
+
+
+def get_graphdb_methods():
+    """Return the blocking GraphDB accessor for the configured backend."""
+    if use_embedded_graph():
+        from utils.embedded_graph import EmbeddedGraphDbMethods
+        return EmbeddedGraphDbMethods()
+    return GraphDbMethods()
+
+
+def get_async_graphdb_methods():
+    """Return the asyncio GraphDB accessor for the configured backend."""
+    if use_embedded_graph():
+        from utils.embedded_graph import AsyncEmbeddedGraphDbMethods
+        return AsyncEmbeddedGraphDbMethods()
+    return AsyncGraphDbMethods()
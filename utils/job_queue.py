@@ -0,0 +1,175 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+import streamlit as st
+
+DEFAULT_JOBS_PATH = ".cache/jobs.sqlite3"
+DEFAULT_MAX_WORKERS = 4
+DEFAULT_KEEP_PER_OWNER = 10
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+ACTIVE_STATUSES = (QUEUED, RUNNING)
+
+_queue = None
+_queue_lock = threading.Lock()
+
+
+class JobQueue:
+    """
+    Background jobs run by a pool of worker threads.
+
+    The status, progress and result of every job are kept in a SQLite file,
+    so they can be polled from any Streamlit session and survive the page
+    that submitted the job. Jobs still queued or running when the process
+    stopped are marked as failed on start, since their work is lost.
+    """
+
+    def __init__(self, path=DEFAULT_JOBS_PATH, max_workers=DEFAULT_MAX_WORKERS, keep_per_owner=DEFAULT_KEEP_PER_OWNER):
+        """
+        Initialize the queue.
+
+        Args:
+            path (str): SQLite file, created with its directory if missing.
+            max_workers (int): Maximum number of jobs running at the same time.
+            keep_per_owner (int): Number of finished jobs kept per owner.
+        """
+        self.path = path
+        self.max_workers = max_workers
+        self.keep_per_owner = keep_per_owner
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers, thread_name_prefix="job")
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                "id TEXT PRIMARY KEY, owner TEXT NOT NULL, status TEXT NOT NULL, progress TEXT, result TEXT, "
+                "error TEXT, created_at REAL NOT NULL, started_at REAL, finished_at REAL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS jobs_owner ON jobs (owner, created_at)")
+            conn.execute(
+                "UPDATE jobs SET status = ?, error = ?, finished_at = ? WHERE status IN (?, ?)",
+                (FAILED, "Interrupted by a restart of the server.", time.time(), *ACTIVE_STATUSES),
+            )
+
+    @contextmanager
+    def _connect(self):
+        # Commits on success, rolls back on error, and always closes the connection
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def submit(self, owner, fn, *args, **kwargs):
+        """
+        Queue `fn(report, *args, **kwargs)`, unless the owner already has an active job.
+
+        `report(progress)` stores a JSON-serializable progress value of the
+        job; the JSON-serializable return value of `fn` becomes its result.
+
+        Returns:
+            str: Id of the new job, or of the active job of the owner.
+        """
+        owner = str(owner)
+        with self._lock, self._connect() as conn:
+            active = conn.execute(
+                f"SELECT id FROM jobs WHERE owner = ? AND status IN ({', '.join('?' * len(ACTIVE_STATUSES))})",
+                (owner, *ACTIVE_STATUSES),
+            ).fetchone()
+            if active is not None:
+                return active["id"]
+            job_id = uuid.uuid4().hex
+            conn.execute(
+                "INSERT INTO jobs (id, owner, status, created_at) VALUES (?, ?, ?, ?)",
+                (job_id, owner, QUEUED, time.time()),
+            )
+            # Forget the oldest finished jobs of the owner
+            conn.execute(
+                "DELETE FROM jobs WHERE owner = ? AND status NOT IN (?, ?) AND id NOT IN ("
+                "SELECT id FROM jobs WHERE owner = ? ORDER BY created_at DESC LIMIT ?)",
+                (owner, *ACTIVE_STATUSES, owner, self.keep_per_owner),
+            )
+        self._executor.submit(self._run, job_id, fn, args, kwargs)
+        return job_id
+
+    def _run(self, job_id, fn, args, kwargs):
+        self._update(job_id, status=RUNNING, started_at=time.time())
+        try:
+            result = fn(lambda progress: self._update(job_id, progress=json.dumps(progress)), *args, **kwargs)
+        except Exception as e:
+            print(f"Job {job_id} failed: {e}")
+            self._update(job_id, status=FAILED, error=str(e), finished_at=time.time())
+        else:
+            self._update(job_id, status=DONE, result=json.dumps(result), finished_at=time.time())
+
+    def _update(self, job_id, **columns):
+        assignments = ", ".join(f"{column} = ?" for column in columns)
+        with self._lock, self._connect() as conn:
+            conn.execute(f"UPDATE jobs SET {assignments} WHERE id = ?", (*columns.values(), job_id))
+
+    def get(self, job_id):
+        """
+        Return a job as a dict (id, owner, status, progress, result, error and
+        timestamps, progress and result decoded), or None if it does not exist.
+        """
+        with self._connect() as conn:
+            row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return _job(row)
+
+    def latest(self, owner):
+        """Return the most recently submitted job of an owner, or None."""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT * FROM jobs WHERE owner = ? ORDER BY created_at DESC LIMIT 1", (str(owner),)
+            ).fetchone()
+        return _job(row)
+
+    def position(self, job_id):
+        """Number of queued jobs to run before a queued job plus one, 0 if the job is not queued."""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT COUNT(*) FROM jobs WHERE status = ? AND created_at <= "
+                "(SELECT created_at FROM jobs WHERE id = ? AND status = ?)",
+                (QUEUED, job_id, QUEUED),
+            ).fetchone()
+        return row[0]
+
+    def shutdown(self, wait=True):
+        """Stop accepting jobs and, with `wait`, wait for the submitted ones."""
+        self._executor.shutdown(wait=wait)
+
+
+def _job(row):
+    if row is None:
+        return None
+    job = dict(row)
+    for column in ("progress", "result"):
+        if job[column] is not None:
+            job[column] = json.loads(job[column])
+    return job
+
+
+def get_job_queue():
+    """Return the process-wide job queue, configured by JOBS_PATH and JOB_WORKERS."""
+    global _queue
+    if _queue is None:
+        with _queue_lock:
+            if _queue is None:
+                _queue = JobQueue(
+                    st.secrets.get("JOBS_PATH", DEFAULT_JOBS_PATH),
+                    int(st.secrets.get("JOB_WORKERS", DEFAULT_MAX_WORKERS)),
+                )
+    return _queue
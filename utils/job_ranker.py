@@ -210,13 +210,18 @@ class JobRanker:
 
         return converted_jobs
 
-    def get_ranked_jobs(self):
+    def get_ranked_jobs(self, jobs=None):
         """
         Get the ranked jobs based on the current state of the JobRanker.
 
+        Args:
+            jobs (list): Work experience rows of the student, fetched from
+                Supabase for the logged-in user if None.
+
         Returns:
             list: Ranked list of jobs with scores in descending order.
         """
-        jobs = get_work_experience()
+        if jobs is None:
+            jobs = get_work_experience()
         converted_jobs = self._convert_job_list(jobs)
         return self._rank_jobs(converted_jobs)
@@ -0,0 +1,121 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+import streamlit as st
+
+DEFAULT_CACHE_PATH = ".cache/llm_responses.sqlite3"
+DEFAULT_MAX_BYTES = 100 * 1024 * 1024
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def request_key(request):
+    """
+    Content address of an LLM request.
+
+    Args:
+        request (dict): Everything sent to the API: model, sampling parameters,
+            system prompt, messages and tool schemas.
+
+    Returns:
+        str: Hex digest, identical for identical requests.
+    """
+    encoded = json.dumps(request, sort_keys=True, default=str).encode("utf-8")
+    return hashlib.sha256(encoded).hexdigest()
+
+
+class LLMResponseCache:
+    """
+    LLM responses stored in a SQLite file by request key.
+
+    When the stored responses exceed `max_bytes`, the least recently used
+    ones are deleted. The file can be shared by the threads of a process and
+    by several processes: every operation opens its own connection and the
+    database runs in WAL mode.
+    """
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, max_bytes=DEFAULT_MAX_BYTES):
+        """
+        Initialize the cache.
+
+        Args:
+            path (str): SQLite file, created with its directory if missing.
+            max_bytes (int): Maximum total size of the stored responses.
+        """
+        self.path = path
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, size INTEGER NOT NULL, last_used REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS responses_last_used ON responses (last_used)")
+
+    @contextmanager
+    def _connect(self):
+        # Commits on success, rolls back on error, and always closes the connection
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def get(self, key):
+        """Return the response stored for a request key, or None."""
+        with self._lock, self._connect() as conn:
+            row = conn.execute("SELECT value FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            conn.execute("UPDATE responses SET last_used = ? WHERE key = ?", (time.time(), key))
+            return row[0]
+
+    def put(self, key, value):
+        """Store the response (a string) of a request, then evict old responses if the cache is over its size."""
+        size = len(value.encode("utf-8"))
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO responses (key, value, size, last_used) VALUES (?, ?, ?, ?)",
+                (key, value, size, time.time()),
+            )
+            # Keep the most recently used responses that fit in max_bytes
+            conn.execute(
+                "DELETE FROM responses WHERE key IN ("
+                "SELECT key FROM (SELECT key, SUM(size) OVER (ORDER BY last_used DESC, key) AS kept FROM responses) "
+                "WHERE kept > ?)",
+                (self.max_bytes,),
+            )
+
+    def size(self):
+        """Total size in bytes of the stored responses."""
+        with self._connect() as conn:
+            return conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+
+    def __len__(self):
+        with self._connect() as conn:
+            return conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+
+def get_llm_response_cache():
+    """Return the process-wide LLM response cache, or None if LLM_RESPONSE_CACHE is set to "off"."""
+    global _cache
+    if st.secrets.get("LLM_RESPONSE_CACHE", "sqlite") == "off":
+        return None
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = LLMResponseCache(
+                    st.secrets.get("LLM_RESPONSE_CACHE_PATH", DEFAULT_CACHE_PATH),
+                    int(st.secrets.get("LLM_RESPONSE_CACHE_MAX_BYTES", DEFAULT_MAX_BYTES)),
+                )
+    return _cache
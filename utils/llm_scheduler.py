@@ -0,0 +1,250 @@
+import asyncio
+import random
+import threading
+import time
+from collections import OrderedDict, deque
+
+import anthropic
+import streamlit as st
+
+DEFAULT_MAX_IN_FLIGHT = 4
+DEFAULT_MAX_RETRIES = 5
+# Rate limited (429), server errors and overloaded (529)
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504, 529)
+BUDGET_WINDOW = 60
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+class _Ticket:
+    def __init__(self, owner, tokens, loop):
+        """A call waiting for, or holding, a slot of the scheduler."""
+        self.owner = owner
+        self.tokens = tokens
+        self.loop = loop
+        self.future = loop.create_future()
+        self.queued_at = time.monotonic()
+        self.granted = False
+        self.budget_entry = None
+
+
+def _resolve(future):
+    if not future.done():
+        future.set_result(None)
+
+
+class LLMScheduler:
+    """
+    Process-wide admission control for LLM calls.
+
+    At most `max_in_flight` calls run at the same time and, if
+    `tokens_per_minute` is set, the tokens of the calls started in the last
+    minute stay within it. Waiting calls are queued per owner (the student
+    whose plan is generated): each owner is served in FIFO order, and owners
+    take turns so one large batch cannot starve the others.
+
+    The scheduler is shared by the event loops of all threads: its state is
+    guarded by a lock and waiting calls are woken up on their own loop.
+    """
+
+    def __init__(self, max_in_flight=DEFAULT_MAX_IN_FLIGHT, tokens_per_minute=None, max_retries=DEFAULT_MAX_RETRIES,
+                 base_delay=1.0, max_delay=30.0):
+        """
+        Initialize the scheduler.
+
+        Args:
+            max_in_flight (int): Maximum number of concurrent calls.
+            tokens_per_minute (int): Token budget per minute, unlimited if None.
+            max_retries (int): Retries of a call rejected with a RETRY_STATUS_CODES status.
+            base_delay (float): Backoff of the first retry in seconds, doubled on each retry.
+            max_delay (float): Maximum backoff in seconds.
+        """
+        self.max_in_flight = max_in_flight
+        self.tokens_per_minute = tokens_per_minute
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._lock = threading.Lock()
+        # Owner -> FIFO of waiting tickets, owners in turn order
+        self._queues = OrderedDict()
+        self._in_flight = 0
+        self._budget = deque()
+        self._waits = deque(maxlen=100)
+        self._timer = None
+
+    # ----- #
+    # Slots
+    # ----- #
+
+    async def acquire(self, owner=None, tokens=0):
+        """
+        Wait for a slot to start a call of about `tokens` tokens.
+
+        Returns:
+            _Ticket: To pass to release() once the call finished.
+        """
+        ticket = _Ticket(owner, tokens, asyncio.get_running_loop())
+        with self._lock:
+            self._queues.setdefault(owner, deque()).append(ticket)
+            self._dispatch()
+        try:
+            await ticket.future
+        except asyncio.CancelledError:
+            with self._lock:
+                if ticket.granted:
+                    self._finish(ticket, 0)
+                else:
+                    self._remove(ticket)
+            raise
+        return ticket
+
+    def release(self, ticket, tokens=None):
+        """Free the slot of a finished call, counting its actual `tokens` (the estimate if None) in the budget."""
+        with self._lock:
+            self._finish(ticket, tokens)
+
+    def _finish(self, ticket, tokens):
+        self._in_flight -= 1
+        if tokens is not None:
+            ticket.budget_entry[1] = tokens
+        self._dispatch()
+
+    def _remove(self, ticket):
+        queue = self._queues.get(ticket.owner)
+        if queue is not None and ticket in queue:
+            queue.remove(ticket)
+            if not queue:
+                del self._queues[ticket.owner]
+
+    def _dispatch(self):
+        while self._queues and self._in_flight < self.max_in_flight:
+            owner, queue = next(iter(self._queues.items()))
+            ticket = queue[0]
+            wait = self._budget_wait(ticket.tokens)
+            if wait > 0:
+                self._schedule_dispatch(wait)
+                return
+            # The owner goes to the back of the line
+            queue.popleft()
+            del self._queues[owner]
+            if queue:
+                self._queues[owner] = queue
+            self._grant(ticket)
+
+    def _grant(self, ticket):
+        now = time.monotonic()
+        ticket.granted = True
+        ticket.budget_entry = [now, ticket.tokens]
+        self._in_flight += 1
+        self._budget.append(ticket.budget_entry)
+        self._waits.append(now - ticket.queued_at)
+        try:
+            ticket.loop.call_soon_threadsafe(_resolve, ticket.future)
+        except RuntimeError:
+            # The loop of the waiting call is closed
+            self._in_flight -= 1
+
+    # ----- #
+    # Token budget
+    # ----- #
+
+    def _budget_wait(self, tokens):
+        """Seconds until a call of `tokens` tokens fits in the budget of the last minute."""
+        if self.tokens_per_minute is None:
+            return 0
+        now = time.monotonic()
+        while self._budget and self._budget[0][0] <= now - BUDGET_WINDOW:
+            self._budget.popleft()
+        used = sum(entry[1] for entry in self._budget)
+        # A call larger than the whole budget still runs once the minute is empty
+        if not self._budget or used + tokens <= self.tokens_per_minute:
+            return 0
+        for started, spent in self._budget:
+            used -= spent
+            if used + tokens <= self.tokens_per_minute:
+                return started + BUDGET_WINDOW - now
+        return self._budget[-1][0] + BUDGET_WINDOW - now
+
+    def _schedule_dispatch(self, delay):
+        if self._timer is not None:
+            return
+
+        def dispatch():
+            with self._lock:
+                self._timer = None
+                self._dispatch()
+
+        self._timer = threading.Timer(delay, dispatch)
+        self._timer.daemon = True
+        self._timer.start()
+
+    # ----- #
+    # Retries
+    # ----- #
+
+    def backoff_delay(self, attempt, retry_after=None):
+        """Delay before retry `attempt` (0-based): full jitter exponential backoff, at least `retry_after`."""
+        delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+        return max(delay, retry_after or 0)
+
+    async def with_retries(self, request):
+        """Await `request()`, retrying with a jittered backoff while the provider is rate limited or overloaded."""
+        for attempt in range(self.max_retries + 1):
+            try:
+                return await request()
+            except (anthropic.APIStatusError, anthropic.APIConnectionError) as e:
+                status = getattr(e, "status_code", None)
+                retryable = isinstance(e, anthropic.APIConnectionError) or status in RETRY_STATUS_CODES
+                if not retryable or attempt == self.max_retries:
+                    raise
+                delay = self.backoff_delay(attempt, _retry_after(e))
+                print(f"⏳ LLM call failed ({status or e}), retry {attempt + 1} in {delay:.1f}s")
+                await asyncio.sleep(delay)
+
+    # ----- #
+    # Monitoring
+    # ----- #
+
+    def position(self, owner):
+        """Position in the queue of the next waiting call of an owner (1 = next to run), 0 if none is waiting."""
+        with self._lock:
+            for i, queued_owner in enumerate(self._queues):
+                if queued_owner == owner:
+                    return i + 1
+        return 0
+
+    def stats(self):
+        """Current queue depth, calls in flight, tokens of the last minute and average wait of the last calls."""
+        with self._lock:
+            now = time.monotonic()
+            return {
+                "queued": sum(len(queue) for queue in self._queues.values()),
+                "waiting_owners": len(self._queues),
+                "in_flight": self._in_flight,
+                "tokens_last_minute": sum(spent for started, spent in self._budget if started > now - BUDGET_WINDOW),
+                "average_wait": sum(self._waits) / len(self._waits) if self._waits else 0.0,
+            }
+
+
+def _retry_after(error):
+    response = getattr(error, "response", None)
+    try:
+        return float(response.headers.get("retry-after"))
+    except (AttributeError, TypeError, ValueError):
+        return None
+
+
+def get_llm_scheduler():
+    """Return the process-wide LLM scheduler, configured by LLM_MAX_IN_FLIGHT, LLM_TOKENS_PER_MINUTE and LLM_MAX_RETRIES."""
+    global _scheduler
+    if _scheduler is None:
+        with _scheduler_lock:
+            if _scheduler is None:
+                tokens_per_minute = st.secrets.get("LLM_TOKENS_PER_MINUTE")
+                _scheduler = LLMScheduler(
+                    int(st.secrets.get("LLM_MAX_IN_FLIGHT", DEFAULT_MAX_IN_FLIGHT)),
+                    int(tokens_per_minute) if tokens_per_minute else None,
+                    int(st.secrets.get("LLM_MAX_RETRIES", DEFAULT_MAX_RETRIES)),
+                )
+    return _scheduler
@@ -0,0 +1,77 @@
+from contextvars import ContextVar
+
+USAGE_FIELDS = ("input_tokens", "output_tokens", "cache_creation_input_tokens", "cache_read_input_tokens")
+
+_current_usage = ContextVar("llm_usage", default=None)
+
+
+class LLMUsage:
+    def __init__(self, owner=None):
+        """Token usage of the LLM calls of one run for `owner` (e.g. a student id), prompt cache reads and writes included."""
+        self.owner = owner
+        self.calls = 0
+        self.cached_calls = 0
+        for field in USAGE_FIELDS:
+            setattr(self, field, 0)
+
+    def add(self, usage, new_call=True):
+        """Add the `usage` of a response (or of a streaming event) of the Anthropic API."""
+        if usage is None:
+            return
+        if new_call:
+            self.calls += 1
+        for field in USAGE_FIELDS:
+            setattr(self, field, getattr(self, field) + (getattr(usage, field, None) or 0))
+
+    @property
+    def cache_hit_rate(self):
+        """Share of the prompt tokens read from the prompt cache."""
+        prompt_tokens = self.input_tokens + self.cache_creation_input_tokens + self.cache_read_input_tokens
+        return self.cache_read_input_tokens / prompt_tokens if prompt_tokens else 0.0
+
+    def to_dict(self):
+        usage = {"calls": self.calls, "cached_calls": self.cached_calls}
+        usage.update((field, getattr(self, field)) for field in USAGE_FIELDS)
+        return usage
+
+    def __str__(self):
+        return (
+            f"{self.calls} LLM calls ({self.cached_calls} from the response cache), "
+            f"{self.input_tokens} input tokens, {self.output_tokens} output tokens, "
+            f"cache write {self.cache_creation_input_tokens}, cache read {self.cache_read_input_tokens} "
+            f"({self.cache_hit_rate:.0%} of the prompt tokens)"
+        )
+
+
+def track_llm_usage(usage=None):
+    """
+    Count the LLM calls made from the current context, and from the tasks it
+    starts afterwards, in `usage` (a new LLMUsage if None).
+
+    Returns:
+        LLMUsage: The usage being filled.
+    """
+    usage = usage or LLMUsage()
+    _current_usage.set(usage)
+    return usage
+
+
+def current_llm_owner():
+    """Owner of the run the current context's LLM calls belong to, or None."""
+    current = _current_usage.get()
+    return current.owner if current is not None else None
+
+
+def record_llm_usage(usage, new_call=True):
+    """Add the usage of an API response to the usage tracked by the current context, if any."""
+    current = _current_usage.get()
+    if current is not None:
+        current.add(usage, new_call)
+
+
+def record_cached_llm_response():
+    """Count a call answered by the response cache, which uses no tokens."""
+    current = _current_usage.get()
+    if current is not None:
+        current.calls += 1
+        current.cached_calls += 1
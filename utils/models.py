@@ -68,3 +68,112 @@ class Student:
     def new_student(cls) -> 'Student':
         """Creates a new student with default values."""
         return cls([], "", "", "", 3, [], [], [], "", False, False)
+
+
+class PlannedModule:
+    def __init__(self, title: str, module_type: str, credits: int, description: str = ""):
+        """Initialize a module scheduled in a study plan."""
+        self.title = title
+        self.module_type = module_type
+        self.credits = credits
+        self.description = description
+
+    def to_dict(self) -> dict:
+        """Converts the PlannedModule object to a dictionary."""
+        return {
+            'title': self.title,
+            'module_type': self.module_type,
+            'credits': self.credits,
+            'description': self.description
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> 'PlannedModule':
+        """Creates a PlannedModule object from a dictionary."""
+        return cls(
+            title=data.get('title', ""),
+            module_type=data.get('module_type', ""),
+            credits=data.get('credits', 0),
+            description=data.get('description', "")
+        )
+
+    def __repr__(self) -> str:
+        """String representation of the object."""
+        return f"PlannedModule(title='{self.title}', credits={self.credits})"
+
+
+class PlannedSemester:
+    def __init__(self, season: str, year: int, modules: Optional[List[PlannedModule]] = None):
+        """Initialize a semester of a study plan."""
+        self.season = season
+        self.year = year
+        self.modules = modules or []
+
+    @property
+    def credits(self) -> int:
+        """Credits of the modules planned in the semester."""
+        return sum(m.credits for m in self.modules)
+
+    def to_dict(self) -> dict:
+        """Converts the PlannedSemester object to a dictionary."""
+        return {
+            'season': self.season,
+            'year': self.year,
+            'credits': self.credits,
+            'modules': [m.to_dict() for m in self.modules]
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> 'PlannedSemester':
+        """Creates a PlannedSemester object from a dictionary."""
+        return cls(
+            season=data.get('season', ""),
+            year=data.get('year', 0),
+            modules=[PlannedModule.from_dict(m) for m in data.get('modules', [])]
+        )
+
+    def __repr__(self) -> str:
+        """String representation of the object."""
+        return f"PlannedSemester(season='{self.season}', year={self.year}, credits={self.credits})"
+
+
+class StudyPlan:
+    def __init__(self,
+                 semesters: List[PlannedSemester],
+                 taken_credits: int,
+                 unplaced_modules: Optional[List[str]] = None,
+                 missing_credits: int = 0):
+        """Initialize a semester-wise study plan."""
+        self.semesters = semesters
+        self.taken_credits = taken_credits
+        self.unplaced_modules = unplaced_modules or []
+        self.missing_credits = missing_credits
+
+    @property
+    def planned_credits(self) -> int:
+        """Credits of all the planned modules."""
+        return sum(s.credits for s in self.semesters)
+
+    def to_dict(self) -> dict:
+        """Converts the StudyPlan object to a dictionary."""
+        return {
+            'semesters': [s.to_dict() for s in self.semesters],
+            'taken_credits': self.taken_credits,
+            'planned_credits': self.planned_credits,
+            'unplaced_modules': self.unplaced_modules,
+            'missing_credits': self.missing_credits
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> 'StudyPlan':
+        """Creates a StudyPlan object from a dictionary."""
+        return cls(
+            semesters=[PlannedSemester.from_dict(s) for s in data.get('semesters', [])],
+            taken_credits=data.get('taken_credits', 0),
+            unplaced_modules=data.get('unplaced_modules', []),
+            missing_credits=data.get('missing_credits', 0)
+        )
+
+    def __repr__(self) -> str:
+        """String representation of the object."""
+        return f"StudyPlan(semesters={len(self.semesters)}, planned_credits={self.planned_credits})"
@@ -0,0 +1,329 @@
+import itertools
+import math
+from datetime import date
+
+from utils.graphdb_methods import THESIS_MODULES
+from utils.models import PlannedModule, PlannedSemester, StudyPlan
+
+# Same order as the ex:semesterIndex values written by esco/graph.py
+SEASONS = ("Spring", "Autumn")
+TOTAL_CREDITS = 90
+MAIN_CREDITS = 60
+MODULE_CREDITS = 6
+# Distributions of capacity_candidates tried before laying the modules out by season
+MAX_CAPACITY_CANDIDATES = 100
+
+MANDATORY_MODULES = [
+    "Alignment of Business and IT",
+    "Business Intelligence",
+    "Business Process Management",
+    "Strategic Business Innovation"
+]
+
+# Thesis-related modules in the order they must be taken, with their credits
+THESIS_SEQUENCE = [
+    ("Research Methods in Information Systems", 6),
+    ("Master Thesis Proposal", 6),
+    ("Master Thesis", 18),
+]
+
+
+def upcoming_semester(today=None):
+    """Return the (season, year) of the next semester to start: Spring starts in February, Autumn in September."""
+    today = today or date.today()
+    if today.month < 2:
+        return "Spring", today.year
+    if today.month < 9:
+        return "Autumn", today.year
+    return "Spring", today.year + 1
+
+
+def semester_sequence(count, start):
+    """Return `count` consecutive (season, year) pairs starting at `start`."""
+    season, year = start
+    semesters = []
+    for _ in range(count):
+        semesters.append((season, year))
+        if season == "Autumn":
+            season, year = "Spring", year + 1
+        else:
+            season = "Autumn"
+    return semesters
+
+
+def normalize_season(value):
+    """Map a semester value of the graph (e.g. " Spring") to "Spring" or "Autumn", or None."""
+    value = str(value).strip().capitalize()
+    if value == "Fall":
+        return "Autumn"
+    return value if value in SEASONS else None
+
+
+def module_seasons(teaching_sessions):
+    """
+    Seasons in which each module is taught.
+
+    Args:
+        teaching_sessions (list): Output of GraphDbMethods.get_teaching_sessions_by_modules.
+
+    Returns:
+        dict: Module title -> set of seasons.
+    """
+    seasons = {}
+    for module in teaching_sessions:
+        offered = seasons.setdefault(module["module_title"], set())
+        for ts in module["teaching_session"]:
+            if ts.get("semester_index") is not None:
+                season = SEASONS[ts["semester_index"]]
+            else:
+                season = normalize_season(ts.get("semester", ""))
+            if season is not None:
+                offered.add(season)
+    return seasons
+
+
+def semester_capacities(module_count, semester_count, thesis_last=False):
+    """
+    Spread `module_count` modules as evenly as possible over the semesters.
+
+    Earlier semesters take the extra modules, so empty semesters only appear
+    at the end. With `thesis_last`, the last used semester holds a single
+    module (the Master Thesis), the others being spread evenly over the
+    semesters before it.
+    """
+    used = min(module_count, semester_count)
+    capacities = [0] * semester_count
+    if used == 0:
+        return capacities
+    if thesis_last and module_count > 1:
+        if used == 1:
+            raise ValueError("The Master Thesis must follow the Master Thesis Proposal: at least 2 semesters are required.")
+        # The other modules are spread over the semesters before the Master Thesis
+        capacities[:used - 1] = semester_capacities(module_count - 1, used - 1)
+        capacities[used - 1] = 1
+        return capacities
+    for i in range(used):
+        capacities[i] = module_count // used + (1 if i < module_count % used else 0)
+    return capacities
+
+
+def capacity_candidates(module_count, semester_count, thesis_last=False):
+    """
+    Distributions of `module_count` modules over the semesters, most even first.
+
+    The first one is semester_capacities(); the others use as many semesters
+    as possible, then the lowest maximum per semester, then the smallest gap
+    between the fullest and the emptiest semester. Empty semesters are always
+    at the end and, with `thesis_last`, the last used semester holds a single
+    module.
+    """
+    try:
+        first = semester_capacities(module_count, semester_count, thesis_last)
+        yield first
+    except ValueError:
+        first = None
+    if module_count == 0:
+        return
+    for used in range(min(module_count, semester_count), 1 if thesis_last else 0, -1):
+        # Semesters sharing the modules, the last one of them holding only the Master Thesis with `thesis_last`
+        shared, shared_count = (used - 1, module_count - 1) if thesis_last else (used, module_count)
+        if shared_count < shared:
+            continue
+        for top in range(math.ceil(shared_count / shared), shared_count - shared + 2):
+            candidates = [c for c in _compositions(shared_count, shared, top) if max(c) == top]
+            candidates.sort(key=lambda c: (top - min(c), [-part for part in c]))
+            for capacities in candidates:
+                capacities = capacities + ([1] if thesis_last else [])
+                capacities += [0] * (semester_count - used)
+                if capacities != first:
+                    yield capacities
+
+
+def _compositions(total, parts, top):
+    """Lists of `parts` integers between 1 and `top` summing to `total`."""
+    if parts == 1:
+        return [[total]] if 1 <= total <= top else []
+    return [
+        [first] + rest
+        for first in range(min(top, total - parts + 1), 0, -1)
+        for rest in _compositions(total - first, parts - 1, top)
+    ]
+
+
+def _matchable(modules, slots, allowed):
+    """Tell whether every module can get its own slot, `allowed(module, slot)` telling which slots fit."""
+    owner = {}
+
+    def assign(module, seen):
+        for slot in slots:
+            if slot in seen or not allowed(module, slot):
+                continue
+            seen.add(slot)
+            if slot not in owner or assign(owner[slot], seen):
+                owner[slot] = module
+                return True
+        return False
+
+    return all(assign(module, set()) for module in modules)
+
+
+def _offered(module, seasons):
+    # A mandatory module without teaching sessions is assumed to be offered every semester
+    return seasons.get(module) or set(SEASONS)
+
+
+def _season_rule(slots, semesters, seasons):
+    """`allowed(module, slot)` telling whether a module is taught in the season of the semester of a slot."""
+    def allowed(module, slot):
+        return semesters[slots[slot]][0] in _offered(module, seasons)
+    return allowed
+
+
+def _layout(candidates, mandatory_count, main_needed, thesis, semesters, seasons):
+    """
+    Semester of each slot, main modules chosen and their season rule, for the
+    most even capacity_candidates distribution fitting `main_needed` modules
+    of `candidates` (mandatory ones first). If none of the first
+    MAX_CAPACITY_CANDIDATES does, the modules are laid out by season with
+    _season_layout.
+    """
+    main_slots = list(range(main_needed))
+    best = None
+    for capacities in itertools.islice(capacity_candidates(
+        main_needed + len(thesis), len(semesters),
+        thesis_last="Master Thesis" in thesis and "Master Thesis Proposal" in thesis,
+    ), MAX_CAPACITY_CANDIDATES):
+        slots = [i for i, capacity in enumerate(capacities) for _ in range(capacity)]
+        allowed = _season_rule(slots, semesters, seasons)
+        chosen = []
+        for module in candidates:
+            if len(chosen) == main_needed:
+                break
+            if _matchable(chosen + [module], main_slots, allowed):
+                chosen.append(module)
+        score = (len(set(candidates[:mandatory_count]) & set(chosen)), len(chosen))
+        if best is None or score > best[0]:
+            best = (score, slots, chosen, allowed)
+        if score == (mandatory_count, main_needed):
+            return slots, chosen, allowed
+    if best is None:
+        raise ValueError("The Master Thesis must follow the Master Thesis Proposal: at least 2 semesters are required.")
+    slots, chosen = _season_layout(candidates, main_needed, thesis, semesters, seasons)
+    if (len(set(candidates[:mandatory_count]) & set(chosen)), len(chosen)) > best[0]:
+        return slots, chosen, _season_rule(slots, semesters, seasons)
+    return best[1:]
+
+
+def _season_layout(candidates, main_needed, thesis, semesters, seasons):
+    """
+    Slots and main modules for plans the capacity_candidates distributions
+    cannot fill, e.g. when the modules are taught only in the season the plan
+    does not start in.
+
+    Each main module goes to the semester of its season holding the fewest
+    modules (the earliest on ties), modules taught in a single season first,
+    and the thesis-related modules follow the last one. A semester stays empty
+    only if none of the modules planned after it is taught in its season.
+    """
+    # The Master Thesis needs a semester of its own after the main modules
+    main_semesters = range(len(semesters) - (1 if "Master Thesis" in thesis else 0))
+    chosen = [
+        module for module in candidates
+        if any(semesters[i][0] in _offered(module, seasons) for i in main_semesters)
+    ][:main_needed]
+    loads = [0] * len(semesters)
+    for module in sorted(chosen, key=lambda module: len(_offered(module, seasons))):
+        semester = min(
+            (i for i in main_semesters if semesters[i][0] in _offered(module, seasons)),
+            key=lambda i: (loads[i], i),
+        )
+        loads[semester] += 1
+    slots = [i for i, load in enumerate(loads) for _ in range(load)]
+    last = slots[-1] if slots else 0
+    slots += [last + 1 if title == "Master Thesis" else last for title in thesis]
+    return slots, chosen
+
+
+def solve_study_plan(ranked_modules, expected_semesters, taken_modules, teaching_sessions, start=None):
+    """
+    Build the semester-wise study plan.
+
+    Every plan it returns keeps Research Methods, Master Thesis Proposal and
+    Master Thesis after all main modules and in that order, each module in a
+    season it is taught and empty semesters at the end, except those of a
+    season none of the later modules is taught in. It aims at 90 credits
+    (60 from the main study plan, 30 from the thesis-related modules) with
+    every mandatory module, spread as evenly as the seasons allow.
+
+    The number of modules per semester is a preference: the distributions of
+    capacity_candidates are tried, most even first, until one fits every
+    mandatory module and enough modules in total, the modules being laid out
+    by season if none does. For each distribution, main modules are
+    chosen greedily in priority order (mandatory modules first, then
+    `ranked_modules`), keeping a module only if the chosen ones can still be
+    matched to distinct semester slots of their season. Each slot then gets, in chronological order, the most
+    important module that keeps the remaining ones placeable.
+
+    Args:
+        ranked_modules (list): Module titles, most important first.
+        expected_semesters (int): Number of semesters of the plan.
+        taken_modules (list): Module titles already completed.
+        teaching_sessions (list): Output of get_teaching_sessions_by_modules
+            for the ranked and mandatory modules.
+        start (tuple): (season, year) of the first semester, the upcoming one if None.
+
+    Returns:
+        StudyPlan: The plan; mandatory modules that could not be placed are
+        listed in its `unplaced_modules`, and the credits still missing to
+        reach 90 (when too few of the modules are offered) in `missing_credits`.
+    """
+    taken = set(taken_modules or [])
+    thesis_credits = dict(THESIS_SEQUENCE)
+    taken_credits = sum(thesis_credits.get(m, MODULE_CREDITS) for m in taken)
+    taken_main = [m for m in taken if m not in THESIS_MODULES]
+    info = {module["module_title"]: module for module in teaching_sessions}
+    seasons = module_seasons(teaching_sessions)
+
+    mandatory = [m for m in MANDATORY_MODULES if m not in taken]
+    electives = [
+        m for m in dict.fromkeys(ranked_modules)
+        if m not in taken and m not in THESIS_MODULES and m not in MANDATORY_MODULES and seasons.get(m)
+    ]
+    main_needed = max(math.ceil((MAIN_CREDITS - MODULE_CREDITS * len(taken_main)) / MODULE_CREDITS), len(mandatory), 0)
+    thesis = [title for title, _ in THESIS_SEQUENCE if title not in taken]
+
+    semesters = semester_sequence(expected_semesters, start or upcoming_semester())
+    slots, chosen, allowed = _layout(mandatory + electives, len(mandatory), main_needed, thesis, semesters, seasons)
+    if len(chosen) < main_needed:
+        # Too few modules are offered: lay the ones that fit out again so no semester stays empty in between
+        main_needed = len(chosen)
+        slots, chosen, allowed = _layout(
+            chosen, len(set(chosen) & set(mandatory)), main_needed, thesis, semesters, seasons
+        )
+    main_slots = list(range(main_needed))
+
+    assignment = {}
+    remaining = list(chosen)
+    for slot in main_slots:
+        rest = [s for s in main_slots if s > slot]
+        for module in remaining:
+            if allowed(module, slot) and _matchable([m for m in remaining if m != module], rest, allowed):
+                assignment[slot] = module
+                remaining.remove(module)
+                break
+
+    plan = [PlannedSemester(season, year) for season, year in semesters]
+    for slot, module in sorted(assignment.items()):
+        entry = info.get(module, {})
+        plan[slots[slot]].modules.append(PlannedModule(
+            module, entry.get("module_type", "mandatory" if module in MANDATORY_MODULES else "elective"),
+            MODULE_CREDITS, entry.get("module_description", ""),
+        ))
+    for slot, module in zip(slots[main_needed:], thesis):
+        plan[slot].modules.append(PlannedModule(module, "mandatory", thesis_credits[module]))
+
+    planned_credits = sum(semester.credits for semester in plan)
+    return StudyPlan(
+        plan, taken_credits, [m for m in mandatory if m not in chosen],
+        max(TOTAL_CREDITS - taken_credits - planned_credits, 0),
+    )
@@ -0,0 +1,153 @@
+import re
+
+from utils.models import PlannedModule, PlannedSemester, StudyPlan
+from utils.plan_solver import MANDATORY_MODULES, MODULE_CREDITS, SEASONS, THESIS_SEQUENCE, TOTAL_CREDITS
+
+SEMESTER_HEADING = re.compile(r"^\s*[-*]\s*\*\*\s*(Spring|Autumn|Fall)\s+(\d{4})\s*\*\*\s*(?:\(\s*Total Credits:\s*(\d+)\s*\))?", re.IGNORECASE)
+MODULE_LINE = re.compile(
+    r"^\s*[-*]\s*(?:\*\*)?(?P<title>.+?)(?:\*\*)?\s*\((?P<details>(?:mandatory|elective)[^)]*)\)\s*:?\s*(?P<description>.*)$",
+    re.IGNORECASE,
+)
+SECTION_HEADING = re.compile(r"^\s*#{1,6}\s")
+
+
+def module_credits(title):
+    """Credits of a module: 18 for the Master Thesis, 6 for every other module."""
+    return dict(THESIS_SEQUENCE).get(title, MODULE_CREDITS)
+
+
+def parse_study_plan(text):
+    """
+    Read the semester-wise plan back from the markdown written by the study planner agent.
+
+    Only the "Semester-Wise Study Plan" section is read, i.e. the semester
+    lines (- **Spring 2026** (Total Credits: 12):) and their module lines
+    (- Module (Mandatory, Spring): description).
+
+    Returns:
+        tuple: (StudyPlan, declared) where declared maps the index of each
+        semester to the credit total written in the text (None if absent).
+    """
+    semesters, declared = [], {}
+    in_plan = False
+    for line in text.splitlines():
+        if SECTION_HEADING.match(line):
+            in_plan = "study plan" in line.lower()
+            continue
+        if not in_plan:
+            continue
+        heading = SEMESTER_HEADING.match(line)
+        if heading:
+            season = "Autumn" if heading.group(1).lower() in ("autumn", "fall") else "Spring"
+            declared[len(semesters)] = int(heading.group(3)) if heading.group(3) else None
+            semesters.append(PlannedSemester(season, int(heading.group(2))))
+            continue
+        module = MODULE_LINE.match(line)
+        if module and semesters:
+            title = module.group("title").strip()
+            details = module.group("details").lower()
+            module_type = "mandatory" if "mandatory" in details else "elective"
+            semesters[-1].modules.append(
+                PlannedModule(title, module_type, module_credits(title), module.group("description").strip())
+            )
+    return StudyPlan(semesters, 0), declared
+
+
+def violation(rule, message, **details):
+    """Build a machine-readable rule violation."""
+    return {"rule": rule, "message": message, **details}
+
+
+def validate_study_plan(plan, taken_modules, module_seasons=None, expected_semesters=None, declared_credits=None):
+    """
+    Check a study plan against the graduation and scheduling rules.
+
+    Args:
+        plan (StudyPlan): Plan to check.
+        taken_modules (list): Module titles already completed.
+        module_seasons (dict): Module title -> seasons in which it is taught;
+            modules missing from it are not checked.
+        expected_semesters (int): Number of semesters the plan must have.
+        declared_credits (dict): Semester index -> credit total written in the plan.
+
+    Returns:
+        list: Violations, each a dict with a "rule", a "message" and the
+        offending "module" and/or "semester" when relevant. Empty if the plan is valid.
+    """
+    violations = []
+    taken = set(taken_modules or [])
+    module_seasons = module_seasons or {}
+    thesis_titles = [title for title, _ in THESIS_SEQUENCE]
+    placed = {}
+
+    if expected_semesters is not None and len(plan.semesters) != expected_semesters:
+        violations.append(violation(
+            "semester_count", f"The plan has {len(plan.semesters)} semesters instead of {expected_semesters}."
+        ))
+
+    for i, semester in enumerate(plan.semesters):
+        label = f"{semester.season} {semester.year}"
+        if declared_credits and declared_credits.get(i) is not None and declared_credits[i] != semester.credits:
+            violations.append(violation(
+                "semester_credits", f"{label} states {declared_credits[i]} credits but its modules total {semester.credits}.",
+                semester=label,
+            ))
+        for module in semester.modules:
+            if module.title in placed:
+                violations.append(violation("duplicate_module", f"{module.title} is planned more than once.",
+                                            module=module.title, semester=label))
+                continue
+            placed[module.title] = i
+            if module.title in taken:
+                violations.append(violation("already_taken", f"{module.title} has already been completed.",
+                                            module=module.title, semester=label))
+            offered = module_seasons.get(module.title)
+            if module.title not in thesis_titles and offered and semester.season not in offered:
+                violations.append(violation(
+                    "season_availability",
+                    f"{module.title} is only taught in {' and '.join(sorted(offered, key=SEASONS.index))}, not in {label}.",
+                    module=module.title, semester=label,
+                ))
+
+    total = sum(module_credits(m) for m in taken) + plan.planned_credits
+    if total != TOTAL_CREDITS:
+        violations.append(violation(
+            "total_credits", f"Completed and planned modules total {total} credits instead of {TOTAL_CREDITS}."
+        ))
+
+    for title in MANDATORY_MODULES + thesis_titles:
+        if title not in placed and title not in taken:
+            violations.append(violation("missing_mandatory", f"Mandatory module {title} is missing.", module=title))
+
+    # Main modules <= Research Methods <= Master Thesis Proposal < Master Thesis
+    main = [(i, title) for title, i in placed.items() if title not in thesis_titles]
+    research_methods, proposal, thesis = (placed.get(title) for title in thesis_titles)
+    first_thesis = min((i for i in (research_methods, proposal, thesis) if i is not None), default=None)
+    if first_thesis is not None:
+        for i, title in main:
+            if i > first_thesis:
+                violations.append(violation(
+                    "main_after_thesis", f"{title} is planned after the thesis-related modules started.",
+                    module=title, semester=f"{plan.semesters[i].season} {plan.semesters[i].year}",
+                ))
+    order = [(title, i) for title, i in zip(thesis_titles, (research_methods, proposal, thesis)) if i is not None]
+    for (before, i), (after, j) in zip(order, order[1:]):
+        if j < i or (before, after) == ("Master Thesis Proposal", "Master Thesis") and j == i:
+            violations.append(violation(
+                "thesis_order", f"{after} must come after {before}.", module=after,
+            ))
+
+    # Empty semesters are only allowed at the end of the plan, or when none of the later modules could move there:
+    # main modules not taught in their season, thesis-related modules that must follow later main modules
+    last_used = max((i for i, s in enumerate(plan.semesters) if s.modules), default=-1)
+    for i, semester in enumerate(plan.semesters[:last_used]):
+        later_main = [title for j, title in main if j > i]
+        if not semester.modules and (not later_main or any(
+            semester.season in (module_seasons.get(title) or SEASONS) for title in later_main
+        )):
+            violations.append(violation(
+                "empty_semester", f"{semester.season} {semester.year} is empty but later semesters are not.",
+                semester=f"{semester.season} {semester.year}",
+            ))
+
+    return violations
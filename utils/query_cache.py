@@ -0,0 +1,131 @@
+import copy
+import functools
+import threading
+import time
+from collections import OrderedDict
+
+import streamlit as st
+
+# Seconds between two checks of the graph version stamp written by esco/graph.py
+VERSION_CHECK_INTERVAL = 30
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+class QueryCache:
+    """Size-bounded LRU cache with per-entry TTLs, invalidated when the graph version changes."""
+
+    def __init__(self, max_entries=256):
+        """
+        Initialize an empty cache.
+
+        Args:
+            max_entries (int): Maximum number of cached results before the least recently used is evicted.
+        """
+        self.max_entries = max_entries
+        self.version = None
+        self.version_checked_at = 0.0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """
+        Look up a cached result.
+
+        Returns:
+            tuple: (hit, value). The value is a copy, so callers may mutate it.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] < time.monotonic():
+                del self._entries[key]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return False, None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return True, copy.deepcopy(entry[1])
+
+    def put(self, key, value, ttl):
+        """Store a result for `ttl` seconds, evicting the least recently used entries if full."""
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, copy.deepcopy(value))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self):
+        """Drop every cached result."""
+        with self._lock:
+            self._entries.clear()
+
+    def version_check_due(self):
+        """Tell whether the graph version stamp should be fetched again."""
+        return time.monotonic() - self.version_checked_at > VERSION_CHECK_INTERVAL
+
+    def sync_version(self, version):
+        """Record the current graph version, dropping every result cached for an older one."""
+        with self._lock:
+            self.version_checked_at = time.monotonic()
+            if version != self.version:
+                self._entries.clear()
+                self.version = version
+
+    def stats(self):
+        """Return the hit/miss counters of the cache."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "graph_version": self.version,
+            }
+
+
+def get_query_cache():
+    """Return the process-wide GraphDB query cache."""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = QueryCache(int(st.secrets.get("GRAPHDB_CACHE_SIZE", 256)))
+    return _cache
+
+
+def cached_query(ttl):
+    """
+    Cache the result of a GraphDB query method for `ttl` seconds.
+
+    The cache key is made of the method name and its (hashable) arguments;
+    results are dropped as soon as the graph version stamp changes. Works for
+    both the blocking and the asyncio accessors, through their `_then` and
+    `_resolved` hooks.
+    """
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self, *args):
+            cache = self.cache
+            key = (method.__name__, args)
+
+            def store(value):
+                cache.put(key, value, ttl)
+                return value
+
+            def lookup():
+                hit, value = cache.get(key)
+                if hit:
+                    return self._resolved(value)
+                return self._then(method(self, *args), store)
+
+            return self._then(self.current_graph_version(), lambda version: lookup())
+        return wrapper
+    return decorator
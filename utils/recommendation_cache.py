@@ -0,0 +1,199 @@
+import copy
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+
+import streamlit as st
+
+DEFAULT_CACHE_DIRECTORY = ".cache/recommendations"
+DEFAULT_MAX_BYTES = 50 * 1024 * 1024
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def profile_fingerprint(student, work_experiences, retrieval_strategy, graph_version, start_semester=None,
+                        options=None):
+    """
+    Hash everything a recommendation depends on.
+
+    Args:
+        student (Student): Profile of the student.
+        work_experiences (list): Work experience rows of the student.
+        retrieval_strategy (str): Selected retrieval strategy.
+        graph_version (str): Current graph version stamp.
+        start_semester (tuple): (season, year) of the first planned semester,
+            for results that depend on it such as study plans.
+        options (dict): Other settings the result depends on, e.g. the workflow mode.
+
+    Returns:
+        str: Hex digest, identical for identical inputs.
+    """
+    payload = {
+        "student": student.to_dict(),
+        "work_experiences": sorted(work_experiences or [], key=lambda we: str(we.get("id"))),
+        "retrieval_strategy": retrieval_strategy,
+        "graph_version": graph_version,
+        "start_semester": list(start_semester) if start_semester else None,
+        "options": options or {},
+    }
+    encoded = json.dumps(payload, sort_keys=True, default=str).encode("utf-8")
+    return hashlib.sha256(encoded).hexdigest()
+
+
+class MemoryRecommendationCache:
+    """Process-local recommendation cache, evicting the least recently used entries."""
+
+    def __init__(self, max_entries=512):
+        """
+        Initialize an empty cache.
+
+        Args:
+            max_entries (int): Maximum number of cached results.
+        """
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, student_id, kind, fingerprint):
+        """Return a copy of the cached `kind` result ("retrieval", "plan") for the fingerprint, or None."""
+        key = (student_id, kind, fingerprint)
+        with self._lock:
+            if key not in self._entries:
+                return None
+            self._entries.move_to_end(key)
+            return copy.deepcopy(self._entries[key])
+
+    def put(self, student_id, kind, fingerprint, value):
+        """Store a JSON-serializable result."""
+        key = (student_id, kind, fingerprint)
+        with self._lock:
+            self._entries[key] = copy.deepcopy(value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, student_id):
+        """Drop every result cached for a student."""
+        with self._lock:
+            for key in [key for key in self._entries if key[0] == student_id]:
+                del self._entries[key]
+
+
+class DiskRecommendationCache:
+    """
+    Recommendation cache persisted as JSON files, one directory per student.
+
+    When the files exceed `max_bytes`, the least recently used ones are
+    deleted (reads refresh a file's modification time).
+    """
+
+    def __init__(self, directory=DEFAULT_CACHE_DIRECTORY, max_bytes=DEFAULT_MAX_BYTES):
+        """
+        Initialize the cache.
+
+        Args:
+            directory (str): Cache directory, created if missing.
+            max_bytes (int): Maximum total size of the cached files.
+        """
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def _student_directory(self, student_id):
+        return os.path.join(self.directory, hashlib.sha256(str(student_id).encode("utf-8")).hexdigest()[:16])
+
+    def _path(self, student_id, kind, fingerprint):
+        return os.path.join(self._student_directory(student_id), f"{kind}-{fingerprint}.json")
+
+    def get(self, student_id, kind, fingerprint):
+        """Return the cached `kind` result ("retrieval", "plan") for the fingerprint, or None."""
+        path = self._path(student_id, kind, fingerprint)
+        with self._lock:
+            try:
+                with open(path, encoding="utf-8") as f:
+                    value = json.load(f)
+                os.utime(path)
+                return value
+            except (OSError, ValueError):
+                return None
+
+    def put(self, student_id, kind, fingerprint, value):
+        """Store a JSON-serializable result, then evict old files if the cache is over its size."""
+        path = self._path(student_id, kind, fingerprint)
+        with self._lock:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(value, f, ensure_ascii=False)
+            os.replace(tmp_path, path)
+            self._evict()
+
+    def invalidate(self, student_id):
+        """Drop every result cached for a student."""
+        directory = self._student_directory(student_id)
+        with self._lock:
+            if not os.path.isdir(directory):
+                return
+            for name in os.listdir(directory):
+                try:
+                    os.remove(os.path.join(directory, name))
+                except OSError:
+                    pass
+
+    def size(self):
+        """Total size in bytes of the cached files."""
+        return sum(size for _, _, size in self._files())
+
+    def _files(self):
+        files = []
+        for root, _, names in os.walk(self.directory):
+            for name in names:
+                if not name.endswith(".json"):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                files.append((stat.st_mtime, path, stat.st_size))
+        return files
+
+    def _evict(self):
+        files = sorted(self._files())
+        total = sum(size for _, _, size in files)
+        for _, path, size in files:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                pass
+
+
+def get_recommendation_cache():
+    """Return the process-wide recommendation cache of the configured backend ("memory" or "disk")."""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                if st.secrets.get("RECOMMENDATION_CACHE", "memory") == "disk":
+                    _cache = DiskRecommendationCache(
+                        st.secrets.get("RECOMMENDATION_CACHE_DIR", DEFAULT_CACHE_DIRECTORY),
+                        int(st.secrets.get("RECOMMENDATION_CACHE_MAX_BYTES", DEFAULT_MAX_BYTES)),
+                    )
+                else:
+                    _cache = MemoryRecommendationCache()
+    return _cache
+
+
+def invalidate_student_recommendations(student_id):
+    """Drop the cached recommendations of a student after their profile changed."""
+    try:
+        get_recommendation_cache().invalidate(student_id)
+    except Exception as e:
+        print(e)
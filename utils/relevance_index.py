@@ -0,0 +1,213 @@
+import argparse
+import json
+import os
+import threading
+
+import numpy as np
+import streamlit as st
+
+from utils.embedded_graph import EX, DEFAULT_GRAPH_FILES, EmbeddedGraph
+
+DEFAULT_INDEX_DIRECTORY = "esco/relevance_index"
+VOCABULARY_FILE = "vocabulary.json"
+ARRAYS = (
+    "occupation_offsets", "module_ids", "shared_skills", "essential_skills", "optional_skills",
+    "lo_offsets", "lo_ids", "skill_offsets", "skill_ids",
+)
+
+_index = None
+# Modification time of the vocabulary file the index was read from, None if there was none
+_index_mtime = None
+_index_lock = threading.Lock()
+
+
+def build_relevance_index(graph, directory):
+    """
+    Precompute, for every occupation, the modules developing its required skills.
+
+    The index is stored in `directory` as one .npy file per array, in a CSR
+    layout: the entries of occupation i are rows occupation_offsets[i] to
+    occupation_offsets[i + 1], sorted by shared skill count. Names and texts go
+    to a JSON vocabulary.
+
+    Args:
+        graph (EmbeddedGraph): Graph holding the triples generated by esco/graph.py.
+        directory (str): Output directory, created if missing.
+
+    Returns:
+        int: Number of (occupation, module) entries written.
+    """
+    occupations = {}
+    for o in graph.instances(EX.Occupation):
+        name = graph.value(o, EX.occupation)
+        if name is None:
+            continue
+        skills = occupations.setdefault(name, {"essential": set(), "optional": set()})
+        skills["essential"].update(graph.objects(o, EX.requiresSkill_essential))
+        skills["optional"].update(graph.objects(o, EX.requiresSkill_optional))
+
+    module_ids, modules = {}, []
+    lo_ids, learning_outcomes = {}, []
+    skill_ids, skills_vocabulary = {}, []
+
+    def vocabulary_id(ids, vocabulary, key, value):
+        if key not in ids:
+            ids[key] = len(vocabulary)
+            vocabulary.append(value)
+        return ids[key]
+
+    occupation_names = sorted(occupations)
+    columns = {name: [] for name in ARRAYS}
+    columns["occupation_offsets"].append(0)
+    columns["lo_offsets"].append(0)
+    columns["skill_offsets"].append(0)
+
+    for name in occupation_names:
+        required = occupations[name]
+        entries = {}
+        for skill in required["essential"] | required["optional"]:
+            skill_title = graph.value(skill, EX.title)
+            if skill_title is None:
+                continue
+            for lo in graph.subjects(EX.hasSkill, graph.term(skill)):
+                lo_text = graph.value(lo, EX.learningOutcome)
+                if lo_text is None:
+                    continue
+                for m in graph.subjects(EX.hasLearningOutcome, graph.term(lo)):
+                    title, module_type = graph.value(m, EX.moduleTitle), graph.value(m, EX.moduleType)
+                    if title is None or module_type is None:
+                        continue
+                    module = vocabulary_id(module_ids, modules, (title, module_type), [title, module_type])
+                    entry = entries.setdefault(module, {"skills": set(), "essential": set(), "los": set()})
+                    skill_id = vocabulary_id(skill_ids, skills_vocabulary, skill, skill_title)
+                    entry["skills"].add(skill_id)
+                    if skill in required["essential"]:
+                        entry["essential"].add(skill_id)
+                    entry["los"].add(vocabulary_id(lo_ids, learning_outcomes, lo, lo_text))
+
+        ordered = sorted(entries.items(), key=lambda item: (-len(item[1]["skills"]), modules[item[0]][0]))
+        for module, entry in ordered:
+            columns["module_ids"].append(module)
+            columns["shared_skills"].append(len(entry["skills"]))
+            columns["essential_skills"].append(len(entry["essential"]))
+            columns["optional_skills"].append(len(entry["skills"]) - len(entry["essential"]))
+            columns["lo_ids"].extend(sorted(entry["los"]))
+            columns["lo_offsets"].append(len(columns["lo_ids"]))
+            columns["skill_ids"].extend(sorted(entry["skills"]))
+            columns["skill_offsets"].append(len(columns["skill_ids"]))
+        columns["occupation_offsets"].append(len(columns["module_ids"]))
+
+    os.makedirs(directory, exist_ok=True)
+    for name in ARRAYS:
+        dtype = np.int64 if name.endswith("offsets") else np.int32
+        _replace(os.path.join(directory, f"{name}.npy"), lambda f: np.save(f, np.asarray(columns[name], dtype=dtype)))
+
+    version = graph.id(EX.GraphMetadata)
+    vocabulary = {
+        "graph_version": graph.value(version, EX.graphVersion) if version is not None else None,
+        "occupations": occupation_names,
+        "modules": modules,
+        "learning_outcomes": learning_outcomes,
+        "skills": skills_vocabulary,
+    }
+    # Written last: a running app reloads the index when the vocabulary changes
+    _replace(os.path.join(directory, VOCABULARY_FILE),
+             lambda f: f.write(json.dumps(vocabulary, ensure_ascii=False).encode("utf-8")))
+    return len(columns["module_ids"])
+
+
+def _replace(path, write):
+    """Write a file through a temporary one, so that an app mapping the old file keeps reading it intact."""
+    with open(path + ".tmp", "wb") as f:
+        write(f)
+    os.replace(path + ".tmp", path)
+
+
+class RelevanceIndex:
+    """Read side of the occupation -> module relevance index, memory-mapped from disk."""
+
+    def __init__(self, directory):
+        """
+        Load the index written by build_relevance_index.
+
+        Args:
+            directory (str): Directory holding the .npy arrays and the vocabulary.
+        """
+        with open(os.path.join(directory, VOCABULARY_FILE), encoding="utf-8") as f:
+            vocabulary = json.load(f)
+        self.graph_version = vocabulary["graph_version"]
+        self.occupations = {name: i for i, name in enumerate(vocabulary["occupations"])}
+        self.modules = vocabulary["modules"]
+        self.learning_outcomes = vocabulary["learning_outcomes"]
+        self.skills = vocabulary["skills"]
+        for name in ARRAYS:
+            setattr(self, name, np.load(os.path.join(directory, f"{name}.npy"), mmap_mode="r"))
+
+    def modules_by_occupation(self, occupations, taken_modules=None):
+        """
+        Same rows as GraphDbMethods.get_modules_by_occupation, plus the essential/optional skill split.
+
+        Only the entries of the requested occupations are read, so the cost is
+        proportional to the size of the result.
+        """
+        taken = set(taken_modules or [])
+        rows = []
+        for name in sorted(set(occupations)):
+            i = self.occupations.get(name)
+            if i is None:
+                continue
+            for entry in range(self.occupation_offsets[i], self.occupation_offsets[i + 1]):
+                title, module_type = self.modules[self.module_ids[entry]]
+                if title in taken:
+                    continue
+                los = self.lo_ids[self.lo_offsets[entry]:self.lo_offsets[entry + 1]]
+                skills = self.skill_ids[self.skill_offsets[entry]:self.skill_offsets[entry + 1]]
+                rows.append({
+                    "module": {"module_title": title, "module_type": module_type},
+                    "occupation": {"occupation": name},
+                    "shared_skills": int(self.shared_skills[entry]),
+                    "essential_skills": int(self.essential_skills[entry]),
+                    "optional_skills": int(self.optional_skills[entry]),
+                    "supporting_learning_outcomes": [self.learning_outcomes[lo] for lo in los],
+                    "supported_skills": [self.skills[skill] for skill in skills],
+                })
+        return rows
+
+
+def get_relevance_index(graph_version=None):
+    """
+    Return the process-wide relevance index, or None if it has not been built.
+
+    As long as the loaded index was not built from `graph_version`, the index
+    directory is read again whenever its vocabulary file changes, so an index
+    rebuilt after populating the graph again is used without a restart.
+    """
+    global _index, _index_mtime
+    if _index is not None and graph_version in (None, _index.graph_version):
+        return _index
+    directory = st.secrets.get("RELEVANCE_INDEX_DIR", DEFAULT_INDEX_DIRECTORY)
+    path = os.path.join(directory, VOCABULARY_FILE)
+    mtime = os.stat(path).st_mtime_ns if os.path.exists(path) else None
+    if mtime != _index_mtime:
+        with _index_lock:
+            if mtime != _index_mtime:
+                _index = RelevanceIndex(directory) if mtime is not None else None
+                _index_mtime = mtime
+    return _index
+
+
+def main():
+    """Build the relevance index from the snapshot written by esco/graph.py"""
+    parser = argparse.ArgumentParser(description="Build the occupation -> module relevance index.")
+    parser.add_argument("graph_files", nargs="*", default=DEFAULT_GRAPH_FILES,
+                        help="RDF files holding the generated graph")
+    parser.add_argument("--output", default=DEFAULT_INDEX_DIRECTORY, help="Index directory")
+    args = parser.parse_args()
+
+    graph = EmbeddedGraph.from_files(args.graph_files)
+    entries = build_relevance_index(graph, args.output)
+    print(f"✅ Relevance index with {entries} entries written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
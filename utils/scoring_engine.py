@@ -0,0 +1,71 @@
+import numpy as np
+
+
+class ScoringEngine:
+    """
+    Combines the module scores of several retrieval strategies.
+
+    Module titles are mapped to integer indices once; each strategy's
+    contribution is kept as a NumPy vector over those indices, so adding a
+    strategy costs O(rows) and combining them costs O(strategies x modules).
+    """
+
+    def __init__(self, modules):
+        """
+        Initialize the engine on the modules that can be recommended.
+
+        Args:
+            modules (list): Rows shaped like GraphDbMethods.get_module_overview(),
+                i.e. {"module": {"module_title", "module_type"}, ...}.
+        """
+        self.modules = modules
+        self.index = {}
+        for i, m in enumerate(modules):
+            self.index.setdefault(m["module"]["module_title"], i)
+        self.contributions = {}
+
+    def add_strategy(self, name, rows, score=lambda row: 1.0):
+        """
+        Record the contribution of a strategy.
+
+        Args:
+            name (str): Strategy name, used to look up its weight.
+            rows (list): Scored rows returned by the strategy; each must have a
+                "module" dict with a "module_title". A module appearing in several
+                rows accumulates their scores.
+            score (callable): Extracts the score of a row (defaults to 1 per row).
+        """
+        positions, values = [], []
+        for row in rows:
+            i = self.index.get(row["module"]["module_title"])
+            if i is not None:
+                positions.append(i)
+                values.append(score(row))
+        vector = np.zeros(len(self.modules))
+        np.add.at(vector, np.asarray(positions, dtype=np.intp), np.asarray(values, dtype=float))
+        self.contributions[name] = vector
+
+    def combine(self, weights):
+        """Return the weighted sum of the strategy vectors; strategies without a weight are ignored."""
+        total = np.zeros(len(self.modules))
+        for name, vector in self.contributions.items():
+            total += weights.get(name, 0.0) * vector
+        return total
+
+    def top_k(self, weights, k=None):
+        """
+        Rank the modules by their combined score.
+
+        Args:
+            weights (dict): Strategy name -> weight.
+            k (int): Number of modules to return, all of them if None.
+
+        Returns:
+            list: Copies of the module rows with their "score", best first. Ties
+            keep the order of the modules given to the engine.
+        """
+        scores = self.combine(weights)
+        order = np.argsort(-scores, kind="stable")
+        if k is not None:
+            order = order[:k]
+        return [{**self.modules[i], "score": float(scores[i])} for i in order]
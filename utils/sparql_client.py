@@ -0,0 +1,160 @@
+import asyncio
+import threading
+import weakref
+
+import httpx
+import requests
+import streamlit as st
+from requests.adapters import HTTPAdapter
+
+from utils.tracing import start_span
+
+SPARQL_RESULTS_JSON = "application/sparql-results+json"
+
+_client = None
+_client_lock = threading.Lock()
+# httpx.AsyncClient is bound to the event loop that created it, and Streamlit
+# runs every agent workflow in its own loop, so one client is kept per loop.
+_async_clients = weakref.WeakKeyDictionary()
+
+
+class SparqlClient:
+    """Thread-safe SPARQL client backed by a keep-alive HTTP connection pool."""
+
+    def __init__(self, endpoint, username=None, password=None,
+                 pool_size=10, connect_timeout=5.0, read_timeout=60.0, update_endpoint=None):
+        """
+        Initialize the client and its pooled HTTP session.
+
+        Args:
+            endpoint (str): SPARQL query endpoint of the GraphDB repository.
+            username (str): Optional username for basic authentication.
+            password (str): Optional password for basic authentication.
+            pool_size (int): Maximum number of kept-alive connections to GraphDB.
+            connect_timeout (float): Seconds to wait for a connection to be established.
+            read_timeout (float): Seconds to wait for GraphDB to answer a query.
+            update_endpoint (str): SPARQL update endpoint, defaults to `<endpoint>/statements`.
+        """
+        self.endpoint = endpoint
+        self.update_endpoint = update_endpoint or endpoint.rstrip("/") + "/statements"
+        self.timeout = (connect_timeout, read_timeout)
+
+        self.session = requests.Session()
+        if username and password:
+            self.session.auth = (username, password)
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, pool_block=True)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def _post(self, url, data, accept=None):
+        headers = {"Accept": accept} if accept else {}
+        with _graphdb_span(data) as span:
+            response = self.session.post(url, data=data, headers=headers, timeout=self.timeout)
+            span.set(status_code=response.status_code, response_bytes=len(response.content))
+            response.raise_for_status()
+        return response
+
+    def select(self, query_str):
+        """Execute a SPARQL SELECT query and return the result bindings."""
+        response = self._post(self.endpoint, {"query": query_str}, SPARQL_RESULTS_JSON)
+        return response.json()["results"]["bindings"]
+
+    def ask(self, query_str):
+        """Execute a SPARQL ASK query and return its boolean answer."""
+        response = self._post(self.endpoint, {"query": query_str}, SPARQL_RESULTS_JSON)
+        return response.json()["boolean"]
+
+    def update(self, query_str):
+        """Execute a SPARQL UPDATE query (INSERT/DELETE)."""
+        self._post(self.update_endpoint, {"update": query_str})
+
+    def close(self):
+        """Close every pooled connection."""
+        self.session.close()
+
+
+class AsyncSparqlClient:
+    """asyncio SPARQL client backed by a keep-alive HTTP connection pool."""
+
+    def __init__(self, endpoint, username=None, password=None,
+                 pool_size=10, connect_timeout=5.0, read_timeout=60.0, update_endpoint=None):
+        """Initialize the client; arguments are the same as SparqlClient's."""
+        self.endpoint = endpoint
+        self.update_endpoint = update_endpoint or endpoint.rstrip("/") + "/statements"
+        self.session = httpx.AsyncClient(
+            auth=(username, password) if username and password else None,
+            limits=httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size),
+            timeout=httpx.Timeout(read_timeout, connect=connect_timeout),
+        )
+
+    async def _post(self, url, data, accept=None):
+        headers = {"Accept": accept} if accept else {}
+        with _graphdb_span(data) as span:
+            response = await self.session.post(url, data=data, headers=headers)
+            span.set(status_code=response.status_code, response_bytes=len(response.content))
+            response.raise_for_status()
+        return response
+
+    async def select(self, query_str):
+        """Execute a SPARQL SELECT query and return the result bindings."""
+        response = await self._post(self.endpoint, {"query": query_str}, SPARQL_RESULTS_JSON)
+        return response.json()["results"]["bindings"]
+
+    async def ask(self, query_str):
+        """Execute a SPARQL ASK query and return its boolean answer."""
+        response = await self._post(self.endpoint, {"query": query_str}, SPARQL_RESULTS_JSON)
+        return response.json()["boolean"]
+
+    async def update(self, query_str):
+        """Execute a SPARQL UPDATE query (INSERT/DELETE)."""
+        await self._post(self.update_endpoint, {"update": query_str})
+
+    async def close(self):
+        """Close every pooled connection."""
+        await self.session.aclose()
+
+
+def _graphdb_span(data):
+    """Span of a request to GraphDB, named after the request ("graphdb.query" or "graphdb.update")."""
+    operation, text = next(iter(data.items()))
+    return start_span(f"graphdb.{operation}", "graphdb", request_bytes=len(text.encode("utf-8")))
+
+
+def _client_settings():
+    """Read the GraphDB connection settings from the Streamlit secrets."""
+    return {
+        "endpoint": st.secrets["GRAPHDB_ENDPOINT"],
+        "username": st.secrets["GRAPHDB_USERNAME"],
+        "password": st.secrets["GRAPHDB_PASSWORD"],
+        "pool_size": int(st.secrets.get("GRAPHDB_POOL_SIZE", 10)),
+        "connect_timeout": float(st.secrets.get("GRAPHDB_CONNECT_TIMEOUT", 5)),
+        "read_timeout": float(st.secrets.get("GRAPHDB_READ_TIMEOUT", 60)),
+        "update_endpoint": st.secrets.get("GRAPHDB_UPDATE_ENDPOINT"),
+    }
+
+
+def get_sparql_client():
+    """Return the process-wide SPARQL client, creating it on first use."""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = SparqlClient(**_client_settings())
+    return _client
+
+
+def get_async_sparql_client():
+    """Return the asyncio SPARQL client of the running event loop, creating it on first use."""
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None:
+        client = AsyncSparqlClient(**_client_settings())
+        _async_clients[loop] = client
+    return client
+
+
+async def aclose_async_sparql_client():
+    """Close the asyncio SPARQL client of the running event loop, if it has one; call it before the loop ends."""
+    client = _async_clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.close()
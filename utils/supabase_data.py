@@ -0,0 +1,80 @@
+import threading
+
+
+class SupabaseData:
+    """
+    Rows read from Supabase for one session, each fetched at most once per run
+    of the script.
+
+    Writes are optimistic: the rows are changed locally right away and the
+    write is sent in the background. Until it lands, the changed rows are kept
+    across reruns, since reading them again could miss the write; a failed
+    write drops them so that the next run reads what was actually stored.
+    """
+
+    def __init__(self):
+        self._rows = {}
+        # Key -> number of writes in flight
+        self._writes = {}
+        self._notifications = []
+        # Writes finish on the writer threads
+        self._lock = threading.Lock()
+
+    def begin_request(self):
+        """Forget the rows read by the previous run of the script, except those with writes in flight."""
+        with self._lock:
+            for key in list(self._rows):
+                if not self._writes.get(key):
+                    del self._rows[key]
+
+    def get(self, key, fetch):
+        """Return the rows stored under `key`, calling `fetch()` the first time."""
+        with self._lock:
+            if key in self._rows:
+                return self._rows[key]
+        rows = fetch()
+        with self._lock:
+            return self._rows.setdefault(key, rows)
+
+    def invalidate(self, *keys):
+        """Forget the rows of `keys`, all of them if none is given."""
+        with self._lock:
+            for key in keys or list(self._rows):
+                self._rows.pop(key, None)
+
+    def begin_write(self, key, apply=None):
+        """
+        Count a write of the rows of `key` in flight.
+
+        Args:
+            key (str): Rows written.
+            apply (callable): Optimistic update, called with the current rows
+                (None if not read yet) and returning the new ones.
+        """
+        with self._lock:
+            self._writes[key] = self._writes.get(key, 0) + 1
+            if apply is not None:
+                self._rows[key] = apply(self._rows.get(key))
+
+    def end_write(self, key, label, error=None):
+        """Record the outcome of a write of the rows of `key`, reported to the user as `label` saved or failed."""
+        with self._lock:
+            self._writes[key] -= 1
+            if not self._writes[key]:
+                del self._writes[key]
+            if error is None:
+                self._notifications.append((f"{label} saved", "✅"))
+            else:
+                self._rows.pop(key, None)
+                self._notifications.append((f"{label} could not be saved: {error}", "❌"))
+
+    def pending_writes(self, key):
+        """Number of writes of the rows of `key` in flight."""
+        with self._lock:
+            return self._writes.get(key, 0)
+
+    def pop_notifications(self):
+        """(message, icon) of the writes finished since the last call."""
+        with self._lock:
+            notifications, self._notifications = self._notifications, []
+        return notifications
@@ -1,14 +1,72 @@
-import time
+import functools
+import uuid
 from datetime import date
 
 import streamlit as st
+from streamlit.runtime.scriptrunner import get_script_run_ctx
 from supabase import Client
 from utils.auth import get_supabase
+from utils.background_writes import get_background_writer
 from utils.models import Student
+from utils.recommendation_cache import invalidate_student_recommendations
+from utils.supabase_data import SupabaseData
+from utils.tracing import traced
 
 supabase: Client = get_supabase()
 
+_DATA_KEY = "supabase_data"
+
+# ----- #
+# Request-scoped data
+# ----- #
+
+def begin_data_request():
+    """
+    Start a new run of the script: rows are read again, except those with
+    writes in flight, and the writes finished since the last run are reported.
+    """
+    data = _request_data()
+    if data is None:
+        return
+    data.begin_request()
+    for message, icon in data.pop_notifications():
+        st.toast(message, icon=icon)
+
+def _request_data():
+    # Outside of the script thread (background jobs) every call goes to Supabase
+    if get_script_run_ctx() is None:
+        return None
+    if _DATA_KEY not in st.session_state:
+        st.session_state[_DATA_KEY] = SupabaseData()
+    return st.session_state[_DATA_KEY]
+
+def _read(key, fetch):
+    data = _request_data()
+    return fetch() if data is None else data.get(key, fetch)
+
+def _write(key, label, write, apply=None):
+    """
+    Apply a change to the rows of `key` locally with `apply(rows)` and send
+    `write()` to Supabase in the background, retried on network errors. The
+    outcome is shown as a toast on the next run of the script.
+    """
+    data = _request_data()
+    on_done = None
+    if data is not None:
+        data.begin_write(key, apply)
+        on_done = functools.partial(data.end_write, key, label)
+    get_background_writer().submit(get_user().id, write, on_done)
+    st.toast(f"Saving {label.lower()}...", icon="⏳")
+
+# ----- #
+# Reads and writes
+# ----- #
+
 def get_student():
+    return _read("student", _fetch_student)
+
+@traced("supabase")
+def _fetch_student():
     user = get_user()
     response = supabase.table('student').select('*').eq('id', user.id).execute()
     if len(response.data) == 0:
@@ -17,28 +75,25 @@ def get_student():
     return student
 
 def create_student(student: Student):
-    user = get_user()
-    try:
-        student.id = user.id
+    student.id = get_user().id
+
+    def write():
         supabase.table("student").insert(student.to_dict()).execute()
-        success = st.success("Student created successfully!")
-        time.sleep(3)
-        success.empty()
-    except Exception as e:
-        print(e)
-        st.error("Creation failed: " + str(e))
+
+    _write("student", "Profile", write, lambda _: student)
 
 def update_student(student: Student):
-    try:
+    def write():
         supabase.table("student").update(student.to_dict()).eq("id", student.id).execute()
-        success = st.success("Student updated successfully!")
-        time.sleep(3)
-        success.empty()
-    except Exception as e:
-        print(e)
-        st.error("Update failed: " + str(e))
+        invalidate_student_recommendations(student.id)
+
+    _write("student", "Profile", write, lambda _: student)
 
 def get_work_experience():
+    return _read("work_experience", _fetch_work_experience)
+
+@traced("supabase")
+def _fetch_work_experience():
     user = get_user()
     response = supabase.from_('work_experience').select('company_name, occupation, start_date, end_date, current_work, id, part_time').eq('user_id', user.id).order("start_date", desc=True).execute()
     return response.data
@@ -49,44 +104,72 @@ def has_work_experience():
 
 def add_work_experience(company_name: str, occupation: str, start_date: date, end_date: date, current_work: bool, part_time: bool):
     user = get_user()
-    try:
-        we = {
-            'company_name': company_name,
-            'occupation': occupation,
-            'start_date': start_date.strftime('%Y-%m-%d'),
-            'end_date': None if current_work else end_date.strftime('%Y-%m-%d'),
-            'current_work': current_work,
-            'user_id': user.id,
-            'part_time': part_time
-        }
+    we = {
+        'company_name': company_name,
+        'occupation': occupation,
+        'start_date': start_date.strftime('%Y-%m-%d'),
+        'end_date': None if current_work else end_date.strftime('%Y-%m-%d'),
+        'current_work': current_work,
+        'user_id': user.id,
+        'part_time': part_time
+    }
+    # Shown until the next read returns the stored row with its id
+    row = {key: value for key, value in we.items() if key != 'user_id'}
+    row.update(id=f"pending-{uuid.uuid4()}", pending=True)
+
+    def add(rows):
+        rows.append(row)
+        rows.sort(key=lambda r: r['start_date'], reverse=True)
+        return rows
+
+    def write():
         supabase.from_('work_experience').insert(we).execute()
-        st.rerun()
-    except Exception as e:
-        print(e)
-        st.error("Insertion failed: " + str(e))
+        invalidate_student_recommendations(user.id)
+
+    get_work_experience()
+    _write("work_experience", "Work experience", write, add)
 
 def update_work_experience(company_name: str, occupation: str, start_date: date, end_date: date, current_work: bool, we_id: str):
-    try:
-        we = {
-            'company_name': company_name,
-            'occupation': occupation,
-            'start_date': start_date.strftime('%Y-%m-%d'),
-            'end_date': None if current_work else end_date.strftime('%Y-%m-%d'),
-            'current_work': current_work,
-        }
+    user = get_user()
+    we = {
+        'company_name': company_name,
+        'occupation': occupation,
+        'start_date': start_date.strftime('%Y-%m-%d'),
+        'end_date': None if current_work else end_date.strftime('%Y-%m-%d'),
+        'current_work': current_work,
+    }
+
+    def update(rows):
+        for row in rows:
+            if row['id'] == we_id:
+                row.update(we)
+        rows.sort(key=lambda r: r['start_date'], reverse=True)
+        return rows
+
+    def write():
         supabase.from_('work_experience').update(we).eq('id', we_id).execute()
-        st.rerun()
-    except Exception as e:
-        print(e)
-        st.error("Update failed: " + str(e))
+        invalidate_student_recommendations(user.id)
+
+    get_work_experience()
+    _write("work_experience", "Work experience", write, update)
 
 def delete_work_experience(we_id: str):
-    try:
+    user = get_user()
+
+    def delete(rows):
+        rows[:] = [row for row in rows if row['id'] != we_id]
+        return rows
+
+    def write():
         supabase.from_('work_experience').delete().eq('id', we_id).execute()
-        st.rerun()
-    except Exception as e:
-        print(e)
-        st.error("Deletion failed: " + str(e))
+        invalidate_student_recommendations(user.id)
+
+    get_work_experience()
+    _write("work_experience", "Work experience", write, delete)
 
 def get_user():
+    return _read("user", _fetch_user)
+
+@traced("supabase")
+def _fetch_user():
     return supabase.auth.get_user().user
@@ -0,0 +1,140 @@
+import re
+
+DAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+MINUTES_PER_DAY = 24 * 60
+DEFAULT_LIMIT = 20
+
+TIME_RANGE = re.compile(r"^\s*(\d{1,2})[:.](\d{2})\s*-\s*(\d{1,2})[:.](\d{2})\s*$")
+
+
+def parse_time_range(time):
+    """
+    Parse a teaching session time such as "13:15-17:00".
+
+    Returns:
+        tuple: (start, end) in minutes since midnight, or None if the text is not a time range.
+    """
+    match = TIME_RANGE.match(str(time))
+    if match is None:
+        return None
+    start_hour, start_minute, end_hour, end_minute = (int(group) for group in match.groups())
+    start, end = start_hour * 60 + start_minute, end_hour * 60 + end_minute
+    if end <= start or end > MINUTES_PER_DAY:
+        return None
+    return start, end
+
+
+def day_index(day):
+    """Index of a day name in DAYS (Monday = 0), or None."""
+    day = str(day).strip().capitalize()
+    return DAYS.index(day) if day in DAYS else None
+
+
+def session_mask(day, time):
+    """
+    Bitmask of the minutes of the week taken by a session.
+
+    Bit d * 1440 + m is set for minute m of day d (Monday = 0). Sessions
+    whose day or time cannot be parsed get an empty mask, i.e. never conflict.
+    """
+    index, time_range = day_index(day), parse_time_range(time)
+    if index is None or time_range is None:
+        return 0
+    return _mask(index, *time_range)
+
+
+def _mask(index, start, end):
+    return ((1 << (end - start)) - 1) << (index * MINUTES_PER_DAY + start)
+
+
+def teaching_session_mask(ts):
+    """Bitmask of a teaching session, from its typed day_of_week/start_minute/end_minute when the graph has them."""
+    if all(ts.get(key) is not None for key in ("day_of_week", "start_minute", "end_minute")):
+        return _mask(ts["day_of_week"], ts["start_minute"], ts["end_minute"])
+    return session_mask(ts.get("day", ""), ts.get("time", ""))
+
+
+def module_groups(teaching_sessions):
+    """
+    Group the teaching sessions of each module by group name.
+
+    Args:
+        teaching_sessions (list): Output of GraphDbMethods.get_teaching_sessions_by_modules.
+
+    Returns:
+        list: (module title, [(group name, mask, sessions)]) for every module with sessions.
+    """
+    modules = []
+    for module in teaching_sessions:
+        groups = {}
+        for ts in module["teaching_session"]:
+            group_name = str(ts.get("group_name", "")).strip()
+            mask, sessions = groups.get(group_name, (0, []))
+            groups[group_name] = (mask | teaching_session_mask(ts), sessions + [ts])
+        if groups:
+            modules.append((module["module_title"], [(name, mask, sessions) for name, (mask, sessions) in groups.items()]))
+    return modules
+
+
+def _session_order(session):
+    index = day_index(session["day"])
+    time_range = parse_time_range(session["time"]) or (0, 0)
+    return len(DAYS) if index is None else index, time_range[0], session["module_title"]
+
+
+def enumerate_timetables(teaching_sessions, limit=DEFAULT_LIMIT):
+    """
+    Enumerate the conflict-free weekly timetables of a semester.
+
+    A timetable picks one group per module so that no two sessions overlap.
+    Modules with the fewest groups are assigned first, and a branch is cut as
+    soon as a remaining module has no group compatible with the minutes
+    already taken.
+
+    Args:
+        teaching_sessions (list): Output of get_teaching_sessions_by_modules
+            for the modules of the semester, already restricted to its season.
+        limit (int): Maximum number of timetables returned, all of them if None.
+
+    Returns:
+        list: Timetables, each a dict with the chosen "groups" (module title ->
+        group name) and its "sessions" (module_title, group_name, day, time,
+        location, periodicity) ordered by day and time.
+    """
+    modules = sorted(module_groups(teaching_sessions), key=lambda module: len(module[1]))
+    timetables = []
+
+    def search(index, used, chosen):
+        if limit is not None and len(timetables) >= limit:
+            return
+        if index == len(modules):
+            sessions = [
+                {
+                    "module_title": title,
+                    "group_name": group_name,
+                    "day": str(ts.get("day", "")).strip(),
+                    "time": str(ts.get("time", "")).strip(),
+                    "location": str(ts.get("location", "")).strip(),
+                    "periodicity": str(ts.get("periodicity", "")).strip(),
+                }
+                for title, group_name, group_sessions in chosen
+                for ts in group_sessions
+            ]
+            timetables.append({
+                "groups": {title: group_name for title, group_name, _ in chosen},
+                "sessions": sorted(sessions, key=_session_order),
+            })
+            return
+        title, groups = modules[index]
+        for group_name, mask, group_sessions in groups:
+            if mask & used:
+                continue
+            taken = used | mask
+            # Forward check: every later module must still have a free group
+            if all(any(not (m & taken) for _, m, _ in later) for _, later in modules[index + 1:]):
+                chosen.append((title, group_name, group_sessions))
+                search(index + 1, taken, chosen)
+                chosen.pop()
+
+    search(0, 0, [])
+    return timetables
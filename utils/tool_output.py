@@ -0,0 +1,101 @@
+import json
+
+DEFAULT_TOKEN_BUDGET = 1500
+
+# Row fields merged into one list per module, with their short output names
+LIST_FIELDS = {
+    "occupation": "occupations",
+    "supporting_learning_outcomes": "learning_outcomes",
+    "supported_skills": "skills",
+}
+
+
+def estimate_tokens(text):
+    """Rough token count of a text (about 4 characters per token)."""
+    return (len(text) + 3) // 4
+
+
+def _compact(value):
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+
+
+def _as_list(value):
+    if isinstance(value, dict):
+        return list(value.values())
+    if isinstance(value, list):
+        return value
+    return [value]
+
+
+def dedupe_modules(rows, score_key=None):
+    """
+    Merge the rows of a retrieval tool into one item per module.
+
+    Args:
+        rows (list): Ranked rows, each with a "module" dict holding the "module_title".
+        score_key (str): Row field holding the score; the best score of a module is kept.
+
+    Returns:
+        list: One dict per module, in order of first appearance, with the
+        occupations, learning outcomes and skills of all its rows.
+    """
+    modules = {}
+    for row in rows:
+        title = row["module"]["module_title"]
+        item = modules.get(title)
+        if item is None:
+            item = modules[title] = {"module": title, "type": row["module"].get("module_type")}
+        if score_key is not None and score_key in row:
+            score = round(float(row[score_key]), 2)
+            item["score"] = max(item.get("score", score), score)
+        for field, name in LIST_FIELDS.items():
+            if field not in row:
+                continue
+            values = item.setdefault(name, [])
+            for value in _as_list(row[field]):
+                if value not in values:
+                    values.append(value)
+    return list(modules.values())
+
+
+def format_modules(rows, score_key=None, token_budget=DEFAULT_TOKEN_BUDGET):
+    """
+    Format the rows of a retrieval tool as compact JSON for the LLM.
+
+    Modules are deduplicated, then added in rank order until the token budget
+    is reached; the first module is always kept. The number of modules left
+    out is reported in the output.
+
+    Args:
+        rows (list): Ranked rows returned by a retrieval strategy.
+        score_key (str): Row field holding the score, if any.
+        token_budget (int): Maximum estimated tokens of the output.
+
+    Returns:
+        tuple: (text, stats) where stats holds the estimated "tokens" of the
+        output, the "baseline_tokens" of printing every row, the "tokens_saved"
+        and the number of "modules" kept and "omitted".
+    """
+    modules = dedupe_modules(rows, score_key)
+    budget_chars = token_budget * 4
+    kept = []
+    # Room for the wrapper: {"modules":[],"omitted":N}
+    used = len(_compact({"modules": [], "omitted": len(modules)}))
+    for module in modules:
+        size = len(_compact(module)) + (1 if kept else 0)
+        if kept and used + size > budget_chars:
+            break
+        kept.append(module)
+        used += size
+
+    text = _compact({"modules": kept, "omitted": len(modules) - len(kept)})
+    tokens = estimate_tokens(text)
+    baseline_tokens = estimate_tokens("\n".join(str(row) for row in rows))
+    stats = {
+        "tokens": tokens,
+        "baseline_tokens": baseline_tokens,
+        "tokens_saved": max(baseline_tokens - tokens, 0),
+        "modules": len(kept),
+        "omitted": len(modules) - len(kept),
+    }
+    return text, stats
@@ -0,0 +1,264 @@
+import functools
+import json
+import os
+import random
+import threading
+import time
+from contextvars import ContextVar
+
+import streamlit as st
+
+DEFAULT_TRACE_FILE = ".cache/traces.jsonl"
+
+_current_span = ContextVar("trace_span", default=None)
+_exporter = None
+_exporter_lock = threading.Lock()
+
+
+class JsonlSpanExporter:
+    """Appends finished traces to a JSON lines file, one span per line with the field names of OTLP JSON spans."""
+
+    def __init__(self, path=DEFAULT_TRACE_FILE):
+        """
+        Initialize the exporter.
+
+        Args:
+            path (str): Trace file, created with its directory if missing.
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    def export(self, spans):
+        """Write the spans of a trace."""
+        lines = "".join(json.dumps(span.to_dict(), default=str) + "\n" for span in spans)
+        with self._lock, open(self.path, "a", encoding="utf-8") as f:
+            f.write(lines)
+
+
+class Trace:
+    def __init__(self, exporter=None):
+        """The spans of one run, exported together when its root span ends."""
+        self.trace_id = "%032x" % random.getrandbits(128)
+        self.exporter = exporter
+        self.spans = []
+        # Agent name -> last turn span of the agent, parent of the tool calls it requested
+        self.agent_turns = {}
+        self._lock = threading.Lock()
+
+    def add(self, span):
+        with self._lock:
+            self.spans.append(span)
+
+
+class Span:
+    def __init__(self, trace, name, kind, parent=None, attributes=None):
+        """A timed operation of a trace; use as a context manager, or call end()."""
+        self.trace = trace
+        self.span_id = "%016x" % random.getrandbits(64)
+        self.parent = parent
+        self.name = name
+        self.kind = kind
+        self.attributes = dict(attributes or {})
+        self.start_ns = time.time_ns()
+        self.end_ns = None
+        self.error = None
+        self._token = None
+
+    @property
+    def duration_ms(self):
+        return ((self.end_ns or time.time_ns()) - self.start_ns) / 1e6
+
+    def set(self, **attributes):
+        """Add attributes (token counts, payload sizes...) to the span."""
+        self.attributes.update(attributes)
+        return self
+
+    def end(self, error=None):
+        """Finish the span; ending the root span exports the whole trace."""
+        if self.end_ns is not None:
+            return
+        self.end_ns = time.time_ns()
+        self.error = str(error) if error is not None else None
+        self.trace.add(self)
+        if self.parent is None and self.trace.exporter is not None:
+            try:
+                self.trace.exporter.export(self.trace.spans)
+            except OSError as e:
+                print(f"Trace export failed: {e}")
+
+    def __enter__(self):
+        self._token = _current_span.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        _current_span.reset(self._token)
+        self.end(exc)
+        return False
+
+    def to_dict(self):
+        return {
+            "traceId": self.trace.trace_id,
+            "spanId": self.span_id,
+            "parentSpanId": self.parent.span_id if self.parent else "",
+            "name": self.name,
+            "kind": self.kind,
+            "startTimeUnixNano": self.start_ns,
+            "endTimeUnixNano": self.end_ns,
+            "attributes": self.attributes,
+            "status": {"code": "ERROR", "message": self.error} if self.error else {"code": "OK"},
+        }
+
+
+class _NoSpan:
+    """Stand-in returned outside of a trace, so instrumented code needs no checks."""
+
+    trace = None
+
+    def set(self, **attributes):
+        return self
+
+    def end(self, error=None):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+NO_SPAN = _NoSpan()
+
+
+def start_trace(name, **attributes):
+    """
+    Start the root span of a run and make it the current span.
+
+    Like track_llm_usage, it is set in the current context only: tasks started
+    afterwards inherit it, and code resuming in another context must call
+    use_span() again.
+    """
+    exporter = get_trace_exporter()
+    if exporter is None:
+        return NO_SPAN
+    span = Span(Trace(exporter), name, "run", attributes=attributes)
+    use_span(span)
+    return span
+
+
+def start_span(name, kind="internal", parent=None, **attributes):
+    """
+    Start a span under `parent`, the current span by default.
+
+    Returns NO_SPAN when no trace is running. The span is not made current:
+    use it as a context manager for that.
+    """
+    parent = parent or _current_span.get()
+    if parent is None or parent.trace is None:
+        return NO_SPAN
+    return Span(parent.trace, name, kind, parent, attributes)
+
+
+def use_span(span):
+    """Make `span` the current span of the current context."""
+    _current_span.set(span if span is not NO_SPAN else None)
+
+
+def current_span():
+    """The current span, or NO_SPAN outside of a trace."""
+    return _current_span.get() or NO_SPAN
+
+
+def traced(kind):
+    """Decorator recording each call of a blocking function as a `kind` span, with the size of its result."""
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with start_span(fn.__name__, kind) as span:
+                result = fn(*args, **kwargs)
+                span.set(response_chars=len(str(result)) if result is not None else 0)
+                return result
+        return wrapper
+    return decorator
+
+
+def summarize_trace(spans):
+    """
+    Where a run spent its time.
+
+    Args:
+        spans (list): Spans of one trace, as Span objects or exported dicts.
+
+    Returns:
+        list: One row per span kind and name, slowest first, with the number
+        of calls, the total and maximum duration in ms, the share of the run
+        and the LLM tokens when relevant.
+    """
+    spans = [span.to_dict() if isinstance(span, Span) else span for span in spans]
+    root = next((s for s in spans if not s["parentSpanId"]), None)
+    run_ms = (root["endTimeUnixNano"] - root["startTimeUnixNano"]) / 1e6 if root else 0
+    rows = {}
+    for span in spans:
+        if span is root:
+            continue
+        duration = (span["endTimeUnixNano"] - span["startTimeUnixNano"]) / 1e6
+        row = rows.setdefault((span["kind"], span["name"]), {
+            "kind": span["kind"], "name": span["name"], "calls": 0, "total_ms": 0.0, "max_ms": 0.0,
+            "errors": 0, "input_tokens": 0, "output_tokens": 0,
+        })
+        row["calls"] += 1
+        row["total_ms"] += duration
+        row["max_ms"] = max(row["max_ms"], duration)
+        row["errors"] += span["status"]["code"] == "ERROR"
+        row["input_tokens"] += span["attributes"].get("input_tokens", 0) or 0
+        row["output_tokens"] += span["attributes"].get("output_tokens", 0) or 0
+    for row in rows.values():
+        row["total_ms"] = round(row["total_ms"], 1)
+        row["max_ms"] = round(row["max_ms"], 1)
+        row["share"] = round(row["total_ms"] / run_ms, 3) if run_ms else 0.0
+    return sorted(rows.values(), key=lambda row: row["total_ms"], reverse=True)
+
+
+def read_trace(path, trace_id=None):
+    """Spans of a trace of a JSON lines trace file, the last trace if `trace_id` is None."""
+    traces = {}
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            span = json.loads(line)
+            traces.setdefault(span["traceId"], []).append(span)
+    if not traces:
+        return []
+    return traces.get(trace_id, []) if trace_id else list(traces.values())[-1]
+
+
+def format_summary(rows):
+    """Text table of summarize_trace rows."""
+    lines = [f"{'kind':<10}{'name':<42}{'calls':>6}{'total ms':>11}{'max ms':>10}{'share':>8}"]
+    for row in rows:
+        lines.append(
+            f"{row['kind']:<10}{row['name'][:41]:<42}{row['calls']:>6}{row['total_ms']:>11.1f}"
+            f"{row['max_ms']:>10.1f}{row['share']:>8.0%}"
+        )
+    return "\n".join(lines)
+
+
+def get_trace_exporter():
+    """Return the process-wide trace exporter writing to TRACE_FILE, or None if TRACING is set to "off"."""
+    global _exporter
+    if st.secrets.get("TRACING", "on") == "off":
+        return None
+    if _exporter is None:
+        with _exporter_lock:
+            if _exporter is None:
+                _exporter = JsonlSpanExporter(st.secrets.get("TRACE_FILE", DEFAULT_TRACE_FILE))
+    return _exporter
+
+
+if __name__ == "__main__":
+    import sys
+
+    # python -m utils.tracing [trace file] [trace id]
+    trace_file = sys.argv[1] if len(sys.argv) > 1 else DEFAULT_TRACE_FILE
+    print(format_summary(summarize_trace(read_trace(trace_file, sys.argv[2] if len(sys.argv) > 2 else None))))